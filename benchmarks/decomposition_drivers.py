@@ -0,0 +1,102 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""
+Wall-clock time of drivers of qr and svd of a single block in the NumPy backend, depending on its shape.
+
+Compared are: Householder QR (scipy.linalg.qr) and CholeskyQR2 for qr;
+gesdd, gesvd, and CholeskyQR2 followed by gesdd of the square factor R for svd.
+The last column gives the driver selected by the backend with the current thresholds,
+see ``_drivers`` in yastn/backend/backend_np.py.
+
+Output for a single core, OpenBLAS 0.3.31, float64 (times in ms)::
+
+        m     n  ratio | qr:  householder  cholqr2 | svd:   gesdd   gesvd  cholqr2 | selected
+       64    64      1 |           0.24     0.30 |         1.02    1.82     1.54 | householder / gesdd
+      256   256      1 |           5.40    10.28 |        21.48  118.24    29.68 | householder / gesdd
+      256    16     16 |           0.07     0.11 |         0.17    0.16     0.21 | householder / gesdd
+     8192    16    512 |           2.34     1.67 |         3.05    3.30     2.65 | householder / gesdd
+      128    32      4 |           0.12     0.13 |         0.33    0.50     0.39 | householder / gesdd
+     1024    32     32 |           0.66     0.61 |         1.29    1.38     1.10 | cholqr2 / cholqr2
+     4096    32    128 |           3.44     2.77 |         5.02    5.00     3.73 | cholqr2 / cholqr2
+      256    64      4 |           0.64     0.50 |         1.82    3.07     1.71 | householder / gesdd
+     1024    64     16 |           2.62     1.86 |         4.69    5.57     3.18 | cholqr2 / cholqr2
+    16384    64    256 |          95.49    43.03 |        93.46  105.45    58.42 | cholqr2 / cholqr2
+      512   128      4 |           4.68     3.56 |         9.98   25.77     9.20 | householder / gesdd
+     1024   128      8 |           9.26     6.32 |        14.80   33.11    12.69 | cholqr2 / gesdd
+     4096   128     32 |          73.01    27.75 |        77.97   98.75    38.90 | cholqr2 / cholqr2
+     2048   256      8 |          55.53    41.90 |        76.16  228.09    71.28 | cholqr2 / gesdd
+     2000   500      4 |         101.92   124.50 |       239.43  913.52   227.20 | householder / gesdd
+
+CholeskyQR2 replaces Householder QR by matrix multiplications and triangular solves.
+For qr, it pays off for blocks with at least 32 columns and aspect ratio of at least 8;
+at ratio 4 it still wins for narrow blocks but loses for wide ones, e.g., 2000 x 500 (by 30% for complex128).
+For svd, where decomposition of R adds a fixed cost, it pays off from aspect ratio 16.
+Blocks with less than 32 columns are memory bound, and the drivers perform similarly.
+QR-preconditioning with Householder QR does not help, as gesdd and gesvd already do it for very rectangular blocks.
+Gesdd is never slower than gesvd, except for the smallest blocks where both are equally fast,
+so it is used throughout, with gesvd as a fallback.
+
+Usage: python decomposition_drivers.py [--dtype complex128] [--repeat 5]
+"""
+import argparse
+import time
+import numpy as np
+import scipy.linalg
+import yastn.backend.backend_np as backend
+
+SHAPES = [(64, 64), (256, 256), (256, 16), (8192, 16), (128, 32), (1024, 32), (4096, 32),
+          (256, 64), (1024, 64), (16384, 64), (512, 128), (1024, 128), (4096, 128), (2048, 256), (2000, 500)]
+
+
+def timeit(f, A, repeat):
+    f(A)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        f(A)
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+def cholqr2_svd(A):
+    Q, R = backend._cholesky_qr2(A)
+    U, S, V = scipy.linalg.svd(R, full_matrices=False)
+    return Q @ U, S, V
+
+
+def main(args):
+    rng = np.random.default_rng(0)
+    drivers = {'householder': lambda A: scipy.linalg.qr(A, mode='economic'),
+               'cholqr2': backend._cholesky_qr2,
+               'gesdd': lambda A: scipy.linalg.svd(A, full_matrices=False, lapack_driver='gesdd'),
+               'gesvd': lambda A: scipy.linalg.svd(A, full_matrices=False, lapack_driver='gesvd'),
+               'cholqr2_svd': cholqr2_svd}
+    print(f"{'m':>5} {'n':>5} {'ratio':>6} | qr:  householder  cholqr2 | svd:   gesdd   gesvd  cholqr2 | selected")
+    for m, n in SHAPES:
+        A = rng.standard_normal((m, n))
+        if 'complex' in args.dtype:
+            A = A + 1j * rng.standard_normal((m, n))
+        A = A.astype(args.dtype)
+        repeat = max(args.repeat, int(2e6 / A.size))
+        t = {k: timeit(f, A, repeat) for k, f in drivers.items()}
+        selected = ('cholqr2' if backend._use_cholqr(A.shape, backend._drivers['qr_ratio']) else 'householder') + ' / ' + \
+                   ('cholqr2' if backend._use_cholqr(A.shape, backend._drivers['svd_ratio']) else 'gesdd')
+        print(f"{m:>5} {n:>5} {m // n:>6} | {t['householder']:>14.2f} {t['cholqr2']:>8.2f} | "
+              f"{t['gesdd']:>12.2f} {t['gesvd']:>7.2f} {t['cholqr2_svd']:>8.2f} | {selected}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dtype", choices=['float64', 'complex128'], default='float64')
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -336,6 +336,36 @@ def test_dmrg_Ising_PBC_Z2(config=cfg, tol=1e-4):
                 assert (EE * psi * (np.exp(-1j * EE * tf)) - psi1).norm() < tol
 
 
+def test_dmrg_single_precision(config=cfg):
+    """
+    DMRG with tensors in single precision, and with mixed-precision policy,
+    where decompositions, norms and orthogonalization of Krylov vectors run in double precision.
+    Ground-state energies are compared with the exact result.
+    """
+    opts_config = {} if config is None else \
+        {'backend': config.backend,
+        'default_device': config.default_device}
+    N, Dmax = 7, 8
+    E_target = -3.427339492125
+    parameters = {"t": 1.0, "mu": 0.2,
+                  "rN": range(N),
+                  "rNN": [(i, i+1) for i in range(N - 1)]}
+    H_str = r"\sum_{i,j \in rNN} t (cp_{i} c_{j} + cp_{j} c_{i})"
+    H_str += r" + \sum_{j\in rN} mu cp_{j} c_{j}"
+    for mixed_precision, tol in [(False, 1e-5), (True, 1e-6)]:
+        ops = yastn.operators.SpinlessFermions(sym='U1', default_dtype='float32',
+                                               mixed_precision=mixed_precision, **opts_config)
+        generate = mps.Generator(N=N, operators=ops)
+        generate.random_seed(seed=0)
+        H = generate.mpo_from_latex(H_str, parameters)
+        psi = generate.random_mps(D_total=Dmax, n=3, dtype='float32')
+        mps.dmrg_(psi, H, method='2site', energy_tol=1e-7, max_sweeps=20,
+                  opts_svd={'tol': 1e-6, 'D_total': Dmax})
+        out = mps.dmrg_(psi, H, method='1site', Schmidt_tol=1e-6, max_sweeps=20)
+        assert abs(out.energy - E_target) < tol
+        assert all(psi[n].yast_dtype == 'float32' for n in psi.sweep())
+
+
 def test_dmrg_raise(config=cfg):
     opts_config = {} if config is None else \
         {'backend': config.backend,
@@ -364,3 +394,4 @@ if __name__ == "__main__":
     test_dmrg({'config': cfg})
     test_dmrg_XX_model_U1_sum_of_Mpos()
     test_dmrg_Ising_PBC_Z2()
+    test_dmrg_single_precision()
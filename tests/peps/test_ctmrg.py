@@ -163,6 +163,20 @@ def test_ctm_ising():
     check_ZZ(env, ops, ZZ_exact[beta], bond=((0, 8), (2, 8)))
 
 
+def test_ctm_ising_subspace_svd():
+    """ CTM with svd of projectors warm-started from their previous singular vectors. """
+    ops = yastn.operators.Spin12(sym='dense', backend=cfg.backend, default_device=cfg.default_device)
+    ops.random_seed(seed=0)
+    psi = create_Ising_peps(ops, beta=0.3, lattice='checkerboard', dims=(2, 2), boundary='infinite', gauges=False)
+    env = fpeps.EnvCTM(psi, init='eye')
+    opts_svd = {'D_total': 8, 'tol': 1e-10, 'policy': 'subspace'}
+    out = env.ctmrg_(max_sweeps=1000, opts_svd=opts_svd, method='2site', corner_tol=tol_exp)
+    assert out.converged
+    assert len(env._svd_subspaces) == 8  # two sites of checkerboard lattice times four projectors
+    check_Z(env, ops, 0.)
+    check_ZZ(env, ops, 0.352250)
+
+
 def test_ctm_save_load_copy():
     ops = yastn.operators.Spin12(sym='dense', backend=cfg.backend, default_device=cfg.default_device)
 
@@ -188,4 +202,5 @@ def test_ctm_save_load_copy():
 
 if __name__ == '__main__':
     test_ctm_ising()
+    test_ctm_ising_subspace_svd()
     test_ctm_save_load_copy()
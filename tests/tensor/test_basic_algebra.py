@@ -355,6 +355,49 @@ def test_hf_union_exceptions():
         # Operation requires two yastn.Tensor-s
 
 
+def test_algebra_in_place():
+    """ apxb_ and scale_ overwrite data of a tensor. """
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(0, 1), D=(2, 3))
+    a = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg1.conj()])
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg1.conj()])
+    c = a.apxb(b, x=0.5)
+    data = a._data
+    assert a.apxb_(b, x=0.5) is a
+    assert a._data is data  # the same structure and dtype -> no new memory
+    assert (a - c).norm() < tol
+    assert a.scale_(2.) is a and a._data is data
+    assert (a - 2 * c).norm() < tol
+    #
+    # different structures, or dtype promotion
+    leg3 = yastn.Leg(config_U1, s=1, t=(1, 2), D=(3, 2))
+    b = yastn.rand(config=config_U1, legs=[leg3, leg2.conj(), leg1.conj()])
+    c = a.apxb(b, x=-1)
+    a.apxb_(b, x=-1)
+    assert (a - c).norm() < tol and a.struct == c.struct
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg1.conj()], dtype='complex128')
+    c = a.apxb(b, x=2)
+    a.apxb_(b, x=2)
+    assert (a - c).norm() < tol and a.yast_dtype == 'complex128'
+    a.scale_(1j)
+    assert (a - 1j * c).norm() < tol
+
+
+def test_krylov_in_place():
+    """ expand_krylov_space updates new Krylov vectors in place, but not data shared with earlier ones. """
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 4))
+    v0 = yastn.rand(config=config_U1, legs=[leg, leg.conj()])
+    v0 = v0 / v0.norm()
+    v1 = yastn.rand(config=config_U1, legs=[leg, leg.conj()])
+    v1 = v1 - v0.vdot(v1) * v0
+    v1 = v1 / v1.norm()
+    ref = v0.copy()
+    for hermitian in (False, True):
+        # f returns an earlier Krylov vector, which is orthogonalized to zero
+        V, _, happy = v0.expand_krylov_space(lambda x: v0, 1e-13, 3, hermitian, [v0, v1], {(0, 0): 0., (1, 0): 1.})
+        assert happy and len(V) == 2 and V[0] is v0
+        assert (v0 - ref).norm() < tol
+
 if __name__ == '__main__':
     test_algebra_basic()
     test_add_diagonal()
@@ -364,3 +407,5 @@ if __name__ == '__main__':
     test_algebra_exceptions()
     test_hf_union_exceptions()
     test_algebra_allclose()
+    test_algebra_in_place()
+    test_krylov_in_place()
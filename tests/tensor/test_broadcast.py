@@ -159,8 +159,63 @@ def test_broadcast_exceptions():
         # There should be exactly one axes for each tensor to be projected.
 
 
+def test_broadcast_legs():
+    """ test broadcast_legs multiplying several legs in a single pass """
+    leg0 = yastn.Leg(config_U1, s=1, t=(-1, 1), D=(7, 8))
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 1, 2), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(-1, 1, 2), D=(4, 5, 6))
+    leg3 = yastn.Leg(config_U1, s=1, t=(-1, 1, 2), D=(7, 8, 9))
+    b = yastn.rand(config=config_U1, legs=[leg1.conj(), leg2, leg3, leg3.conj()])
+    a0 = yastn.rand(config=config_U1, isdiag=True, legs=(leg1, leg1.conj()))
+    a2 = yastn.rand(config=config_U1, isdiag=True, legs=(leg0, leg0.conj()))  # charge 2 is missing
+    a3 = yastn.randC(config=config_U1, isdiag=True, legs=(leg3, leg3.conj()))
+
+    for diags, axes in [((a0,), 0), ((a0, a3), (0, -1)), ((a3, a0, a2), (3, 0, 2))]:
+        r1 = yastn.broadcast_legs(b, *diags, axes=axes)
+        r2 = b
+        for d, ax in zip(diags, axes if isinstance(axes, tuple) else (axes,)):
+            r2 = d.broadcast(r2, axes=ax)
+        assert r1.is_consistent()
+        assert r1.struct == r2.struct
+        assert yastn.norm(r1 - r2) < tol
+        assert r1.yast_dtype == r2.yast_dtype
+
+    # in place; memory is reused if no blocks are removed
+    c = b.copy()
+    a3r = yastn.rand(config=config_U1, isdiag=True, legs=(leg3, leg3.conj()))
+    ref = yastn.broadcast_legs(c, a0, a3r, axes=(0, 3))
+    data = c._data
+    r1 = c.broadcast_legs_(a0, a3r, axes=(0, 3))
+    assert r1 is c and r1._data is data
+    assert yastn.norm(r1 - ref) < tol
+    r1 = c.broadcast_legs_(a2, axes=2)  # removes blocks
+    assert r1.is_consistent() and yastn.norm(r1 - a2.broadcast(ref, axes=2)) < tol
+    #
+    # memory is reused also for fresh tensors with structure equal to one already in cache
+    for _ in range(2):
+        c = yastn.rand(config=config_U1, legs=[leg1.conj(), leg2, leg3, leg3.conj()])
+        ref = yastn.broadcast_legs(c, a0, a3r, axes=(0, 3))
+        data = c._data
+        r1 = c.broadcast_legs_(a0, a3r, axes=(0, 3))
+        assert r1._data is data and yastn.norm(r1 - ref) < tol
+
+    with pytest.raises(yastn.YastnError):
+        b.broadcast_legs(a0, a2, axes=1)
+        # There should be exactly one axis for each diagonal tensor.
+    with pytest.raises(yastn.YastnError):
+        b.broadcast_legs(a2, a2, axes=(1, 1))
+        # Repeated axis in axes.
+    with pytest.raises(yastn.YastnError):
+        b.broadcast_legs(a0, a2, axes=(0, 1))
+        # Bond dimensions do not match.
+    with pytest.raises(yastn.YastnError):
+        a2.broadcast_legs(a2, axes=0)
+        # Tensor with legs to be multiplied cannot be diagonal; use broadcast.
+
+
 if __name__ == '__main__':
     test_broadcast_dense()
     test_broadcast_U1()
     test_broadcast_Z2xU1()
     test_broadcast_exceptions()
+    test_broadcast_legs()
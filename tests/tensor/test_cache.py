@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 """ changing tests controls and size of lru_cache in some auxiliary functions """
+import pytest
 import yastn
 try:
     from .configs import config_Z2
@@ -44,14 +45,97 @@ def test_cache():
     for _ in range(100):
         b.broadcast(a, axes=3)
 
+    for _ in range(100):
+        a.broadcast_legs(b, axes=3)
+
     cache_info = yastn.get_cache_info()
     assert cache_info["merge_to_matrix"] == (297, 3, 10, 3)
     assert cache_info["broadcast"] == (99, 1, 10, 1)
+    assert cache_info["broadcast_legs"] == (99, 1, 10, 1)
     yastn.clear_cache()
     cache_info = yastn.get_cache_info()
     assert cache_info["merge_to_matrix"] == (0, 0, 10, 0)
     assert cache_info["broadcast"] == (0, 0, 10, 0)
+    assert cache_info["broadcast_legs"] == (0, 0, 10, 0)
+
+
+def test_cache_interning():
+    """ cache hits for equal structures represented by different objects. """
+    yastn.set_cache_maxsize(maxsize=10)
+    legs = [yastn.Leg(config_Z2, s=s, t=(0, 1), D=(2, 3)) for s in (-1, 1, 1)]
+    a = yastn.rand(config=config_Z2, legs=legs)
+    b = yastn.rand(config=config_Z2, legs=legs)  # equal, but not identical, struct
+    assert a.struct == b.struct and a.struct is not b.struct
+    for _ in range(10):
+        a.fuse_legs(axes=((0, 1), 2), mode='hard')
+        b.fuse_legs(axes=((0, 1), 2), mode='hard')
+    cache_info = yastn.get_cache_info()
+    assert cache_info["fuse_hard"] == (19, 1, 10, 1)
+    yastn.set_cache_maxsize(maxsize=1024)
+
+
+def test_cache_maxbytes():
+    """ statistics of caches and eviction by memory budget. """
+    yastn.set_cache_maxsize(maxsize=1024)
+    legs = [yastn.Leg(config_Z2, s=s, t=(0, 1), D=(2, 3)) for s in (-1, 1, 1, -1)]
+    a = yastn.rand(config=config_Z2, legs=legs)
+    for _ in range(5):
+        for axes in (((0, 1), (2, 3)), ((0, 2), (1, 3)), ((1, 3), (2, 0))):
+            a.svd(axes=axes)
+    info = yastn.get_cache_info(detailed=True)["merge_to_matrix"]
+    assert (info.hits, info.misses, info.currsize) == (12, 3, 3)
+    assert abs(info.hit_rate - 0.8) < tol
+    assert info.nbytes > 0 and info.time > 0 and info.maxbytes is None
+    #
+    # budget of a single cache
+    yastn.set_cache_maxbytes(merge_to_matrix=info.nbytes - 1)
+    info = yastn.get_cache_info(detailed=True)["merge_to_matrix"]
+    assert info.currsize == 2 and info.nbytes <= info.maxbytes
+    #
+    # total budget evicts entries with the smallest number of hits per byte
+    a.fuse_legs(axes=((0, 1), (2, 3)), mode='hard')  # single call, no hits
+    total = sum(x.nbytes for x in yastn.get_cache_info(detailed=True).values())
+    yastn.set_cache_maxbytes(total - 1)
+    info = yastn.get_cache_info(detailed=True)
+    assert info["fuse_hard"].currsize == 0
+    assert info["merge_to_matrix"].currsize == 2
+    assert sum(x.nbytes for x in info.values()) < total
+    #
+    with pytest.raises(yastn.YastnError):
+        yastn.set_cache_maxbytes(merge_to_matrics=100)
+        # Unknown cache merge_to_matrics; should be one of ...
+    yastn.set_cache_maxbytes(None, merge_to_matrix=None)
+    yastn.clear_cache()
+    assert all(x.nbytes == 0 for x in yastn.get_cache_info(detailed=True).values())
+
+
+def test_cache_save_load(tmp_path):
+    """ metadata saved to disk is reused after clearing caches. """
+    yastn.set_cache_maxsize(maxsize=1024)
+    legs = [yastn.Leg(config_Z2, s=s, t=(0, 1), D=(2, 3)) for s in (-1, 1, 1, -1)]
+    a = yastn.rand(config=config_Z2, legs=legs)
+    U, S, V = a.svd(axes=((0, 1), (2, 3)))
+    saved = yastn.save_cache(tmp_path)
+    assert saved["svd"] == 1 and saved["merge_to_matrix"] == 1
+    #
+    yastn.clear_cache()
+    loaded = yastn.load_cache(tmp_path)
+    assert loaded == saved
+    U2, S2, V2 = a.svd(axes=((0, 1), (2, 3)))
+    info = yastn.get_cache_info(detailed=True)
+    assert info["svd"].misses == 1 and info["svd"].time == 0  # taken from disk
+    assert info["merge_to_matrix"].time == 0
+    assert (U2 @ S2 @ V2 - a).norm() < tol
+    assert U2.struct == U.struct and V2.struct == V.struct
+    #
+    assert all(x == 0 for x in yastn.load_cache(tmp_path / "empty").values())
+    yastn.clear_cache()
 
 
 if __name__ == '__main__':
     test_cache()
+    test_cache_interning()
+    test_cache_maxbytes()
+    import tempfile, pathlib
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_cache_save_load(pathlib.Path(tmp_dir))
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import numpy as np
 import pytest
 import yastn
 from yastn.backend import backend_np
@@ -65,7 +66,61 @@ def test_make_config():
         #  sym encoded as string only supports: 'dense', 'Z2', 'Z3', 'U1', 'U1xU1', 'U1xU1xZ2'
 
 
+def test_prune_zero_blocks():
+    """ zero-block pruning policy set in config """
+    cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                            default_device=config_U1.default_device, prune_tol=1e-10)
+    cfg0 = cfg._replace(prune_tol=0)
+    leg = yastn.Leg(cfg, s=1, t=(-1, 0, 1), D=(2, 3, 4))
+    a = yastn.rand(config=cfg, legs=[leg, leg, leg.conj()])
+    b = a.copy()
+    b.set_block(ts=(0, 0, 0), Ds=(3, 3, 3), val='zeros')
+    yastn.clear_pruning_info()
+
+    c = a - b  # only block (0, 0, 0) is non-zero
+    assert c.struct.t == ((0, 0, 0),)
+    info = yastn.get_pruning_info()
+    assert info.calls == info.checks == info.pruned == 1
+    assert info.blocks == len(a.struct.t) - 1
+    assert info.nbytes == (a.size - 27) * 8
+    assert (a + (-a)).struct.t == ()
+
+    # tensordot
+    e = a.copy()
+    for t, D in zip(a.struct.t, a.struct.D):
+        if t[0] == 0:
+            e.set_block(ts=t, Ds=D, val='zeros')
+    d = yastn.tensordot(e, a, axes=((1, 2), (1, 2)), conj=(0, 1))
+    ref = yastn.tensordot(e._replace(config=cfg0), a._replace(config=cfg0), axes=((1, 2), (1, 2)), conj=(0, 1))
+    assert len(d.struct.t) < len(ref.struct.t)
+    assert d.struct == ref.remove_zero_blocks(rtol=1e-10).struct
+    assert yastn.norm(d - ref) < 1e-12
+
+    # svd_with_truncation removes sectors with all singular values below the cutoff
+    m = yastn.rand(config=cfg, legs=[leg, leg.conj()])
+    m.set_block(ts=(1, 1), val=1e-14 * np.random.rand(4, 4))
+    U, S, V = yastn.svd_with_truncation(m, axes=(0, 1))
+    U0, S0, V0 = yastn.svd_with_truncation(m._replace(config=cfg0), axes=(0, 1))
+    assert len(S.struct.t) == len(S0.struct.t) - 1 and len(U.struct.t) == len(U0.struct.t) - 1
+    assert yastn.norm(U @ S @ V - m) < 1e-12
+
+    # frequency of checks
+    yastn.clear_pruning_info()
+    cfg2 = cfg._replace(prune_every=2)
+    a2, b2 = a._replace(config=cfg2), b._replace(config=cfg2)
+    cs = [a2 - b2 for _ in range(4)]
+    info = yastn.get_pruning_info()
+    assert info.calls == 4 and info.checks == info.pruned == 2
+    assert sorted(len(x.struct.t) for x in cs) == [1, 1, len(a.struct.t), len(a.struct.t)]
+
+    # pruning depends on values of elements, so it is not recorded in a plan
+    plan = yastn.ContractionPlan(lambda x, y: x - y)
+    assert plan(a, b).struct.t == ((0, 0, 0),)
+    assert plan._tape is None
+
+
 if __name__ == '__main__':
     # test_config_exceptions()
     # test_config_exceptions_torch()
     test_make_config()
+    test_prune_zero_blocks()
@@ -163,7 +163,70 @@ class TestConj_Z2xU1(unittest.TestCase):
         #
         assert yastn.norm(b - d)<tol
 
+def test_conj_lazy():
+    """ lazy conjugation is fused with merging of blocks in tensordot, and with vdot. """
+    cfg = yastn.make_config(backend=config_Z2xU1.backend, sym=config_Z2xU1.sym,
+                            default_device=config_Z2xU1.default_device, lazy_conj=True, lazy_transpose=True)
+    legs = [yastn.Leg(config_Z2xU1, s=1, t=[(0, 0), (1, 1), (0, 2)], D=[1, 2, 3]),
+            yastn.Leg(config_Z2xU1, s=-1, t=[(0, 0), (1, 0)], D=[2, 3]),
+            yastn.Leg(config_Z2xU1, s=1, t=[(0, 1), (1, 0)], D=[2, 4])]
+    a = yastn.randC(config=config_Z2xU1, legs=legs, n=(1, 1))
+    b = yastn.randC(config=config_Z2xU1, legs=legs, n=(0, 1))
+    al = yastn.load_from_dict(config=cfg, d=a.save_to_dict())
+    bl = yastn.load_from_dict(config=cfg, d=b.save_to_dict())
+
+    cal = al.conj()
+    assert cal.struct == a.conj().struct and cal.dtype == a.dtype
+    c = yastn.tensordot(a.conj(), b, axes=((0, 2), (0, 2)))
+    cl = yastn.tensordot(cal, bl, axes=((0, 2), (0, 2)))
+    assert np.linalg.norm(c.to_numpy() - cl.to_numpy()) < tol
+    assert type(cal._raw).__name__ == '_PendingData' and cal._raw.result is None
+    #
+    # conjugation composed with transposition and a second conjugation
+    tcal = cal.transpose(axes=(2, 1, 0))
+    assert np.linalg.norm(tcal.to_numpy() - a.conj().transpose(axes=(2, 1, 0)).to_numpy()) < tol
+    ccal = tcal.conj()
+    assert np.linalg.norm(ccal.to_numpy() - a.transpose(axes=(2, 1, 0)).to_numpy()) < tol
+    assert yastn.are_independent(al.conj().conj(), al)
+    #
+    # conjugation requested by arguments is fused for any configuration
+    eager = lambda x, c: yastn.load_from_dict(config=config_Z2xU1, d=x.save_to_dict()).conj() if c else x
+    for conj, x, y in [((1, 0), a, b), ((0, 1), al, bl), ((0, 0), al.conj(), b), ((1, 1), a, bl.conj())]:
+        c = yastn.tensordot(x, y, axes=((1, 2), (1, 2)), conj=conj)
+        c_ref = yastn.tensordot(eager(x, conj[0]), eager(y, conj[1]), axes=((1, 2), (1, 2)))
+        assert np.linalg.norm(c.to_numpy() - c_ref.to_numpy()) < tol
+    d = yastn.randC(config=config_Z2xU1, legs=legs, n=(1, 1))
+    dl = yastn.load_from_dict(config=cfg, d=d.save_to_dict())
+    for conj, x, y in [((1, 0), a, d), ((0, 1), al, dl), ((0, 0), al.conj(), d), ((1, 1), a, dl.conj())]:
+        nx, ny = x.to_numpy(), y.to_numpy()
+        nx, ny = (nx.conj() if conj[0] else nx), (ny.conj() if conj[1] else ny)
+        assert abs(yastn.vdot(x, y, conj=conj) - np.sum(nx * ny)) < tol
+    assert abs(yastn.vdot(al, al) - yastn.norm(a) ** 2) < tol
+
+
+def test_conj_lazy_in_place():
+    """ pending conjugation reads data of the source; in-place operations on the source do not change it. """
+    cfg = yastn.make_config(backend=config_Z2xU1.backend, sym=config_Z2xU1.sym,
+                            default_device=config_Z2xU1.default_device, lazy_conj=True)
+    legs = [yastn.Leg(cfg, s=1, t=[(0, 0), (1, 1), (0, 2)], D=[1, 2, 3]),
+            yastn.Leg(cfg, s=-1, t=[(0, 0), (1, 0)], D=[2, 3])]
+    d = yastn.rand(config=cfg, isdiag=True, legs=(legs[0].conj(), legs[0]))
+    for rand in (yastn.rand, yastn.randC):
+        for in_place in [lambda b: b.scale_(2.),
+                         lambda b: b.apxb_(b.copy(), 1.5),
+                         lambda b: b.broadcast_legs_(d, axes=0)]:
+            b = rand(config=cfg, legs=legs, n=(1, 1))
+            ref = b.to_numpy().conj()
+            c = b.conj()
+            in_place(b)
+            assert np.abs(b.to_numpy() - ref.conj()).max() > tol  # b is changed
+            assert np.abs(c.to_numpy() - ref).max() < tol
+            assert yastn.are_independent(c, b)
+
+
 if __name__ == '__main__':
+    test_conj_lazy()
+    test_conj_lazy_in_place()
     test_flip_charges()
     test_conj_basic()
     test_conj_hard_fusion()
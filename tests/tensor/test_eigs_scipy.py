@@ -14,7 +14,7 @@
 # ==============================================================================
 import numpy as np
 import pytest
-from scipy.sparse.linalg import eigs, LinearOperator
+from scipy.sparse.linalg import eigs, eigsh, gmres, LinearOperator
 import yastn
 try:
     from .configs import config_U1
@@ -176,7 +176,50 @@ def test_eigs_temp():
 
 
 
+@pytest.mark.skipif(not config_U1.backend.BACKEND_ID=="numpy", reason="uses scipy for raw data")
+def test_as_linear_operator():
+    legs = [yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 2)),
+            yastn.Leg(config_U1, s=1, t=(0, 1), D=(1, 1)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(2, 3, 2))]
+    a = yastn.rand(config=config_U1, legs=legs)
+    # hermitian transfer matrix
+    f = lambda t: yastn.ncon([t, a, a], [(1, 3), (1, 2, -1), (3, 2, -2)], conjs=(0, 0, 1)) + \
+                  yastn.ncon([t, a, a], [(1, 3), (-1, 2, 1), (-2, 2, 3)], conjs=(0, 1, 0))
+    v0 = yastn.rand(config=a.config, legs=[a.get_legs(0).conj(), a.get_legs(0)], n=0)
+
+    op = yastn.as_linear_operator(f, v0)
+    assert op.shape == (v0.size, v0.size) and op.dtype == np.float64
+    x = op.v0.copy()
+    assert op.to_tensor(x)._data is x  # 1D array is not copied
+    assert np.allclose(op.matvec(x), f(v0).compress_to_1d(op.meta)[0])
+
+    # dense reference and matmat
+    tm = op.matmat(np.eye(op.shape[0]))
+    assert np.allclose(tm, tm.T)
+    X = np.random.rand(op.shape[0], 3)
+    assert np.allclose(op.matmat(X), tm @ X)
+
+    w, vs = eigsh(op, k=2, which='LA', v0=op.v0, tol=1e-12)
+    assert np.allclose(w, np.linalg.eigvalsh(tm)[-2:], rtol=tol)
+    for w0, v in zip(w, vs.T):
+        t = op.to_tensor(v)
+        assert (f(t) - w0 * t).norm() < tol
+
+    b = yastn.rand(config=a.config, legs=[a.get_legs(0).conj(), a.get_legs(0)], n=0)
+    x, info = gmres(op + 10 * LinearOperator(op.shape, matvec=lambda x: x), b.compress_to_1d(op.meta)[0], rtol=1e-12)
+    t = op.to_tensor(x)
+    assert info == 0 and (f(t) + 10 * t - b).norm() < tol
+
+    # results with missing blocks are embedded in the structure of v0
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1, 2), D=(2, 3, 2, 1))
+    v0 = yastn.rand(config=a.config, legs=[leg.conj(), leg], n=0)
+    p = yastn.eye(config=a.config, legs=[a.get_legs(0), a.get_legs(0).conj()])  # projector on charges -1, 0, 1
+    op = yastn.as_linear_operator(lambda t: p.broadcast(t, axes=1), v0)
+    assert (op.to_tensor(op.matvec(op.v0)) - p.broadcast(v0, axes=1)).norm() < tol
+
+
 if __name__ == '__main__':
     test_eigs_simple()
     test_eigs_mismatches()
-    test_eigs_temp()
\ No newline at end of file
+    test_eigs_temp()
+    test_as_linear_operator()
\ No newline at end of file
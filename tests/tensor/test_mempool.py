@@ -0,0 +1,64 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" memory pool of backend kernels on cpu """
+import pytest
+import yastn
+try:
+    from .configs import config_U1
+except ImportError:
+    from configs import config_U1
+
+tol = 1e-10  #pylint: disable=invalid-name
+
+
+@pytest.mark.skipif(config_U1.default_device != 'cpu', reason="memory pool is used on cpu")
+def test_mempool():
+    legs = [yastn.Leg(config_U1, s=s, t=(-1, 0, 1), D=(2, 3, 4)) for s in (-1, 1, 1, -1)]
+    a = yastn.rand(config=config_U1, legs=legs)
+    b = yastn.rand(config=config_U1, legs=[leg.conj() for leg in legs])
+
+    def run(a, b):
+        c = yastn.tensordot(a, b, axes=((1, 2), (1, 2)))
+        U, S, V = yastn.svd(a, axes=((0, 1), (2, 3)))
+        return c, U @ S @ V, a + 2 * b.conj(), a.fuse_legs(axes=((0, 3), (1, 2)), mode='hard').unfuse_legs(axes=(0, 1))
+
+    expected = run(a, b)
+    with config_U1.backend.memory_pool(min_size=1) as pool:
+        for _ in range(3):
+            for x, y in zip(run(a, b), expected):
+                assert (x - y).norm() < tol * y.norm()
+        stats = pool.stats()
+        assert stats.reuse_ratio > 0.5  # repeated sizes are recycled
+        assert stats.nbytes > 0 and stats.nbytes == stats.peak_nbytes
+        c = run(a, b)[0]  # buffer in use is not recycled
+        d = run(a, b)[0]
+        assert c.are_independent(d)
+        assert (c - d).norm() < tol * c.norm()
+        view = c._data[1:]  # views of data keep the buffer in use
+        expected_view = config_U1.backend.clone(view)
+        del c, d
+        run(2 * a, b)
+        assert config_U1.backend.max_abs(view - expected_view) < tol
+
+    assert pool.stats().nbytes == 0  # buffers released at exit
+
+    with config_U1.backend.memory_pool(min_size=1, max_bytes=2000) as pool:
+        for x, y in zip(run(a, b), expected):
+            assert (x - y).norm() < tol * y.norm()
+        assert pool.stats().peak_nbytes <= 2000
+
+
+if __name__ == '__main__':
+    test_mempool()
@@ -0,0 +1,128 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" vectorized meta-information kernels reproduce reference implementations """
+from itertools import groupby, product
+import numpy as np
+import yastn
+from yastn.tensor._auxliary import _slc
+from yastn.tensor._merging import _meta_merge_to_matrix, _leg_structure_merge
+from yastn.tensor._contractions import _common_inds
+try:
+    from .configs import config_dense, config_U1, config_Z2xU1
+except ImportError:
+    from configs import config_dense, config_U1, config_Z2xU1
+
+
+def _common_inds_reference(t_a, t_b, nin_a, nin_b, ndimn_a, ndimn_b, nsym):
+    t_a = np.array(t_a, dtype=np.int64).reshape((len(t_a), ndimn_a, nsym))
+    t_b = np.array(t_b, dtype=np.int64).reshape((len(t_b), ndimn_b, nsym))
+    t_a = t_a[:, nin_a, :].reshape(len(t_a), len(nin_a) * nsym).tolist()
+    t_b = t_b[:, nin_b, :].reshape(len(t_b), len(nin_b) * nsym).tolist()
+    la = [tuple(x) for x in t_a]
+    lb = [tuple(x) for x in t_b]
+    sa = set(la)
+    sb = set(lb)
+    ia = tuple(ii for ii, el in enumerate(la) if el in sb)
+    ib = tuple(ii for ii, el in enumerate(lb) if el in sa)
+    if len(ia) == len(la):
+        ia = None
+    if len(ib) == len(lb):
+        ib = None
+    return ia, ib
+
+
+def _meta_merge_to_matrix_reference(config, struct, slices, axes, inds):
+    s_eff = []
+    s_eff.append(struct.s[axes[0][0]] if len(axes[0]) > 0 else 1)
+    s_eff.append(struct.s[axes[1][0]] if len(axes[1]) > 0 else -1)
+
+    t_old = struct.t if inds is None else [struct.t[ii] for ii in inds]
+    D_old = struct.D if inds is None else [struct.D[ii] for ii in inds]
+    sl_old = slices if inds is None else [slices[ii] for ii in inds]
+    tset = np.array(t_old, dtype=np.int64).reshape((len(t_old), len(struct.s), config.sym.NSYM))
+    Dset = np.array(D_old, dtype=np.int64).reshape(len(D_old), len(struct.s))
+    t, teff, ls = [], [], []
+    for n in (0, 1):
+        ta = tset[:, axes[n], :]
+        Da = Dset[:, axes[n]]
+        Deff = np.prod(Da, axis=1, dtype=np.int64).tolist()
+        Da = [tuple(x) for x in Da.tolist()]
+        s = tuple(struct.s[ii] for ii in axes[n])
+        ta_eff = [tuple(x) for x in config.sym.fuse(ta, s, s_eff[n]).tolist()]
+        ta = [tuple(x) for x in ta.reshape(len(ta), len(s) * config.sym.NSYM).tolist()]
+        teff.append(ta_eff)
+        t.append(ta)
+        ls.append(_leg_structure_merge(ta_eff, ta, Deff, Da))
+
+    smeta = sorted((tel, ter, tl, tr, slo.slcs[0], Do)
+                for tel, ter, tl, tr, slo, Do in zip(teff[0], teff[1], t[0], t[1], sl_old, D_old))
+
+    meta_mrg, t_new, D_new, slices_new, Dlow = [], [], [], [],  0
+    for (tel, ter), gr in groupby(smeta, key=lambda x: x[:2]):
+        ind0 = ls[0].t.index(tel)
+        ind1 = ls[1].t.index(ter)
+        tn = tel + ter
+        t_new.append(tn)
+        D0, D1 = ls[0].D[ind0], ls[1].D[ind1]
+        D_new.append((D0, D1))
+        Dp = D0 * D1
+        Dhigh = Dlow + Dp
+        slices_new.append(_slc(((Dlow, Dhigh),), (D0, D1), Dp))
+        Dlow = Dhigh
+        try:
+            _, _, tl, tr, slo, Do = next(gr)
+            for d0, d1 in product(ls[0].dec[ind0], ls[1].dec[ind1]):
+                if d0.t == tl and d1.t == tr:
+                    meta_mrg.append((tn, slo, Do, (d0.Dslc, d1.Dslc), (d0.Dprod, d1.Dprod)))
+                    _, _, tl, tr, slo, Do = next(gr)
+        except StopIteration:
+            pass
+    struct_new = struct._replace(t=tuple(t_new), D=tuple(D_new), s=tuple(s_eff), size=Dlow)
+    slices_new = tuple(slices_new)
+    return struct_new, slices_new, tuple(meta_mrg), ls[0], ls[1]
+
+
+def test_meta_parity():
+    """ compare vectorized _meta_merge_to_matrix and _common_inds with reference implementations """
+    legs_U1 = [yastn.Leg(config_U1, s=1, t=(-1, 0, 1, 2), D=(1, 2, 3, 1)),
+               yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(2, 1, 2)),
+               yastn.Leg(config_U1, s=1, t=(0, 1), D=(1, 3)),
+               yastn.Leg(config_U1, s=-1, t=(-2, 0, 1), D=(2, 2, 1))]
+    legs_Z2xU1 = [yastn.Leg(config_Z2xU1, s=1, t=((0, 0), (1, 1), (0, 2)), D=(1, 2, 2)),
+                  yastn.Leg(config_Z2xU1, s=-1, t=((0, 0), (1, 1)), D=(2, 1)),
+                  yastn.Leg(config_Z2xU1, s=-1, t=((0, 1), (1, 0), (0, 2)), D=(2, 1, 3))]
+    tensors = [yastn.rand(config_U1, legs=legs_U1),
+               yastn.rand(config_U1, legs=legs_U1, n=1),
+               yastn.rand(config_U1, legs=legs_U1, n=7),  # no blocks
+               yastn.rand(config_Z2xU1, legs=legs_Z2xU1, n=(1, 1)),
+               yastn.rand(config_dense, s=(1, -1, 1), D=(2, 3, 4))]
+    for a in tensors:
+        nd = a.ndim_n
+        for nl in range(nd + 1):
+            for perm in ((tuple(range(nl)), tuple(range(nl, nd))), (tuple(range(nd - nl, nd)), tuple(range(nd - nl)))):
+                for inds in (None, tuple(range(0, len(a.struct.t), 2))):
+                    args = (a.config, a.struct, a.slices, perm, inds)
+                    assert _meta_merge_to_matrix.__wrapped__(*args) == _meta_merge_to_matrix_reference(*args)
+        nsym = a.config.sym.NSYM
+        for b in tensors:
+            if b.config is not a.config:
+                continue
+            for nin_a, nin_b in (((0,), (1,)), ((0, 1), (1, 2)), ((), ()), ((nd - 1,), (0,))):
+                args = (a.struct.t, b.struct.t, nin_a, nin_b, a.ndim_n, b.ndim_n, nsym)
+                assert _common_inds.__wrapped__(*args) == _common_inds_reference(*args)
+
+
+if __name__ == '__main__':
+    test_meta_parity()
@@ -203,7 +203,56 @@ def test_ncon_einsum_exceptions():
         # order does not cover all contracted indices
 
 
+def test_ncon_optimize():
+    """ test selecting order of contractions in ncon based on the structure of tensors. """
+    # dense tensors; legs contracted in a sub-optimal order by default
+    chi, d = 5, 2
+    l = yastn.rand(config=config_dense, s=(-1, 1), D=(chi, chi))
+    a = yastn.rand(config=config_dense, s=(1, -1, 1), D=(chi, d, chi))
+    b = yastn.rand(config=config_dense, s=(-1, 1, -1), D=(chi, d, chi))
+    inds = [(2, 3), (2, 1, -1), (3, 1, -2)]
+    path = yastn.ncon_path([l, a, b], inds)
+    assert path['path'] == ((1, 2), (0, 1))
+    assert path['flops'] == chi ** 4 * d + chi ** 4
+    assert path['peak_memory'] == chi ** 2 + 2 * chi ** 2 * d + chi ** 4
+    r0 = yastn.ncon([l, a, b], inds)
+    for optimize in ('greedy', 'optimal'):
+        path = yastn.ncon_path([l, a, b], inds, optimize=optimize)
+        assert path['path'] in (((0, 1), (0, 2)), ((0, 2), (0, 1)))  # equivalent orders
+        assert path['flops'] == 2 * chi ** 3 * d
+        assert path['peak_memory'] == chi ** 2 + 3 * chi ** 2 * d
+        assert yastn.ncon_path([l, a, b], path['inds'])['path'] == path['path']
+        r1 = yastn.ncon([l, a, b], inds, optimize=optimize)
+        assert yastn.norm(r1 - r0) < tol
+    r2 = yastn.einsum('xy,xza,yzb->ab', l, a, b, optimize='greedy')
+    r3 = yastn.einsum('xy,xza,yzb->ab', l, a, b, order='zxy')
+    assert yastn.norm(r2 - r3) < tol
+
+    # U1 network with traces and conjugations
+    a = yastn.rand(config=config_U1, s=[-1, 1, -1], n=0,
+                  D=((20, 10), (3, 3), (1, 1)), t=((1, 0), (1, 0), (1, 0)))
+    b = yastn.rand(config=config_U1, s=[1, 1, 1], n=1,
+                  D=((4, 4), (2, 2), (20, 10)), t=((1, 0), (1, 0), (1, 0)))
+    c = yastn.rand(config=config_U1, s=[1, 1, 1, -1], n=1,
+                  D=((20, 10), (30, 20), (10, 5), (10, 5)), t=((1, 0), (1, 0), (1, 0), (1, 0)))
+    d = yastn.rand(config=config_U1, s=[1, 1, -1, -1], n=0,
+                  D=((30, 20), (10, 5), (20, 10), (10, 5)), t=((1, 0), (1, 0), (1, 0), (1, 0)))
+    inds = [[4, -2, -0], [-3, -1, 5], [4, 3, 1, 1], [3, 2, 5, 2]]
+    f0 = yastn.ncon([a, b, c, d], inds, conjs=(0, 1, 0, 1))
+    p0 = yastn.ncon_path([a, b, c, d], inds, conjs=(0, 1, 0, 1))
+    for optimize in ('greedy', 'optimal'):
+        f1 = yastn.ncon([a, b, c, d], inds, conjs=(0, 1, 0, 1), optimize=optimize)
+        assert yastn.norm(f1 - f0) < tol
+        p1 = yastn.ncon_path([a, b, c, d], inds, conjs=(0, 1, 0, 1), optimize=optimize)
+        assert p1['flops'] <= p0['flops']
+
+    with pytest.raises(yastn.YastnError):
+        yastn.ncon([a, b, c, d], inds, conjs=(0, 1, 0, 1), optimize='random')
+        # optimize should be None, 'greedy', or 'optimal'.
+
+
 if __name__ == '__main__':
     test_ncon_einsum_syntax()
     test_ncon_einsum_basic()
     test_ncon_einsum_exceptions()
+    test_ncon_optimize()
@@ -0,0 +1,109 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" yastn.ContractionPlan """
+import yastn
+try:
+    from .configs import config_U1, config_Z2_fermionic
+except ImportError:
+    from configs import config_U1, config_Z2_fermionic
+
+tol = 1e-12  #pylint: disable=invalid-name
+
+
+def test_plan_replay():
+    """ replay recorded contractions on tensors with the same structure. """
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 4))
+    phys = yastn.Leg(config_U1, s=1, t=(0, 1), D=(1, 1))
+    L = yastn.rand(config=config_U1, legs=[leg.conj(), leg])
+    A = yastn.rand(config=config_U1, legs=[leg, phys, leg.conj()])
+    R = yastn.rand(config=config_U1, legs=[leg.conj(), leg])
+
+    def f(L, A, R):
+        LAR = yastn.ncon([L, A, R], [(-0, 1), (1, -1, 2), (2, -2)], conjs=(0, 1, 0))
+        return LAR.fuse_legs(axes=(0, (1, 2)), mode='hard'), yastn.tensordot(L, R, axes=(1, 0))
+
+    plan = yastn.ContractionPlan(f)
+    for _ in range(3):
+        A = yastn.rand(config=config_U1, legs=[leg, phys, leg.conj()])
+        r0, r1 = plan(L, A, R)
+        s0, s1 = f(L, A, R)
+        assert (r0 - s0).norm() < tol and (r1 - s1).norm() < tol
+        assert r0.struct == s0.struct and r0.hfs == s0.hfs
+        assert r0.is_consistent() and r1.is_consistent()
+    assert plan.replays == 2
+
+    # structure does not match; fall back to executing f
+    B = yastn.rand(config=config_U1, legs=[leg, phys, leg.conj()], n=1)
+    r0, _ = plan(L, B, R)
+    s0, _ = f(L, B, R)
+    assert (r0 - s0).norm() < tol and r0.struct == s0.struct
+    assert plan.replays == 2
+
+    plan = yastn.ContractionPlan(f, retrace=True)
+    plan(L, A, R)
+    plan(L, B, R)
+    r0, _ = plan(L, B, R)
+    assert (r0 - s0).norm() < tol
+    assert plan.replays == 1
+
+
+def test_plan_fallback():
+    """ functions that cannot be recorded are always executed directly. """
+    leg = yastn.Leg(config_Z2_fermionic, s=1, t=(0, 1), D=(2, 3))
+    A = yastn.rand(config=config_Z2_fermionic, legs=[leg.conj(), leg])
+    B = yastn.rand(config=config_Z2_fermionic, legs=[leg.conj(), leg])
+
+    plan = yastn.ContractionPlan(lambda A: A @ B)  # B is not an argument
+    for _ in range(2):
+        assert (plan(A) - A @ B).norm() < tol
+    assert plan.replays == 0
+
+    plan = yastn.ContractionPlan(lambda A: A.swap_gate(axes=(0, 1)))  # modifies data outside of backend
+    for _ in range(2):
+        A = yastn.rand(config=config_Z2_fermionic, legs=[leg.conj(), leg])
+        assert (plan(A) - A.swap_gate(axes=(0, 1))).norm() < tol
+    assert plan.replays == 0
+
+
+def test_plan_data_dependent():
+    """ structure of the result depending on values of tensor elements is never replayed. """
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 4))
+    A = yastn.rand(config=config_U1, legs=[leg, leg.conj()])
+    B = A.copy()
+    B[(1, 1)] = B[(1, 1)] * 1e-4  # singular values of block (1, 1) are truncated
+
+    def f(A):
+        U, S, V = yastn.linalg.svd_with_truncation(A, axes=(0, 1), tol=1e-2)
+        return U @ S @ V
+
+    def g(A):
+        U, S, V = yastn.linalg.svd(A, axes=(0, 1))
+        mask = yastn.linalg.truncation_mask_multiplets(S, tol=1e-2)
+        U, S, V = mask.apply_mask(U, S, V, axes=(-1, 0, 0))
+        return U @ S @ V
+
+    for fun in (f, g):
+        plan = yastn.ContractionPlan(fun)
+        plan(A)
+        for X in (B, A, B):
+            r, s = plan(X), fun(X)
+            assert r.struct == s.struct and (r - s).norm() < tol
+        assert plan.replays == 0
+
+
+if __name__ == '__main__':
+    test_plan_replay()
+    test_plan_fallback()
+    test_plan_data_dependent()
@@ -87,6 +87,25 @@ def test_qr_Z3():
         assert R.is_consistent()
         check_diag_R_nonnegative(R)
 
+
+def test_qr_tall_blocks():
+    """ tall blocks, including rank-deficient ones, which are orthogonalized in a different way in numpy backend """
+    legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(40, 30)),
+            yastn.Leg(config_U1, s=1, t=(0, 1), D=(20, 10)),
+            yastn.Leg(config_U1, s=-1, t=(0, 1), D=(32, 36))]
+    a = yastn.rand(config=config_U1, legs=legs, dtype='complex128')
+    b = a.copy()
+    for t in [(1, 0, 1), (0, 1, 1)]:  # rank-deficient block
+        b[t][:, :, 1] = b[t][:, :, 0]
+    for x in (a, b):
+        Q, R = yastn.linalg.qr(x, axes=((0, 1), 2))
+        assert yastn.norm(x - Q @ R) < tol * x.norm()
+        QQ = yastn.tensordot(Q, Q, axes=((0, 1), (0, 1)), conj=(1, 0))
+        assert yastn.norm(QQ - yastn.eye(config_U1, legs=QQ.get_legs(), isdiag=False)) < tol
+        check_diag_R_nonnegative(R)
+
+
 if __name__ == '__main__':
     test_qr_basic()
     test_qr_Z3()
+    test_qr_tall_blocks()
@@ -106,6 +106,21 @@ def test_svd_complex():
     svd_combine(a)
 
 
+def test_svd_rectangular_blocks():
+    """ very tall and very wide blocks, which are first orthogonalized in numpy backend """
+    legs = [yastn.Leg(config_U1, s=-1, t=(0, 1), D=(4, 4)),
+            yastn.Leg(config_U1, s=1, t=(0, 1), D=(20, 20)),
+            yastn.Leg(config_U1, s=-1, t=(0, 1), D=(4, 4)),
+            yastn.Leg(config_U1, s=1, t=(0, 1), D=(30, 30))]
+    a = yastn.rand(config=config_U1, legs=legs, dtype='complex128')
+    for b in (a, a.transpose(axes=(1, 0, 3, 2))):  # tall and wide blocks
+        svd_combine(b)
+        U, _, V = yastn.linalg.svd(b, axes=((3, 1), (2, 0)))
+        for x, axes in ((U, (0, 1)), (V, (1, 2))):
+            xx = yastn.tensordot(x, x, axes=(axes, axes), conj=(1, 0))
+            assert yastn.norm(xx - yastn.eye(config_U1, legs=xx.get_legs(), isdiag=False)) < tol
+
+
 def test_svd_sparse():
     a = yastn.Tensor(config=config_U1, s=(-1, -1, -1, 1, 1, 1), n=0)
     a.set_block(ts=(1, 0, 0, 1, 0, 0), Ds=(2, 2, 2, 2, 2, 2), val='rand')
@@ -259,6 +274,156 @@ def test_svd_truncate_lowrank():
     assert yastn.norm(a1 - a2) < tol
 
 
+def test_svd_truncate_randomized():
+    config_U1.backend.random_seed(seed=0)
+    legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(5, 6)),
+            yastn.Leg(config_U1, s=1, t=(-1, 0), D=(5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6))]
+    a = yastn.rand(config=config_U1, n=1, legs=legs)
+    U, S, V = yastn.linalg.svd(a, axes=((0, 1), (2, 3)), sU=-1)
+    for t, D in zip(S.struct.t, S.struct.D):  # fixing singular values for testing
+        S.set_block(ts=t, Ds=D, val=[(1 + 0.1 * t[0]) * 2 ** (-ii) for ii in range(D[0])])
+    a = yastn.ncon([U, S, V], [(-1, -2, 1), (1, 2), (2, -3, -4)])
+
+    for opts in [{'tol': 1e-6, 'D_total': 12},
+                 {'D_total': 8, 'D_block': 5, 'n_iter': 1, 'oversample': 5},
+                 {'D_total': 10, 'D_block': {(-1,): 4, (0,): 2}},
+                 {'tol': 1e-3}]:  # no D_total nor D_block; exact svd
+        for nU, sU in [(True, -1), (False, 1)]:
+            U0, S0, V0 = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), nU=nU, sU=sU, **opts)
+            U1, S1, V1 = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), nU=nU, sU=sU, policy='randomized', **opts)
+            assert S1.struct == S0.struct
+            assert (S1 - S0).norm() < tol
+            assert (U1 @ S1 @ V1 - U0 @ S0 @ V0).norm() < 1e-5
+
+    # leading singular values of each block
+    S0 = yastn.svd(a, axes=((0, 1), (2, 3)), compute_uv=False)
+    S1 = yastn.svd(a, axes=((0, 1), (2, 3)), compute_uv=False, policy='randomized', D_block=3, oversample=2, n_iter=3)
+    U, S2, V = yastn.svd(a, axes=((0, 1), (2, 3)), policy='randomized', D_block=3, oversample=2, n_iter=3)
+    assert (S1 - S2).norm() < 1e-8
+    assert all(D == (3, 3) for D in S1.struct.D)
+    assert all(np.allclose(S1[t], S0[t][:3]) for t in S1.struct.t)
+    UU = yastn.tensordot(U, U, axes=((0, 1), (0, 1)), conj=(1, 0))
+    assert yastn.norm(UU - yastn.eye(config_U1, legs=U.get_legs(-1).conj()).diag()) < tol
+    #
+    # reproducible with seeded backend
+    Ss = []
+    for _ in range(2):
+        config_U1.backend.random_seed(seed=1)
+        Ss.append(yastn.svd(a, axes=((0, 1), (2, 3)), compute_uv=False, policy='randomized', D_block=3, oversample=1, n_iter=0))
+    assert (Ss[0] - Ss[1]).norm() == 0
+
+
+def test_svd_krylov():
+    config_U1.backend.random_seed(seed=0)
+    legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(5, 6)),
+            yastn.Leg(config_U1, s=1, t=(-1, 0), D=(5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6))]
+    a = yastn.rand(config=config_U1, n=1, legs=legs, dtype='complex128')
+
+    # leading singular triples of each block
+    for nU, sU in [(True, -1), (False, 1)]:
+        U0, S0, V0 = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), nU=nU, sU=sU, D_block=4, fix_signs=True)
+        U1, S1, V1 = yastn.svd(a, axes=((0, 1), (2, 3)), nU=nU, sU=sU, policy='krylov', k=4, ncv=8, fix_signs=True)
+        assert S1.struct == S0.struct
+        assert all((x - y).norm() < tol for x, y in [(S1, S0), (U1, U0), (V1, V0)])
+    S0 = yastn.svd(a, axes=((0, 1), (2, 3)), compute_uv=False)
+    S2 = yastn.svd(a, axes=((0, 1), (2, 3)), compute_uv=False, policy='krylov', k={(0,): 2, (1,): 3})
+    assert [D[0] for D in S2.struct.D] == [2, 3]
+    assert all(np.allclose(S2[t], S0[t][:D[0]]) for t, D in zip(S2.struct.t, S2.struct.D))
+
+    U0, S0, V0 = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), D_total=10)
+    U1, S1, V1 = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), D_total=10, policy='krylov')
+    assert S1.struct == S0.struct
+    assert (S1 - S0).norm() < tol
+    assert (U1 @ S1 @ V1 - U0 @ S0 @ V0).norm() < tol
+
+    # matrix-free product of two matrices
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(10, 20, 10))
+    A = yastn.rand(config=config_U1, legs=[leg, leg.conj()])
+    B = yastn.rand(config=config_U1, legs=[leg, leg.conj()])
+    f = lambda v: A @ (B @ v)
+    fh = lambda u: B.tensordot(A.tensordot(u, axes=(0, 0), conj=(1, 0)), axes=(0, 0), conj=(1, 0))
+    v0 = yastn.rand(config=config_U1, legs=[leg], n=1)
+    S, Us, Vs = yastn.svds(f, fh, v0, k=3, ncv=6)
+    S0 = yastn.svd(A @ B, compute_uv=False)
+    assert np.allclose(S, S0[(-1, -1)][:3])
+    assert all((f(v) - s * u).norm() < 1e-8 and (fh(u) - s * v).norm() < 1e-8 for s, u, v in zip(S, Us, Vs))
+
+    with pytest.raises(yastn.YastnError):
+        _ = yastn.svd(a, axes=((0, 1), (2, 3)), policy='krylov')
+        # krylov policy in svd requires passing argument k.
+    with pytest.raises(yastn.YastnError):
+        _ = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), policy='krylov', tol=1e-6)
+        # krylov policy in svd_with_truncation requires passing argument k, or finite D_block or D_total.
+    with pytest.raises(yastn.YastnError):
+        _ = yastn.svds(f, fh, v0, k=3, ncv=3)
+        # svds requires ncv > k.
+
+
+def test_svd_subspace():
+    config_U1.backend.random_seed(seed=0)
+    legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(5, 6)),
+            yastn.Leg(config_U1, s=1, t=(-1, 0), D=(5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6)),
+            yastn.Leg(config_U1, s=-1, t=(-1, 0, 1), D=(4, 5, 6))]
+    a = yastn.rand(config=config_U1, n=1, legs=legs)
+    U, S, V = yastn.linalg.svd(a, axes=((0, 1), (2, 3)), sU=-1)
+    for t, D in zip(S.struct.t, S.struct.D):  # fixing singular values for testing
+        S.set_block(ts=t, Ds=D, val=[(1 + 0.1 * t[0]) * 2 ** (-ii) for ii in range(D[0])])
+    a = yastn.ncon([U, S, V], [(-1, -2, 1), (1, 2), (2, -3, -4)])
+    b = a + 1e-4 * yastn.rand(config=config_U1, n=1, legs=legs)  # slightly changed tensor
+
+    U0, _, _ = yastn.svd_with_truncation(a, axes=((0, 1), (2, 3)), sU=-1, D_total=10, Uaxis=0)
+    U1, S1, V1 = yastn.svd_with_truncation(b, axes=((0, 1), (2, 3)), sU=-1, D_total=10, Uaxis=0)
+    for opts in [{'U0': U0},  # warm start
+                 {'U0': U0, 'n_iter': 0, 'subspace_tol': 1e-14},  # poor subspace; exact svd in all sectors
+                 {'U0': U0, 'oversample': 0},  # unreliable truncation; exact svd
+                 {'U0': None}]:  # exact svd
+        U2, S2, V2 = yastn.svd_with_truncation(b, axes=((0, 1), (2, 3)), sU=-1, D_total=10, Uaxis=0, policy='subspace', **opts)
+        assert S2.struct == S1.struct
+        assert (S2 - S1).norm() < tol
+        assert (U2.tensordot(S2 @ V2, axes=(0, 0)) - U1.tensordot(S1 @ V1, axes=(0, 0))).norm() < 1e-8
+
+    # sectors of U0 with oversample extra singular triples
+    S0 = yastn.svd(b, axes=((0, 1), (2, 3)), sU=-1, compute_uv=False)
+    S2 = yastn.svd(b, axes=((0, 1), (2, 3)), sU=-1, Uaxis=0, compute_uv=False, policy='subspace', U0=U0, oversample=1)
+    assert all(D[0] == U0.get_legs(axes=0).D[U0.get_legs(axes=0).t.index(t[:1])] + 1 for t, D in zip(S2.struct.t, S2.struct.D))
+    assert all(np.allclose(S2[t], S0[t][:D[0]]) for t, D in zip(S2.struct.t, S2.struct.D))
+
+    with pytest.raises(yastn.YastnError):
+        _ = yastn.svd(b, axes=((0, 1), (2, 3)), policy='subspace')
+        # subspace policy in svd requires passing argument U0.
+    with pytest.raises(yastn.YastnError):
+        _ = yastn.svd(b, axes=((0, 1), (2, 3)), policy='subspace', U0=U0)
+        # U0 does not match legs of U.
+
+
+def test_truncation_mask_unsorted():
+    """ truncation of spectra not sorted within blocks, e.g., from eigh """
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(4, 5, 3))
+    S = yastn.Tensor(config=config_U1, s=(-1, 1), isdiag=True)
+    S.set_block(ts=(-1, -1), Ds=4, val=[0.1, 0.7, 0.3, 0.05])
+    S.set_block(ts=(0, 0), Ds=5, val=[0.2, 1.0, 0.6, 0.01, 0.4])
+    S.set_block(ts=(1, 1), Ds=3, val=[0.5, 0.02, 0.8])
+
+    mask = yastn.truncation_mask(S, D_block=2)
+    assert [list(mask[t]) for t in mask.struct.t] == [[0, 1, 1, 0], [0, 1, 1, 0, 0], [1, 0, 1]]
+    mask = yastn.truncation_mask(S, D_block={(-1,): 2, (0,): 3}, tol_block={(-1,): 0.2}, D_total=4)
+    assert [list(mask[t]) for t in mask.struct.t] == [[0, 1, 0, 0], [0, 1, 1, 0, 1], [0, 0, 0]]
+    mask = yastn.truncation_mask(S, tol=0.25, D_total=4)
+    assert [list(mask[t]) for t in mask.struct.t] == [[0, 1, 0, 0], [0, 1, 1, 0, 0], [0, 0, 1]]
+    # entries of blocks (-1, -1) and (1, 1) are kept only if kept in both
+    mask = yastn.truncation_mask_multiplets(S, D_total=6)
+    assert [list(mask[t]) for t in mask.struct.t] == [[0, 0, 0, 0], [0, 1, 1, 0, 1], [0, 0, 0]]
+    #
+    assert yastn.get_cache_info()["truncation_mask"].currsize > 0
+    yastn.clear_cache()
+    assert yastn.get_cache_info()["truncation_mask"].currsize == 0
+
+
 def test_svd_multiplets():
     config_U1.backend.random_seed(seed=0)  # to fix consistency of tests
     legs = [yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 2)),
@@ -375,6 +540,22 @@ def test_svd_backward_truncate():
         assert test
 
 
+@pytest.mark.skipif(config_dense.backend.BACKEND_ID=="numpy", reason="numpy backend does not support autograd")
+def test_svd_subspace_backward():
+    """ subspace policy falls back to exact svd for tensor requiring grad; U0 is not differentiated """
+    legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(4, 5)), yastn.Leg(config_U1, s=-1, t=(0, 1), D=(5, 4))]
+    a = yastn.rand(config=config_U1, legs=legs)
+    U0, _, _ = yastn.linalg.svd_with_truncation(a, axes=(0, 1), D_total=4)
+    U0.requires_grad_()
+    a.requires_grad_()
+    _, S, _ = yastn.linalg.svd(a, axes=(0, 1), policy='subspace', U0=U0)
+    _, Sref, _ = yastn.linalg.svd(a, axes=(0, 1))
+    assert S.struct == Sref.struct and yastn.norm(S - Sref) < tol
+    _, S, _ = yastn.linalg.svd_with_truncation(a, axes=(0, 1), policy='subspace', U0=U0, D_total=4)
+    S.norm().backward()
+    assert U0.grad()._data is None and a.grad()._data is not None
+
+
 def test_svd_exceptions():
     """ raising exceptions by svd(), and some corner cases. """
     legs = [yastn.Leg(config_U1, s=1, t=(0, 1), D=(5, 6)),
@@ -406,9 +587,15 @@ if __name__ == '__main__':
     test_svd_Z3()
     test_svd_sparse()
     test_svd_complex()
+    test_svd_rectangular_blocks()
     test_svd_truncate()
+    test_svd_truncate_randomized()
+    test_svd_krylov()
+    test_svd_subspace()
+    test_truncation_mask_unsorted()
     test_svd_tensor_charge_division()
     test_svd_multiplets()
     test_svd_exceptions()
     # test_svd_backward_basic()
     # test_svd_backward_truncate()
+    # test_svd_subspace_backward()
@@ -220,6 +220,88 @@ def test_tensordot_exceptions():
         # Outer product with diagonal tensor not supported. Use yastn.diag() first.
 
 
+def test_tensordot_batched():
+    """ test tensordot with blocks of equal shapes multiplied by batched matmul. """
+    cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                            default_device=config_U1.default_device, batched_dot=True)
+    t1, t2 = (-2, -1, 0, 1, 2), (-1, 0, 1)
+    D1, D2 = (2, 2, 2, 2, 2), (3, 3, 3)
+    a = yastn.rand(config=cfg, s=(-1, 1, 1, -1), t=(t1, t1, t2, t2), D=(D1, D1, D2, D2))
+    b = yastn.rand(config=cfg, s=(1, -1, 1), t=(t1, t1, t2), D=(D1, D1, D2))
+    tensordot_vs_numpy(a, b, axes=((0, 1), (0, 1)), conj=(0, 0))
+    tensordot_vs_numpy(a, b, axes=((1, 2), (0, 2)), conj=(1, 0))
+    tensordot_vs_numpy(a, b, axes=((2,), (2,)), conj=(0, 1))
+
+    # blocks of different shapes and mask from hard-fusion mismatches
+    t1, t2, t3 = (-1, 0, 1), (-2, 0, 2), (-3, 0, 3)
+    D1, D2, D3 = (1, 3, 2), (3, 3, 4), (5, 3, 6)
+    a = yastn.rand(config=cfg, s=(-1, 1, 1, -1, 1, 1),
+                t=(t1, t1, t2, t2, t3, t3), D=(D1, D2, D2, D1, D1, D2))
+    b = yastn.rand(config=cfg, s=(-1, 1, 1, -1, 1, 1),
+                t=(t2, t2, t3, t3, t1, t1), D=(D2, D3, D1, D3, D1, D2))
+    tensordot_hf(a, b, hf_axes1=(0, (4, 3, 1), (5, 2)))
+    tensordot_hf(a, b, hf_axes1=(0, (4, 3, 1, 5), 2))
+
+
+def test_tensordot_policy():
+    """ test tensordot contracting pairs of native blocks without merging to matrices. """
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(-2, 0, 2), D=(2, 3, 1))
+    a = yastn.rand(config=config_U1, legs=[leg1.conj(), leg2, leg1, leg2.conj()], n=1)
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg2])
+    for policy in ('no_fuse', 'auto'):
+        cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                                default_device=config_U1.default_device, tensordot_policy=policy)
+        ap = yastn.load_from_dict(config=cfg, d=a.save_to_dict())
+        bp = yastn.load_from_dict(config=cfg, d=b.save_to_dict())
+        for axes, conj in ((((0, 1), (0, 1)), (0, 0)),
+                           (((2, 1), (0, 2)), (1, 0)),
+                           (((3,), (1,)), (0, 1)),
+                           (((0, 1, 3), (0, 1, 2)), (0, 0))):
+            c = yastn.tensordot(a, b, axes=axes, conj=conj)
+            cp = tensordot_vs_numpy(ap, bp, axes=axes, conj=conj)
+            # the same structure as with merging to matrices
+            assert cp.struct == c.struct and cp.slices == c.slices
+            assert (cp - c).norm() < tol
+
+    cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                            default_device=config_U1.default_device, tensordot_policy='wrong')
+    a = yastn.rand(config=cfg, legs=[leg1.conj(), leg1])
+    with pytest.raises(yastn.YastnError):
+        yastn.tensordot(a, a, axes=(1, 0))
+        # tensordot_policy should be 'fuse_to_matrix', 'no_fuse', or 'auto'.
+
+
+def test_tensordot_out():
+    """ test tensordot writing result to preallocated tensor. """
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(-2, 0, 2), D=(2, 3, 1))
+    a = yastn.rand(config=config_U1, legs=[leg1.conj(), leg2, leg1, leg2.conj()], n=1)
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg2])
+    for opts in ({}, {'batched_dot': True}, {'tensordot_policy': 'no_fuse'}):
+        cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                                default_device=config_U1.default_device, **opts)
+        ac = yastn.load_from_dict(config=cfg, d=a.save_to_dict())
+        bc = yastn.load_from_dict(config=cfg, d=b.save_to_dict())
+        for axes in (((0, 1), (0, 1)), ((3,), (2,)), ((0, 1, 3), (0, 1, 2))):
+            c = yastn.tensordot(ac, bc, axes=axes)
+            out = 0 * c
+            data = out._data
+            assert yastn.tensordot(ac, bc, axes=axes, out=out) is out
+            assert (out - c).norm() < tol
+            if config_U1.backend.BACKEND_ID == 'numpy':
+                assert out._data is data  # no new memory allocated
+
+    c = yastn.tensordot(a, b, axes=((0, 1), (0, 1)))
+    with pytest.raises(yastn.YastnError):
+        out = yastn.Tensor(config=config_U1, s=c.s)
+        yastn.tensordot(a, b, axes=((0, 1), (0, 1)), out=out)
+        # out does not match the structure of the result.
+    with pytest.raises(yastn.YastnError):
+        yastn.tensordot(a, b, axes=((0, 1), (0, 1)), out=b)
+        # out should be independent of contracted tensors.
+
+
 @pytest.mark.skipif(config_dense.backend.BACKEND_ID=="numpy", reason="numpy backend does not support autograd")
 def test_tensordot_fuse_hard_backward():
     import torch
@@ -278,5 +360,8 @@ if __name__ == '__main__':
     test_tensordot_diag()
     test_tensordot_fuse_meta()
     test_tensordot_exceptions()
+    test_tensordot_batched()
+    test_tensordot_policy()
+    test_tensordot_out()
     test_tensordot_backward()
     test_tensordot_fuse_hard_backward()
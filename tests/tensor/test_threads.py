@@ -0,0 +1,50 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" concurrent execution of blocks in backend_np """
+import pytest
+import yastn
+try:
+    from .configs import config_U1
+except ImportError:
+    from configs import config_U1
+
+tol = 1e-10  #pylint: disable=invalid-name
+
+
+@pytest.mark.skipif(config_U1.backend.BACKEND_ID != "numpy", reason="thread pool of blocks is specific to numpy backend")
+def test_threads_np():
+    legs = [yastn.Leg(config_U1, s=s, t=(-1, 0, 1), D=(2, 3, 4)) for s in (-1, 1, 1, -1)]
+    a = yastn.rand(config=config_U1, legs=legs)
+    b = yastn.rand(config=config_U1, legs=[leg.conj() for leg in legs])
+
+    def run(a, b):
+        c = yastn.tensordot(a, b, axes=((1, 2), (1, 2)))
+        U, S, V = yastn.svd(a, axes=((0, 1), (2, 3)))
+        Q, R = yastn.qr(a, axes=((0, 2), (1, 3)))
+        ab = a.fuse_legs(axes=((0, 1), (2, 3)))
+        S2, U2 = yastn.eigh(ab @ ab.H, axes=(0, 1))
+        return c, S, Q @ R, S2, a.fuse_legs(axes=((0, 3), (1, 2)), mode='hard').unfuse_legs(axes=(0, 1))
+
+    expected = run(a, b)
+    try:
+        config_U1.backend.set_num_threads(4, blas_threads=1, min_cost=0)
+        for x, y in zip(run(a, b), expected):
+            assert (x - y).norm() < tol * y.norm()
+    finally:
+        config_U1.backend.set_num_threads(1)
+
+
+if __name__ == '__main__':
+    test_threads_np()
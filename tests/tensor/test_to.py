@@ -14,6 +14,7 @@
 # ==============================================================================
 """ change device/dtype with .to()"""
 import pytest
+import numpy as np
 import yastn
 try:
     from .configs import config_U1
@@ -47,5 +48,48 @@ def test_to():
         assert td.is_consistent()
 
 
+def test_single_precision():
+    """ tensors in float32 and complex64; mixed-precision policy. """
+    leg = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(2, 3, 4))
+    for dtype, real in [('float32', 'float32'), ('complex64', 'float32')]:
+        for mixed in (False, True):
+            cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym, default_device=config_U1.default_device,
+                                    default_dtype=dtype, mixed_precision=mixed)
+            a = yastn.rand(config=cfg, legs=[leg, leg, leg.conj(), leg.conj()])
+            assert a.yast_dtype == dtype and a.dtype == cfg.backend.DTYPE[dtype]
+            ad = a.to(dtype='complex128' if dtype == 'complex64' else 'float64')
+            #
+            # contractions and multiplication by (numpy) scalars keep single precision
+            b = yastn.tensordot(a, a, axes=((2, 3), (2, 3)), conj=(0, 1))
+            bd = yastn.tensordot(ad, ad, axes=((2, 3), (2, 3)), conj=(0, 1))
+            assert b.yast_dtype == dtype and (np.float64(2.) * b / np.float64(2.)).yast_dtype == dtype
+            assert (b - bd.to(dtype=dtype)).norm() < 1e-5 * bd.norm()
+            #
+            # decompositions; in single precision, or in double precision under mixed policy
+            U, S, V = yastn.linalg.svd(a, axes=((0, 1), (2, 3)))
+            assert U.yast_dtype == V.yast_dtype == dtype and S.yast_dtype == real
+            assert (U @ S @ V - a).norm() < 1e-5 * a.norm()
+            Q, R = yastn.linalg.qr(a, axes=((0, 1), (2, 3)))
+            assert Q.yast_dtype == R.yast_dtype == dtype
+            assert (Q @ R - a).norm() < 1e-5 * a.norm()
+            S, U = yastn.linalg.eigh(b, axes=((0, 1), (2, 3)))
+            assert U.yast_dtype == dtype and S.yast_dtype == real
+            assert (U @ S @ U.conj().transpose(axes=(2, 0, 1)) - b).norm() < 1e-5 * b.norm()
+            #
+            # norms and scalar products in double precision under mixed policy
+            x = yastn.vdot(a, a)
+            assert abs(x - ad.norm() ** 2) < (1e-12 if mixed else 1e-5) * x.real
+            assert abs(a.norm() - ad.norm()) < (1e-12 if mixed else 1e-5) * ad.norm()
+            #
+            # save and load
+            c = yastn.load_from_dict(config=cfg, d=a.save_to_dict())
+            assert c.yast_dtype == dtype and (c - a).norm() < tol
+            #
+            # real and complex random tensors in precision of config
+            assert yastn.randR(config=cfg, legs=[leg, leg.conj()]).yast_dtype == 'float32'
+            assert yastn.randC(config=cfg, legs=[leg, leg.conj()]).yast_dtype == 'complex64'
+
+
 if __name__ == '__main__':
+    test_single_precision()
     test_to()
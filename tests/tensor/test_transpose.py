@@ -159,9 +159,86 @@ def test_transpose_backward():
     test = torch.autograd.gradcheck(test_f, op_args, eps=1e-6, atol=1e-4)
     assert test
 
+
+def test_transpose_lazy():
+    """ lazy transposition is fused with merging of blocks in tensordot, svd, and hard fusion. """
+    cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                            default_device=config_U1.default_device, lazy_transpose=True)
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(0, 1), D=(2, 3))
+    a = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg1.conj(), leg2], n=1)
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg2])
+    al = yastn.load_from_dict(config=cfg, d=a.save_to_dict())
+    bl = yastn.load_from_dict(config=cfg, d=b.save_to_dict())
+
+    ta = a.transpose(axes=(2, 0, 3, 1))
+    tal = al.transpose(axes=(2, 0, 3, 1))
+    assert tal.struct == ta.struct and tal.slices == ta.slices
+    assert tal.dtype == ta.dtype and tal.device == ta.device
+    c = yastn.tensordot(ta, b, axes=((0, 3), (0, 2)))
+    cl = yastn.tensordot(tal, bl, axes=((0, 3), (0, 2)))
+    assert np.abs(c.to_numpy() - cl.to_numpy()).max() < tol
+    U, S, V = yastn.svd(tal, axes=((0, 2), (3, 1)))
+    assert np.abs(yastn.ncon([U, S, V], [(-0, -2, 1), (1, 2), (2, -3, -1)]).to_numpy() - ta.to_numpy()).max() < tol
+    fa = ta.fuse_legs(axes=((0, 3), (2, 1)), mode='hard')
+    fal = tal.fuse_legs(axes=((0, 3), (2, 1)), mode='hard')
+    assert np.abs(fa.to_numpy() - fal.to_numpy()).max() < tol
+    # data were not permuted so far
+    assert type(tal._raw).__name__ == '_PendingData' and tal._raw.result is None
+    #
+    # composition of transpositions
+    ttal = tal.move_leg(source=0, destination=3)
+    assert np.abs(ttal.to_numpy() - ta.move_leg(source=0, destination=3).to_numpy()).max() < tol
+    #
+    # shallow copy shares the result; tensor with changed structure cannot fuse pending permutation
+    sal = tal.add_leg(axis=1, s=1)
+    assert np.abs(sal.remove_leg(axis=1).to_numpy() - ta.to_numpy()).max() < tol
+    assert tal._data is sal._data
+    assert np.abs(tal.to_numpy() - ta.to_numpy()).max() < tol
+    assert yastn.are_independent(tal, al)
+    #
+    # caches of composed metadata are controlled together with other caches
+    info = yastn.get_cache_info()
+    assert info["merge_pending"].currsize > 0 and info["transpose_pending"].currsize > 0
+    yastn.clear_cache()
+    info = yastn.get_cache_info()
+    assert info["merge_pending"].currsize == 0 and info["transpose_pending"].currsize == 0
+
+
+def test_transpose_lazy_in_place():
+    """ pending transposition reads data of the source; in-place operations on the source do not change it. """
+    cfg = yastn.make_config(backend=config_U1.backend, sym=config_U1.sym,
+                            default_device=config_U1.default_device, lazy_transpose=True)
+    leg1 = yastn.Leg(cfg, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(cfg, s=1, t=(0, 1), D=(2, 3))
+    d = yastn.rand(config=cfg, isdiag=True, legs=(leg1, leg1.conj()))
+    x = yastn.rand(config=cfg, legs=[leg1, leg1.conj()])
+    y = yastn.rand(config=cfg, legs=[leg1, leg2, leg1.conj()])
+
+    def set_block(b):
+        b[(0, 0, 0)] = np.ones((2, 2, 2))
+
+    for in_place in [lambda b: b.scale_(2.),
+                     lambda b: b.apxb_(b.copy(), 1.5),
+                     lambda b: b.broadcast_legs_(d, axes=0),
+                     lambda b: yastn.tensordot(x, y, axes=(1, 0), out=b),
+                     set_block]:
+        b = yastn.rand(config=cfg, legs=[leg1, leg2, leg1.conj()])
+        before, ref = b.to_numpy(), b.transpose(axes=(2, 0, 1)).to_numpy()
+        a = b.transpose(axes=(2, 0, 1))
+        sa = a.move_leg(source=0, destination=2).move_leg(source=2, destination=0)  # composed pending transpositions
+        data = b._data
+        in_place(b)
+        assert b._data is data and np.abs(b.to_numpy() - before).max() > tol  # memory of b is overwritten
+        assert np.abs(a.to_numpy() - ref).max() < tol
+        assert np.abs(sa.to_numpy() - ref).max() < tol
+
+
 if __name__ == '__main__':
     test_transpose_basic()
     test_transpose_diag()
     test_transpose_exceptions()
+    test_transpose_lazy()
+    test_transpose_lazy_in_place()
     # test_transpose_backward()
     unittest.main()
@@ -67,6 +67,40 @@ def test_hard_unmerge():
     assert max(abs(cc - dd)) < 1e-12
 
 
+def test_gather_kernels():
+    """ transpose_and_merge and unmerge using gather with precomputed index give the same results as loops over blocks. """
+    from yastn.backend import _gather
+    leg1 = yastn.Leg(config_U1, s=1, t=(-1, 0, 1), D=(1, 2, 3))
+    leg2 = yastn.Leg(config_U1, s=1, t=(-2, 0, 1), D=(2, 1, 2))
+    a = yastn.rand(config=config_U1, legs=[leg1, leg2.conj(), leg1.conj(), leg2], n=1)
+    b = yastn.rand(config=config_U1, legs=[leg1, leg2, leg1.conj(), leg2.conj()])
+    for ts in a.struct.t[::3]:  # missing blocks give zero blocks in merged tensors
+        a.set_block(ts=ts, val='zeros')
+    a = a.remove_zero_blocks()
+
+    def run(a, b):
+        fa = a.fuse_legs(axes=((0, 2), (3, 1)), mode='hard')  # merge with zero blocks
+        c = yastn.tensordot(a, b, axes=((0, 3), (2, 3)))
+        return fa, fa.unfuse_legs(axes=(0, 1)), c, c.fuse_legs(axes=((0, 1), (3, 2)), mode='hard').unfuse_legs(axes=(0, 1))
+
+    policy = dict(_gather._policy)
+    try:
+        _gather._policy['max_block'] = 0
+        expected = run(a, b)
+        _gather._policy['max_block'] = 10 ** 9
+        for _ in range(2):  # second run uses cached indices
+            for x, y in zip(run(a, b), expected):
+                assert x.struct == y.struct
+                assert (x - y).norm() < tol
+        info = yastn.get_cache_info()  # indices are cached with other meta-information
+        assert info['gather_merge'].hits > 0 and info['gather_unmerge'].hits > 0
+        yastn.clear_cache()
+        info = yastn.get_cache_info()
+        assert info['gather_merge'].currsize == info['gather_unmerge'].currsize == 0
+    finally:
+        _gather._policy.update(policy)
+
 
 if __name__ == '__main__':
     test_hard_unmerge()
+    test_gather_kernels()
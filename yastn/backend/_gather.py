@@ -0,0 +1,71 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""
+Flat index arrays replacing loops over blocks in transpose_and_merge and unmerge with a single gather.
+
+Meta-information passed to backend kernels comes from caches of meta-information,
+so the same meta objects recur for tensors of the same structure.
+Index arrays are cached with the meta, in caches registered with other caches of meta-information,
+see :meth:`yastn.get_cache_info` and :meth:`yastn.clear_cache`.
+"""
+from itertools import groupby
+import numpy as np
+from ..tensor._cache import _interned_cache
+
+# use gather kernels for tensors with at most max_size elements,
+# and average number of elements in copied blocks at most max_block
+_policy = {'max_size': 2 ** 24, 'max_block': 128}
+
+
+def _use_gather(nblocks, Dsize):
+    return 0 < Dsize <= _policy['max_size'] and Dsize <= _policy['max_block'] * nblocks
+
+
+@_interned_cache(maxsize=256)
+def merge_index(order, meta_new, meta_mrg, Dsize, device=None, convert=None):
+    """
+    Index arrays for transpose_and_merge, converted by convert(ind, device), e.g., moved to torch device.
+
+    Return (idx, None) with newdata = data[idx] if blocks cover the whole destination,
+    and (dst, src) with newdata[dst] = data[src], newdata zero elsewhere, otherwise.
+    """
+    dst, src = [], []
+    for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_mrg, key=lambda x: x[0])):
+        assert tn == t1
+        ind = np.arange(sln[0], sln[1], dtype=np.int64).reshape(Dn)
+        for (_, slo, Do, Dslc, Drsh) in gr:
+            slcs = tuple(slice(*x) for x in Dslc)
+            dst.append(ind[slcs].ravel())
+            src.append(np.arange(slo[0], slo[1], dtype=np.int64).reshape(Do).transpose(order).ravel())
+    dst = np.concatenate(dst) if dst else np.zeros(0, dtype=np.int64)
+    src = np.concatenate(src) if src else np.zeros(0, dtype=np.int64)
+    if len(dst) == Dsize:  # merged blocks do not overlap
+        idx = np.empty(Dsize, dtype=np.int64)
+        idx[dst] = src
+        dst, src = idx, None
+    if convert is not None:
+        dst = convert(dst, device)
+        src = None if src is None else convert(src, device)
+    return dst, src
+
+
+@_interned_cache(maxsize=256)
+def unmerge_index(meta, Dsize, device=None, convert=None):
+    """ Index array for unmerge: newdata = data[idx]; unmerged blocks cover the whole destination. """
+    idx = np.empty(Dsize, dtype=np.int64)
+    for sln, _, slo, Do, sub_slc in meta:
+        slcs = tuple(slice(*x) for x in sub_slc)
+        idx[slice(*sln)] = np.arange(slo[0], slo[1], dtype=np.int64).reshape(Do)[slcs].ravel()
+    return idx if convert is None else convert(idx, device)
@@ -0,0 +1,106 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" Pool recycling 1D buffers allocated by backend kernels. """
+import threading
+import weakref
+from collections import namedtuple
+import numpy as np
+
+_PoolStats = namedtuple("PoolStats", ["requests", "reuses", "reuse_ratio", "buffers", "nbytes", "peak_nbytes"])
+
+
+class _MemoryPool:
+    """
+    Buffers are 1D numpy arrays, grouped in buckets by dtype and size class, with 4 size classes per octave.
+    A request gets a new array with the requested size, exported from a free buffer.
+    Views of that array, including torch tensors from torch.from_numpy, keep a reference to it;
+    the pool holds a weak reference, and the buffer is free once the array is garbage collected.
+    A buffer is then used by at most one array outside the pool at a time.
+    """
+
+    def __init__(self, min_size=2 ** 15, max_bytes=None):
+        self.min_size = min_size
+        self.max_bytes = max_bytes
+        self._buckets = {}  # (dtype, size class) -> list of [buffer, weak reference to array using it]
+        self._lock = threading.Lock()
+        self.requests = self.reuses = 0
+        self.nbytes = self.peak_nbytes = 0
+
+    def empty(self, size, dtype):
+        """ Uninitialized 1D array of given size, recycling a free buffer if possible. """
+        size = int(size)
+        sc = _size_class(size)
+        with self._lock:
+            self.requests += 1
+            bucket = self._buckets.setdefault((dtype, sc), [])
+            for entry in bucket:
+                if _is_free(entry):
+                    self.reuses += 1
+                    return _export(entry, size)
+            entry = [np.empty((sc,), dtype=dtype), None]
+            nbytes = entry[0].nbytes
+            if self.max_bytes is not None and self.nbytes + nbytes > self.max_bytes:
+                self._release(self.nbytes + nbytes - self.max_bytes)
+            if self.max_bytes is None or self.nbytes + nbytes <= self.max_bytes:
+                bucket.append(entry)
+                self.nbytes += nbytes
+                self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+            return _export(entry, size)
+
+    def _release(self, nbytes):
+        """ Drop free buffers, largest first, until nbytes are released. """
+        for key in sorted(self._buckets, key=lambda x: x[1], reverse=True):
+            bucket = self._buckets[key]
+            for i in range(len(bucket) - 1, -1, -1):
+                if _is_free(bucket[i]):
+                    nbytes -= bucket[i][0].nbytes
+                    self.nbytes -= bucket[i][0].nbytes
+                    del bucket[i]
+                    if nbytes <= 0:
+                        return
+
+    def stats(self):
+        """ Statistics as a named tuple (requests, reuses, reuse_ratio, buffers, nbytes, peak_nbytes). """
+        return _PoolStats(self.requests, self.reuses, self.reuses / self.requests if self.requests else 0.,
+                          sum(len(x) for x in self._buckets.values()), self.nbytes, self.peak_nbytes)
+
+    def clear(self):
+        """ Drop all buffers; memory still used by arrays is released when they are garbage collected. """
+        with self._lock:
+            self._buckets.clear()
+            self.nbytes = 0
+
+
+def _is_free(entry):
+    return entry[1] is None or entry[1]() is None
+
+
+def _export(entry, size):
+    """
+    New array using the first size elements of the buffer.
+
+    The array is created from a memoryview, so that numpy does not collapse the base of its views
+    to the buffer; all views then keep this array alive, and its weak reference marks the buffer as used.
+    """
+    buf = entry[0]
+    x = np.frombuffer(memoryview(buf), dtype=buf.dtype, count=size)
+    entry[1] = weakref.ref(x)
+    return x
+
+
+def _size_class(size):
+    """ Round size up to one of 4 classes per octave; at most 1/4 of a buffer is unused. """
+    step = 1 << max(size.bit_length() - 3, 0)
+    return -(-size // step) * step
@@ -13,21 +13,39 @@
 # limitations under the License.
 # ==============================================================================
 """Support of numpy as a data structure used by yastn."""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from itertools import groupby
 from functools import reduce
 import warnings
 import numpy as np
 import scipy.linalg
+import scipy.linalg.blas
 try:
     import fbpca
 except ModuleNotFoundError:  # pragma: no cover
     warnings.warn("fbpca not available", Warning)
+try:
+    import threadpoolctl
+except ModuleNotFoundError:  # pragma: no cover
+    threadpoolctl = None
+from ._mempool import _MemoryPool
+from . import _gather
 
 # non-deterministic initialization of random number generator
 rng = {'rng': np.random.default_rng(None)}  # initialize random number generator
+# thread pool executing independent blocks concurrently; see set_num_threads
+_pool = {'executor': None, 'blas_threads': None, 'min_cost': 2 ** 18, 'controller': None}
+# active pool of memory buffers; see memory_pool
+_mempool = {'pool': None}
+# shape-aware drivers of svd and qr: CholeskyQR2 for blocks with at least min_cols columns and aspect ratio
+# of at least qr_ratio (svd_ratio), condition number permitting; see benchmarks/decomposition_drivers.py
+_drivers = {'qr_ratio': 8, 'svd_ratio': 16, 'min_cols': 32, 'cholqr_cond': 1e6}
 BACKEND_ID = "numpy"
 DTYPE = {'float64': np.float64,
-         'complex128': np.complex128}
+         'complex128': np.complex128,
+         'float32': np.float32,
+         'complex64': np.complex64}
 
 
 def get_dtype(t):
@@ -46,9 +64,93 @@ def random_seed(seed):
     rng['rng'] = np.random.default_rng(seed)
 
 
-def set_num_threads(num_threads):  # pragma: no cover
-    warnings.warn("backend_np does not support set_num_threads.", Warning)
-    pass
+def set_num_threads(num_threads, blas_threads=1, min_cost=2 ** 18):
+    """
+    Process independent blocks concurrently in a pool of ``num_threads`` threads.
+
+    It applies to svd, eigh, qr, dot, transpose_and_merge, and unmerge.
+    NumPy releases the GIL in LAPACK/BLAS calls and in copies of large arrays.
+    Blocks are dispatched largest-first to balance the load.
+    During concurrent execution, the number of BLAS threads is capped to ``blas_threads``
+    to avoid oversubscription (requires threadpoolctl); ``None`` leaves BLAS untouched.
+    Calls with the estimated cost (number of flops or copied elements) below ``min_cost``
+    are executed sequentially. ``num_threads=1`` switches off the thread pool.
+    """
+    if _pool['executor'] is not None:
+        _pool['executor'].shutdown()
+        _pool['executor'] = None
+    if num_threads > 1:
+        _pool['executor'] = ThreadPoolExecutor(max_workers=num_threads, thread_name_prefix='yastn')
+    _pool['blas_threads'] = blas_threads
+    _pool['min_cost'] = min_cost
+    if blas_threads is not None and _pool['controller'] is None:
+        if threadpoolctl is None:  # pragma: no cover
+            warnings.warn("threadpoolctl not available; number of BLAS threads is not capped.", Warning)
+        else:
+            _pool['controller'] = threadpoolctl.ThreadpoolController()
+
+
+def _run_blocks(fun, blocks, cost):
+    """ Apply fun to all blocks; concurrently and largest-first if the thread pool is on. """
+    executor = _pool['executor']
+    if executor is not None and len(blocks) > 1:
+        costs = [cost(x) for x in blocks]
+        if sum(costs) >= _pool['min_cost']:
+            order = sorted(range(len(blocks)), key=costs.__getitem__, reverse=True)
+            if _pool['blas_threads'] is not None and _pool['controller'] is not None:
+                with _pool['controller'].limit(limits=_pool['blas_threads'], user_api='blas'):
+                    list(executor.map(fun, [blocks[n] for n in order]))
+            else:
+                list(executor.map(fun, [blocks[n] for n in order]))
+            return
+    for x in blocks:
+        fun(x)
+
+
+@contextmanager
+def memory_pool(min_size=2 ** 15, max_bytes=None):
+    """
+    Context in which outputs of backend kernels are allocated from a pool recycling memory buffers.
+
+    Buffers are grouped by dtype and size class. When all arrays using a buffer are garbage collected,
+    the buffer is reused by the next kernel requesting an array of the same size class.
+    This avoids allocator churn and page faults for large arrays in sweeps repeating the same sizes.
+    Arrays with less than ``min_size`` elements are allocated as usual.
+    Free buffers are dropped if the pool would exceed ``max_bytes`` (no limit for ``None``).
+
+    Yields the pool; ``pool.stats()`` gives a named tuple with the number of requests, reuses, reuse_ratio,
+    and the number of buffers, bytes, and peak bytes held by the pool. Buffers are released at the exit.
+    """
+    pool = _MemoryPool(min_size=min_size, max_bytes=max_bytes)
+    previous, _mempool['pool'] = _mempool['pool'], pool
+    try:
+        yield pool
+    finally:
+        _mempool['pool'] = previous
+        pool.clear()
+
+
+def _empty(Dsize, dtype):
+    """ Uninitialized 1D array, allocated from active memory pool. """
+    pool = _mempool['pool']
+    if pool is None or Dsize < pool.min_size:
+        return np.empty((Dsize,), dtype=dtype)
+    return pool.empty(Dsize, np.dtype(dtype))
+
+
+def _zeros(Dsize, dtype):
+    """ 1D array of zeros, allocated from active memory pool. """
+    pool = _mempool['pool']
+    if pool is None or Dsize < pool.min_size:
+        return np.zeros((Dsize,), dtype=dtype)
+    newdata = pool.empty(Dsize, np.dtype(dtype))
+    newdata.fill(0)
+    return newdata
+
+
+def _cost_decomposition(block):
+    D = block[1]
+    return D[0] * D[1] * min(D)
 
 
 def grad(x):  # pragma: no cover
@@ -108,6 +210,15 @@ def max_abs(x):
     return np.abs(x).max()
 
 
+def max_abs_blocks(data, slcs):
+    """ Maximal absolute values of elements in consecutive blocks of data, given by slcs, as a list. """
+    if len(slcs) == 0:
+        return []
+    if all(sl[0] < sl[1] for sl in slcs):
+        return np.maximum.reduceat(np.abs(data[slcs[0][0]: slcs[-1][1]]), [sl[0] - slcs[0][0] for sl in slcs]).tolist()
+    return [np.abs(data[slice(*sl)]).max(initial=0).item() for sl in slcs]
+
+
 def norm_matrix(x):
     return np.linalg.norm(x)
 
@@ -181,7 +292,10 @@ def ones(D, dtype='float64', **kwargs):
 def rand(D, dtype='float64', **kwargs):
     if dtype == 'float64':
         return 2 * rng['rng'].random(D) - 1
-    return 2 * (rng['rng'].random(D) + 1j *  rng['rng'].random(D)) - (1 + 1j)  # dtype == 'complex128
+    if dtype == 'float32':
+        return 2 * rng['rng'].random(D, dtype=np.float32) - 1
+    data = 2 * (rng['rng'].random(D) + 1j *  rng['rng'].random(D)) - (1 + 1j)  # dtype == 'complex128
+    return data.astype(np.complex64) if dtype == 'complex64' else data
 
 
 def randint(low, high):
@@ -276,9 +390,9 @@ def bitwise_not(data):
 
 
 def svd_lowrank(data, meta, sizes, n_iter=60, k_fac=6, **kwargs):
-    Udata = np.empty((sizes[0],), dtype=data.dtype)
-    Sdata = np.empty((sizes[1],), dtype=DTYPE['float64'])
-    Vdata = np.empty((sizes[2],), dtype=data.dtype)
+    Udata = _empty(sizes[0], data.dtype)
+    Sdata = _empty(sizes[1], _real_dtype(data.dtype))
+    Vdata = _empty(sizes[2], data.dtype)
     for (sl, D, slU, DU, slS, slV, DV) in meta:
         k = slS[1] - slS[0]
         U, S, V = fbpca.pca(data[slice(*sl)].reshape(D), k=k, raw=True, n_iter=n_iter, l=k_fac * k)
@@ -288,23 +402,181 @@ def svd_lowrank(data, meta, sizes, n_iter=60, k_fac=6, **kwargs):
     return Udata, Sdata, Vdata
 
 
-def svd(data, meta, sizes, **kwargs):
-    Udata = np.empty((sizes[0],), dtype=data.dtype)
-    Sdata = np.empty((sizes[1],), dtype=DTYPE['float64'])
-    Vdata = np.empty((sizes[2],), dtype=data.dtype)
+def _range_finder(A, l, n_iter):
+    """ Orthonormal basis of the approximate range of A, from l random vectors and n_iter power iterations. """
+    G = rng['rng'].standard_normal((A.shape[1], l)).astype(A.real.dtype, copy=False)
+    Q, _ = np.linalg.qr(A @ G)
+    for _ in range(n_iter):
+        Z, _ = np.linalg.qr(A.conj().T @ Q)
+        Q, _ = np.linalg.qr(A @ Z)
+    return Q
+
+
+def svd_randomized(data, meta, sizes, n_iter=2, oversample=10, **kwargs):
+    """ Leading singular triples of blocks; randomized SVD if the block is large enough, and exact SVD otherwise. """
+    Udata = _empty(sizes[0], data.dtype)
+    Sdata = _empty(sizes[1], _real_dtype(data.dtype))
+    Vdata = _empty(sizes[2], data.dtype)
     for (sl, D, slU, DU, slS, slV, DV) in meta:
-        try:
-            U, S, V = scipy.linalg.svd(data[slice(*sl)].reshape(D), full_matrices=False)
-        except scipy.linalg.LinAlgError:  # pragma: no cover
-            U, S, V = scipy.linalg.svd(data[slice(*sl)].reshape(D), full_matrices=False, lapack_driver='gesvd')
+        A = data[slice(*sl)].reshape(D)
+        k = DU[1]
+        if k + oversample < min(D):
+            Q = _range_finder(A, k + oversample, n_iter)
+            U, S, V = scipy.linalg.svd(Q.conj().T @ A, full_matrices=False)
+            U = Q @ U[:, :k]
+        else:
+            U, S, V = scipy.linalg.svd(A, full_matrices=False)
+        Udata[slice(*slU)].reshape(DU)[:] = U[:, :k]
+        Sdata[slice(*slS)] = S[:k]
+        Vdata[slice(*slV)].reshape(DV)[:] = V[:k]
+    return Udata, Sdata, Vdata
+
+
+def svdvals_randomized(data, meta, sizeS, n_iter=2, oversample=10, **kwargs):
+    Sdata = _empty(sizeS, _real_dtype(data.dtype))
+    for (sl, D, _, _, slS, _, _) in meta:
+        A = data[slice(*sl)].reshape(D)
+        k = slS[1] - slS[0]
+        if k + oversample < min(D):
+            A = _range_finder(A, k + oversample, n_iter).conj().T @ A
+        Sdata[slice(*slS)] = scipy.linalg.svd(A, full_matrices=False, compute_uv=False)[:k]
+    return Sdata
+
+
+def svd_subspace(data, meta, sizes, Qdata, Qmeta, n_iter=2, tol=1e-8, **kwargs):
+    """
+    Leading singular triples of blocks, refining starting subspaces of left singular vectors with subspace iterations.
+    Qmeta gives (slice, shape) of starting subspace of each block, or None for exact SVD.
+    Blocks where the residual of any starting direction is larger than tol times the largest singular value
+    are decomposed exactly.
+    """
+    Udata = _empty(sizes[0], data.dtype)
+    Sdata = _empty(sizes[1], _real_dtype(data.dtype))
+    Vdata = _empty(sizes[2], data.dtype)
+    for (sl, D, slU, DU, slS, slV, DV), qm in zip(meta, Qmeta):
+        A = data[slice(*sl)].reshape(D)
+        k = DU[1]
+        USV = None
+        if qm is not None:
+            Q = Qdata[slice(*qm[0])].reshape(qm[1]).astype(A.dtype, copy=False)
+            if k > qm[1][1]:
+                Q = np.hstack([Q, rng['rng'].standard_normal((D[0], k - qm[1][1])).astype(A.dtype, copy=False)])
+            Q, _ = np.linalg.qr(Q)
+            for _ in range(n_iter):
+                Z, _ = np.linalg.qr(A.conj().T @ Q)
+                Q, _ = np.linalg.qr(A @ Z)
+            U, S, V = scipy.linalg.svd(Q.conj().T @ A, full_matrices=False)
+            U = Q @ U
+            nc = min(qm[1][1], k)
+            R = A @ V[:nc].conj().T - U[:, :nc] * S[:nc]
+            if np.linalg.norm(R, axis=0).max(initial=0) <= tol * S[0]:
+                USV = U, S, V
+        if USV is None:
+            USV = scipy.linalg.svd(A, full_matrices=False)
+        U, S, V = USV
+        Udata[slice(*slU)].reshape(DU)[:] = U[:, :k]
+        Sdata[slice(*slS)] = S[:k]
+        Vdata[slice(*slV)].reshape(DV)[:] = V[:k, :]
+    return Udata, Sdata, Vdata
+
+
+def svd_from_vectors(data, meta, sizes, triples):
+    """ Collect singular triples (S, Us, Vs) of consecutive blocks, with vectors given as 1D arrays; missing ones are zero. """
+    Udata = np.zeros(sizes[0], dtype=data.dtype)
+    Sdata = np.zeros(sizes[1], dtype=_real_dtype(data.dtype))
+    Vdata = np.zeros(sizes[2], dtype=data.dtype)
+    for (_, _, slU, DU, slS, slV, DV), (S, Us, Vs) in zip(meta, triples):
+        k = min(len(S), DU[1])
+        if k > 0:
+            Sdata[slS[0]: slS[0] + k] = S[:k]
+            Udata[slice(*slU)].reshape(DU)[:, :k] = np.stack(Us[:k], axis=1)
+            Vdata[slice(*slV)].reshape(DV)[:k, :] = np.stack(Vs[:k], axis=0).conj()
+    return Udata, Sdata, Vdata
+
+
+def _use_cholqr(D, ratio):
+    """ Orthogonalize block with CholeskyQR2 if it has at least min_cols columns and ratio times more rows. """
+    return D[1] >= _drivers['min_cols'] and D[0] >= ratio * D[1]
+
+
+def _cholesky_qr2(A):
+    """
+    CholeskyQR2 of a tall matrix, i.e., two passes of Q = A R^{-1} with R from Cholesky decomposition of A^H A.
+    It relies on matrix multiplications and is faster than Householder QR for tall blocks,
+    but is accurate only for well-conditioned A. Return None if R of the first pass
+    indicates that the condition number of A exceeds cholqr_cond.
+    """
+    trsm = scipy.linalg.blas.get_blas_funcs('trsm', (A,))
+    try:
+        R = scipy.linalg.cholesky(A.conj().T @ A)
+    except scipy.linalg.LinAlgError:
+        return None
+    dR = np.abs(np.diag(R))
+    if not dR.min() > dR.max() / _drivers['cholqr_cond']:
+        return None
+    Q = trsm(1., R, A, side=1, lower=0)
+    try:
+        R2 = scipy.linalg.cholesky(Q.conj().T @ Q)
+    except scipy.linalg.LinAlgError:  # pragma: no cover
+        return None
+    return trsm(1., R2, Q, side=1, lower=0), R2 @ R
+
+
+def _qr_block(A):
+    """ Economic QR of a block; CholeskyQR2 for tall blocks, and Householder QR otherwise. """
+    if _use_cholqr(A.shape, _drivers['qr_ratio']):
+        QR = _cholesky_qr2(A)
+        if QR is not None:
+            return QR
+    return scipy.linalg.qr(A, mode='economic')
+
+
+def _svd_block(A):
+    """
+    Economic SVD of a block.
+
+    Very rectangular blocks are first orthogonalized with CholeskyQR2, A = Q R (or A^H = Q R for wide blocks),
+    and the small square factor R is decomposed. LAPACK uses gesdd, which is never slower than gesvd
+    beyond the smallest blocks, with gesvd as a fallback if gesdd does not converge.
+    """
+    if _use_cholqr(A.shape, _drivers['svd_ratio']):
+        QR = _cholesky_qr2(A)
+        if QR is not None:
+            U, S, V = _svd_lapack(QR[1])
+            return QR[0] @ U, S, V
+    elif _use_cholqr(A.shape[::-1], _drivers['svd_ratio']):
+        QR = _cholesky_qr2(A.conj().T)
+        if QR is not None:
+            U, S, V = _svd_lapack(QR[1].conj().T)
+            return U, S, V @ QR[0].conj().T
+    return _svd_lapack(A)
+
+
+def _svd_lapack(A):
+    try:
+        return scipy.linalg.svd(A, full_matrices=False)
+    except scipy.linalg.LinAlgError:  # pragma: no cover
+        return scipy.linalg.svd(A, full_matrices=False, lapack_driver='gesvd')
+
+
+def svd(data, meta, sizes, **kwargs):
+    Udata = _empty(sizes[0], data.dtype)
+    Sdata = _empty(sizes[1], _real_dtype(data.dtype))
+    Vdata = _empty(sizes[2], data.dtype)
+
+    def svd_block(block):
+        sl, D, slU, DU, slS, slV, DV = block
+        U, S, V = _svd_block(data[slice(*sl)].reshape(D))
         Udata[slice(*slU)].reshape(DU)[:] = U
         Sdata[slice(*slS)] = S
         Vdata[slice(*slV)].reshape(DV)[:] = V
+
+    _run_blocks(svd_block, meta, _cost_decomposition)
     return Udata, Sdata, Vdata
 
 
 def svdvals(data, meta, sizeS, **kwargs):
-    Sdata = np.empty((sizeS,), dtype=DTYPE['float64'])
+    Sdata = _empty(sizeS, _real_dtype(data.dtype))
     for (sl, D, _, _, slS, _, _) in meta:
         try:
             S = scipy.linalg.svd(data[slice(*sl)].reshape(D), full_matrices=False, compute_uv=False)
@@ -314,6 +586,11 @@ def svdvals(data, meta, sizeS, **kwargs):
     return Sdata
 
 
+def _real_dtype(dtype):
+    """ Real dtype of the same precision, e.g., float32 for complex64. """
+    return np.finfo(dtype).dtype
+
+
 def fix_svd_signs(Udata, Vdata, meta):
     Uamp = (abs(Udata) * (2 ** 40)).astype(np.int64)
     for (_, _, slU, DU, _, slV, DV) in meta:
@@ -329,13 +606,16 @@ def fix_svd_signs(Udata, Vdata, meta):
 
 
 def eigh(data, meta=None, sizes=(1, 1)):
-    Sdata = np.zeros((sizes[0],), dtype=DTYPE['float64'])
-    Udata = np.zeros((sizes[1],), dtype=data.dtype)
+    Sdata = _zeros(sizes[0], _real_dtype(data.dtype))
+    Udata = _zeros(sizes[1], data.dtype)
     if meta is not None:
-        for (sl, D, slU, DU, slS) in meta:
+        def eigh_block(block):
+            sl, D, slU, DU, slS = block
             S, U = np.linalg.eigh(data[slice(*sl)].reshape(D))
             Sdata[slice(*slS)] = S
             Udata[slice(*slU)].reshape(DU)[:] = U
+
+        _run_blocks(eigh_block, meta, _cost_decomposition)
         return Sdata, Udata
     return np.linalg.eigh(data)  # S, U
 
@@ -345,17 +625,73 @@ def eig(T):
 
 
 def qr(data, meta, sizes):
-    Qdata = np.empty((sizes[0],), dtype=data.dtype)
-    Rdata = np.empty((sizes[1],), dtype=data.dtype)
-    for (sl, D, slQ, DQ, slR, DR) in meta:
-        Q, R = scipy.linalg.qr(data[slice(*sl)].reshape(D), mode='economic')
+    Qdata = _empty(sizes[0], data.dtype)
+    Rdata = _empty(sizes[1], data.dtype)
+
+    def qr_block(block):
+        sl, D, slQ, DQ, slR, DR = block
+        Q, R = _qr_block(data[slice(*sl)].reshape(D))
         sR = np.sign(np.real(np.diag(R)))
         sR[sR == 0] = 1
         Qdata[slice(*slQ)].reshape(DQ)[:] = Q * sR  # positive diag of R
         Rdata[slice(*slR)].reshape(DR)[:] = sR.reshape([-1, 1]) * R
+
+    _run_blocks(qr_block, meta, _cost_decomposition)
     return Qdata, Rdata
 
 
+def truncation_mask(data, seg, starts, D_block, tol_block, tol, D_total, truncate_multiplets=False):
+    """
+    Mask keeping in each block (segment of data) at most D_block[b] largest values above tol_block[b] times its maximal absolute value,
+    and then at most D_total largest of those values that are above tol times their maximal absolute value.
+    Optionally, the cut is shifted to the largest gap between values to be truncated.
+    Blocks are given by block index of each element (seg) and the first elements of blocks (starts).
+    """
+    N = len(data)
+    if N == 0:
+        return np.zeros(0, dtype=bool)
+    bmax = np.maximum.reduceat(np.abs(data), starts)
+    order = np.argsort(-data, kind='stable')
+    order = order[np.argsort(seg[order], kind='stable')]  # grouped by blocks, descending within each block
+    rank = np.empty(N, dtype=np.int64)
+    rank[order] = np.arange(N) - starts[seg[order]]
+    temp = data * ((data > tol_block[seg] * bmax[seg]) & (rank < D_block[seg]))
+    D = int(min(D_total, np.count_nonzero(temp > tol * np.abs(temp).max())))
+    order = np.argsort(-temp, kind='stable')
+    if truncate_multiplets and 0 < D < N:
+        s = data[order]
+        gaps = np.abs(s[D - 1: N - 1] - s[D: N])  # gaps after D, D+1, ... largest values
+        stop = np.flatnonzero(np.maximum.accumulate(gaps) > np.abs(s[D - 1: N - 1]))
+        D += int(np.argmax(gaps[:stop[0] + 1] if len(stop) > 0 else gaps))
+    mask = np.zeros(N, dtype=bool)
+    mask[order[:D]] = True
+    return mask
+
+
+def truncation_mask_multiplets(data, tol, D_total, eps_multiplet, pairs):
+    """
+    Mask keeping at most D_total largest values above tol times the largest one, with the cut shifted to
+    the nearest gap between multiplets larger than eps_multiplet (relative). Elements of pairs = (dst, src)
+    are kept only if both are, which makes the masks of blocks with opposite charges consistent.
+    """
+    N = len(data)
+    if N == 0:
+        return np.zeros(0, dtype=bool)
+    order = np.argsort(data)[::-1]
+    s = data[order]
+    D = int(min(D_total, np.count_nonzero(s > s[0] * tol)))
+    if D >= N:
+        return np.ones(N, dtype=bool)
+    gaps = np.abs(s[:-1] - s[1:]) / (np.maximum(np.abs(s[:-1]), np.abs(s[1:])) + 1.0e-16)
+    cut = np.flatnonzero(gaps[:D] > eps_multiplet)
+    if len(cut) > 0:
+        D = int(cut[-1]) + 1
+    mask = np.zeros(N, dtype=bool)
+    mask[order[:D]] = True
+    mask[pairs[0]] = mask[pairs[0]] & mask[pairs[1]]
+    return mask
+
+
 def argsort(data):
     return np.argsort(data)
 
@@ -372,13 +708,13 @@ def eigs_which(val, which):
 
 
 def embed_msk(data, msk, Dsize):
-    newdata = np.zeros((Dsize,), dtype=data.dtype)
+    newdata = _zeros(Dsize, data.dtype)
     newdata[msk] = data
     return newdata
 
 
 def embed_slc(data, meta, Dsize):
-    newdata = np.zeros((Dsize,), dtype=data.dtype)
+    newdata = _zeros(Dsize, data.dtype)
     for sln, slo in meta:
         newdata[slice(*sln)] = data[slice(*slo)]
     return newdata
@@ -395,7 +731,7 @@ def allclose(Adata, Bdata, rtol, atol):
 
 def add(Adata, Bdata, meta, Dsize):
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.zeros((Dsize,), dtype=dtype)
+    newdata = _zeros(Dsize, dtype)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -405,7 +741,7 @@ def add(Adata, Bdata, meta, Dsize):
 
 def sub(Adata, Bdata, meta, Dsize):
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.zeros((Dsize,), dtype=dtype)
+    newdata = _zeros(Dsize, dtype)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -415,7 +751,7 @@ def sub(Adata, Bdata, meta, Dsize):
 
 def apxb(Adata, Bdata, x, meta, Dsize):
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.zeros((Dsize,), dtype=dtype)
+    newdata = _zeros(Dsize, dtype)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -423,45 +759,84 @@ def apxb(Adata, Bdata, x, meta, Dsize):
     return newdata
 
 
+def apxb_(Adata, Bdata, x):
+    """ In-place Adata += x * Bdata, if dtype of Adata allows it; otherwise returns new array. """
+    if np.result_type(Adata, Bdata, x) != Adata.dtype:
+        return Adata + x * Bdata
+    if Adata.dtype in (np.float64, np.complex128, np.float32, np.complex64) and Adata.flags.c_contiguous:
+        axpy = scipy.linalg.blas.get_blas_funcs('axpy', (Adata,))
+        return axpy(Bdata.astype(Adata.dtype, copy=False), Adata, a=x)
+    Adata += x * Bdata
+    return Adata
+
+
+def scale_(data, x):
+    """ In-place data *= x, if dtype of data allows it; otherwise returns new array. """
+    if np.result_type(data, x) != data.dtype:
+        return data * x
+    data *= x
+    return data
+
+
 def apply_slice(data, slcn, slco):
     Dsize = slcn[-1][1] if len(slcn) > 0 else 0
-    newdata = np.zeros((Dsize,), dtype=data.dtype)
+    newdata = _zeros(Dsize, data.dtype)
     for sn, so in zip(slcn, slco):
         newdata[slice(*sn)] = data[slice(*so)]
     return newdata
 
 
-def vdot(Adata, Bdata):
+def vdot(Adata, Bdata, conj=(0, 0)):
+    if conj[0] and conj[1]:
+        return np.conj(Adata @ Bdata)
+    if conj[0]:
+        return np.vdot(Adata, Bdata)
+    if conj[1]:
+        return np.vdot(Bdata, Adata)
     return Adata @ Bdata
 
 
 def diag_1dto2d(Adata, meta, Dsize):
-    newdata = np.zeros((Dsize,), dtype=Adata.dtype)
+    newdata = _zeros(Dsize, Adata.dtype)
     for sln, slo in meta:
         newdata[slice(*sln)] = np.diag(Adata[slice(*slo)]).ravel()
     return newdata
 
 
 def diag_2dto1d(Adata, meta, Dsize):
-    newdata = np.zeros((Dsize,), dtype=Adata.dtype)
+    newdata = _zeros(Dsize, Adata.dtype)
     for sln, slo, Do in meta:
         newdata[slice(*sln)] = np.diag(Adata[slice(*slo)].reshape(Do))
     return newdata
 
 
-def dot(Adata, Bdata, meta_dot, Dsize):
+def dot(Adata, Bdata, meta_dot, Dsize, out=None):
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.empty((Dsize,), dtype=dtype)
-    for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
+    newdata = out if _fits(out, Dsize, dtype) else _empty(Dsize, dtype)
+
+    def dot_block(block):
+        slc, Dc, sla, Da, slb, Db, _, _ = block
         np.matmul(Adata[slice(*sla)].reshape(Da), \
                   Bdata[slice(*slb)].reshape(Db), \
                   out=newdata[slice(*slc)].reshape(Dc))
+
+    _run_blocks(dot_block, meta_dot, _cost_dot)
     return newdata
 
 
+def _fits(out, Dsize, dtype):
+    """ Preallocated output can be used by kernel. """
+    return out is not None and out.shape == (Dsize,) and out.dtype == dtype
+
+
+def _cost_dot(block):
+    Da, Db = block[3], block[5]
+    return Da[0] * Da[1] * Db[1]
+
+
 def dot_with_mask(Adata, Bdata, meta_dot, Dsize, msk_a, msk_b):
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.empty((Dsize,), dtype=dtype)
+    newdata = _empty(Dsize, dtype)
     for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
         np.matmul(Adata[slice(*sla)].reshape(Da)[:, msk_a[ia]], \
                   Bdata[slice(*slb)].reshape(Db)[msk_b[ib], :], \
@@ -469,78 +844,169 @@ def dot_with_mask(Adata, Bdata, meta_dot, Dsize, msk_a, msk_b):
     return newdata
 
 
+def _batch_index(starts, Dp):
+    """ Index of elements of blocks of size Dp starting at starts; slice if blocks are consecutive in memory. """
+    if all(s1 - s0 == Dp for s0, s1 in zip(starts, starts[1:])):
+        return slice(starts[0], starts[0] + len(starts) * Dp)
+    return (np.array(starts, dtype=np.int64).reshape(-1, 1) + np.arange(Dp, dtype=np.int64)).ravel()
+
+
+def _mask_subgroups(ias, msk_a):
+    """ Split positions in a group of blocks according to the length of the mask of contracted leg. """
+    subgroups = {}
+    for n, ia in enumerate(ias):
+        subgroups.setdefault(len(msk_a[ia]), []).append(n)
+    return subgroups.values()
+
+
+def dot_batched(Adata, Bdata, meta_batch, Dsize, out=None):
+    dtype = np.promote_types(Adata.dtype, Bdata.dtype)
+    newdata = out if _fits(out, Dsize, dtype) else _empty(Dsize, dtype)
+    for (Dc, Da, Db, slc, sla, slb, _, _) in meta_batch:
+        nb = len(slc)
+        ind_a = _batch_index(sla, Da[0] * Da[1])
+        ind_b = _batch_index(slb, Db[0] * Db[1])
+        ind_c = _batch_index(slc, Dc[0] * Dc[1])
+        if isinstance(ind_c, slice):
+            np.matmul(Adata[ind_a].reshape(nb, *Da), Bdata[ind_b].reshape(nb, *Db), out=newdata[ind_c].reshape(nb, *Dc))
+        else:
+            newdata[ind_c] = np.matmul(Adata[ind_a].reshape(nb, *Da), Bdata[ind_b].reshape(nb, *Db)).ravel()
+    return newdata
+
+
+def dot_with_mask_batched(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b):
+    dtype = np.promote_types(Adata.dtype, Bdata.dtype)
+    newdata = _empty(Dsize, dtype)
+    for (Dc, Da, Db, slc, sla, slb, ias, ibs) in meta_batch:
+        for sub in _mask_subgroups(ias, msk_a):
+            nb = len(sub)
+            ma = np.stack([msk_a[ias[n]] for n in sub])[:, None, :]
+            mb = np.stack([msk_b[ibs[n]] for n in sub])[:, :, None]
+            ind_a = _batch_index(tuple(sla[n] for n in sub), Da[0] * Da[1])
+            ind_b = _batch_index(tuple(slb[n] for n in sub), Db[0] * Db[1])
+            ind_c = _batch_index(tuple(slc[n] for n in sub), Dc[0] * Dc[1])
+            temp_a = np.take_along_axis(Adata[ind_a].reshape(nb, *Da), ma, axis=2)
+            temp_b = np.take_along_axis(Bdata[ind_b].reshape(nb, *Db), mb, axis=1)
+            newdata[ind_c] = np.matmul(temp_a, temp_b).ravel()
+    return newdata
+
+
 def dot_diag(Adata, Bdata, meta, Dsize, axis, a_ndim):
     dim = [1] * a_ndim
     dim[axis] = -1
     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = np.empty((Dsize,), dtype=dtype)
+    newdata = _empty(Dsize, dtype)
     for sln, slb, Db, sla in meta:
         newdata[slice(*sln)].reshape(Db)[:] = Adata[slice(*sla)].reshape(dim) * Bdata[slice(*slb)].reshape(Db)
     return newdata
 
 
+def dot_diags(Adatas, Bdata, meta, Dsize, axes, b_ndim, out=None):
+    """ Multiply legs axes of blocks in Bdata by diagonal blocks from consecutive Adatas, in a single pass. """
+    dims = []
+    for axis in axes:
+        dim = [1] * b_ndim
+        dim[axis] = -1
+        dims.append(dim)
+    dtype = reduce(np.promote_types, (x.dtype for x in Adatas), Bdata.dtype)
+    newdata = out if _fits(out, Dsize, dtype) else _empty(Dsize, dtype)
+    for sln, slb, Db, slas in meta:
+        scale = reduce(np.multiply, (x[slice(*sla)].reshape(dim) for x, sla, dim in zip(Adatas, slas, dims)))
+        np.multiply(Bdata[slice(*slb)].reshape(Db), scale, out=newdata[slice(*sln)].reshape(Db))
+    return newdata
+
+
 def mask_diag(Adata, Bdata, meta, Dsize, axis, a_ndim):
     slc1 = (slice(None),) * axis
     slc2 = (slice(None),) * (a_ndim - (axis + 1))
-    newdata = np.zeros((Dsize,), dtype=Adata.dtype)
+    newdata = _zeros(Dsize, Adata.dtype)
     for sln, sla, Da, slb in meta:
         cut = Bdata[slice(*slb)].nonzero()
         newdata[slice(*sln)] = Adata[slice(*sla)].reshape(Da)[slc1 + cut + slc2].ravel()
     return newdata
 
 
-# dot_dict = {(0, 0): lambda x, y, out: np.matmul(x, y, out=out),
-#             (0, 1): lambda x, y, out: np.matmul(x, y.conj(), out=out),
-#             (1, 0): lambda x, y, out: np.matmul(x.conj(), y, out=out),
-#             (1, 1): lambda x, y, out: np.matmul(x.conj(), y.conj(), out=out)}
-#
-#
-# def dot_nomerge(Adata, Bdata, cc, oA, oB, meta, Dsize):
-#     f = dot_dict[cc]  # proper conjugations
-#     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-#     newdata = np.zeros((Dsize,), dtype=dtype)
-#     for (sln, sla, Dao, Dan, slb, Dbo, Dbn) in meta:
-#         newdata[slice(*sln)] += f(Adata[slice(*sla)].reshape(Dao).transpose(oA).reshape(Dan), \
-#                                   Bdata[slice(*slb)].reshape(Dbo).transpose(oB).reshape(Dbn), None).ravel()
-#     return newdata
-
-
-# def dot_nomerge_masks(Adata, Bdata, cc, oA, oB, meta, Dsize, tcon, ma, mb):
-#     f = dot_dict[cc]  # proper conjugations
-#     dtype = np.promote_types(Adata.dtype, Bdata.dtype)
-#     newdata = np.zeros((Dsize,), dtype=dtype)
-#     for (sln, sla, Dao, Dan, slb, Dbo, Dbn), tt in zip(meta, tcon):
-#         newdata[slice(*sln)] += f(Adata[slice(*sla)].reshape(Dao).transpose(oA).reshape(Dan)[:, ma[tt]], \
-#                                   Bdata[slice(*slb)].reshape(Dbo).transpose(oB).reshape(Dbn)[mb[tt], :], None).ravel()
-#     return newdata
+def dot_nomerge(Adata, Bdata, order_a, order_b, meta, Dsize, out=None):
+    dtype = np.promote_types(Adata.dtype, Bdata.dtype)
+    if _fits(out, Dsize, dtype):
+        newdata = out
+        newdata.fill(0)
+    else:
+        newdata = _zeros(Dsize, dtype)
+    for (sln, Dn, pairs) in meta:
+        temp = newdata[slice(*sln)].reshape(Dn)
+        for (sla, Dao, Dan, slb, Dbo, Dbn) in pairs:
+            temp += Adata[slice(*sla)].reshape(Dao).transpose(order_a).reshape(Dan) @ \
+                    Bdata[slice(*slb)].reshape(Dbo).transpose(order_b).reshape(Dbn)
+    return newdata
+
 
 #####################################################
 #     block merging, truncations and un-merging     #
 #####################################################
 
 def transpose(data, axes, meta_transpose):
-    newdata = np.empty_like(data)
+    newdata = _empty(len(data), data.dtype)
     for sln, Dn, slo, Do in meta_transpose:
         newdata[slice(*sln)].reshape(Dn)[:] = data[slice(*slo)].reshape(Do).transpose(axes)
     return newdata
 
 
-def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize):
-    newdata = np.zeros((Dsize,), dtype=data.dtype)
+def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize, conj=False):
+    conj = conj and np.iscomplexobj(data)  # complex conjugation applied while copying blocks
+    if _gather._use_gather(len(meta_mrg), Dsize):  # many small blocks; single gather with cached index
+        ind, src = _gather.merge_index(order, meta_new, meta_mrg, Dsize)
+        if src is None:
+            newdata = np.take(data, ind, out=_empty(Dsize, data.dtype))
+        else:
+            newdata = _zeros(Dsize, data.dtype)
+            newdata[ind] = data[src]
+        return np.conjugate(newdata, out=newdata) if conj else newdata
+    newdata = _zeros(Dsize, data.dtype)
+    if _pool['executor'] is not None:
+        blocks = [(Dn, sln, tuple(gr)) for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_mrg, key=lambda x: x[0]))]
+
+        def merge_block(block):
+            Dn, sln, gr = block
+            temp = newdata[slice(*sln)].reshape(Dn)
+            for (_, slo, Do, Dslc, Drsh) in gr:
+                _merge_block(temp, tuple(slice(*x) for x in Dslc), data[slice(*slo)].reshape(Do), order, Drsh, conj)
+
+        _run_blocks(merge_block, blocks, lambda x: x[1][1] - x[1][0])
+        return newdata
     for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_mrg, key=lambda x: x[0])):
         assert tn == t1
         temp = newdata[slice(*sln)].reshape(Dn)
         for (_, slo, Do, Dslc, Drsh) in gr:
-            slcs = tuple(slice(*x) for x in Dslc)
-            temp[slcs] = data[slice(*slo)].reshape(Do).transpose(order).reshape(Drsh)
+            _merge_block(temp, tuple(slice(*x) for x in Dslc), data[slice(*slo)].reshape(Do), order, Drsh, conj)
     return newdata
 
 
-def unmerge(data, meta):
-    newdata = np.empty_like(data)  # this does not introduce zero blocks
-    for sln, Dn, slo, Do, sub_slc in meta:
+def _merge_block(temp, slcs, block, order, Drsh, conj=False):
+    """ temp[slcs] = block.transpose(order).reshape(Drsh), conjugated if conj, with a single copy of block. """
+    dst = temp[slcs].reshape(tuple(block.shape[n] for n in order))  # splitting axes of temp[slcs] gives a view
+    if np.may_share_memory(dst, temp):
+        if conj:
+            np.conjugate(block.transpose(order), out=dst)
+        else:
+            dst[...] = block.transpose(order)
+    elif conj:  # reshape had to copy
+        temp[slcs] = np.conjugate(block.transpose(order)).reshape(Drsh)
+    else:
+        temp[slcs] = block.transpose(order).reshape(Drsh)
+
+
+def unmerge(data, meta, out=None):
+    newdata = out if _fits(out, len(data), data.dtype) else _empty(len(data), data.dtype)  # this does not introduce zero blocks
+    if _gather._use_gather(len(meta), len(data)):  # many small blocks; single gather with cached index
+        return np.take(data, _gather.unmerge_index(meta, len(data)), out=newdata)
+
+    def unmerge_block(block):
+        sln, Dn, slo, Do, sub_slc = block
         slcs = tuple(slice(*x) for x in sub_slc)
         newdata[slice(*sln)].reshape(Dn)[:] = data[slice(*slo)].reshape(Do)[slcs]
+
+    _run_blocks(unmerge_block, meta, lambda x: x[0][1] - x[0][0])
     return newdata
 
 
@@ -553,7 +1019,7 @@ def merge_to_dense(data, Dtot, meta):
 
 def merge_super_blocks(pos_tens, meta_new, meta_block, Dsize):
     dtype = reduce(np.promote_types, (a._data.dtype for a in pos_tens.values()))
-    newdata = np.zeros((Dsize,), dtype=dtype)
+    newdata = _zeros(Dsize, dtype)
     for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_block, key=lambda x: x[0])):
         assert tn == t1
         for (_, slo, Do, pos, Dslc) in gr:
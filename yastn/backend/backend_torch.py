@@ -13,28 +13,31 @@
 # limitations under the License.
 # ==============================================================================
 """Support of torch as a data structure used by yastn."""
+from contextlib import contextmanager
 from itertools import groupby
 from types import SimpleNamespace
 from functools import reduce
 import numpy as np
 import torch
+from . import _gather
+from ._mempool import _MemoryPool
 
 __all__= [
     '_torch_version_check', 'DTYPE',
     'SVDGESDD','SYMEIG',
-    'get_dtype', 'is_complex', 'get_device', 'random_seed', 'set_num_threads', 'grad',
+    'get_dtype', 'is_complex', 'get_device', 'random_seed', 'set_num_threads', 'memory_pool', 'grad',
     'detach', 'detach_', 'clone', 'copy',
     'to_numpy', 'get_shape', 'get_size', 'diag_create', 'diag_get', 'real',
-    'imag', 'max_abs', 'norm_matrix', 'count_nonzero', 'delete', 'insert',
+    'imag', 'max_abs', 'max_abs_blocks', 'norm_matrix', 'count_nonzero', 'delete', 'insert',
     'expm',
     'first_element', 'item', 'sum_elements', 'norm', 'entropy',
     'zeros', 'ones', 'rand', 'to_tensor', 'to_mask', 'square_matrix_from_dict',
     'requires_grad_', 'requires_grad', 'move_to', 'conj',
     'trace', 'trace_with_mask', 'rsqrt', 'reciprocal', 'exp', 'sqrt', 'absolute',
-    'svd_lowrank', 'svd', 'eigh', 'qr',
-    'argsort', 'eigs_which', 'embed_msk', 'embed_slc', 'allclose',
-    'add', 'sub', 'apxb', 'apply_slice', 'vdot', 'diag_1dto2d', 'diag_2dto1d',
-    'dot', 'dot_with_mask', 'dot_diag', 'mask_diag',
+    'svd_lowrank', 'svd_randomized', 'svdvals_randomized', 'svd_subspace', 'svd_from_vectors', 'svd', 'eigh', 'qr',
+    'argsort', 'truncation_mask', 'truncation_mask_multiplets', 'eigs_which', 'embed_msk', 'embed_slc', 'allclose',
+    'add', 'sub', 'apxb', 'apxb_', 'scale_', 'apply_slice', 'vdot', 'diag_1dto2d', 'diag_2dto1d',
+    'dot', 'dot_with_mask', 'dot_batched', 'dot_with_mask_batched', 'dot_nomerge', 'dot_diag', 'dot_diags', 'mask_diag',
     'merge_to_dense', 'merge_super_blocks', 'is_independent'
 ]
 #['transpose', 'transpose_and_merge', 'unmerge']
@@ -64,7 +67,9 @@ from .linalg.torch_eig_sym import SYMEIG
 torch.random.seed()
 BACKEND_ID = "torch"
 DTYPE = {'float64': torch.float64,
-         'complex128': torch.complex128}
+         'complex128': torch.complex128,
+         'float32': torch.float32,
+         'complex64': torch.complex64}
 
 def get_dtype(t):
     return t.dtype
@@ -82,10 +87,72 @@ def random_seed(seed):
     torch.random.manual_seed(seed)
 
 
-def set_num_threads(num_threads):
+# active pool of memory buffers on cpu; see memory_pool
+_mempool = {'pool': None}
+_NP_DTYPE = {torch.float64: np.float64, torch.complex128: np.complex128,
+             torch.float32: np.float32, torch.complex64: np.complex64}
+
+
+def set_num_threads(num_threads, blas_threads=1, min_cost=2 ** 18):
+    """
+    Set the number of threads used by torch on cpu.
+
+    ``blas_threads`` and ``min_cost`` control the thread pool of blocks in numpy backend;
+    they are accepted for a common signature of backends, and ignored.
+    """
     torch.set_num_threads(num_threads)
 
 
+@contextmanager
+def memory_pool(min_size=2 ** 15, max_bytes=None):
+    """
+    Context in which outputs of backend kernels on cpu are allocated from a pool recycling memory buffers.
+
+    Buffers are grouped by dtype and size class. When all tensors using a buffer are garbage collected,
+    the buffer is reused by the next kernel requesting a tensor of the same size class.
+    Tensors with less than ``min_size`` elements, and tensors on other devices, are allocated as usual;
+    on gpu, torch recycles memory with its own caching allocator.
+    Free buffers are dropped if the pool would exceed ``max_bytes`` (no limit for ``None``).
+
+    Yields the pool; ``pool.stats()`` gives a named tuple with the number of requests, reuses, reuse_ratio,
+    and the number of buffers, bytes, and peak bytes held by the pool. Buffers are released at the exit.
+    """
+    pool = _MemoryPool(min_size=min_size, max_bytes=max_bytes)
+    previous, _mempool['pool'] = _mempool['pool'], pool
+    try:
+        yield pool
+    finally:
+        _mempool['pool'] = previous
+        pool.clear()
+
+
+def _from_pool(Dsize, dtype, device):
+    """
+    1D tensor on cpu sharing memory with a pooled buffer; None if the pool does not apply.
+    torch.from_numpy keeps a reference to the array from the pool, which marks the buffer as used.
+    """
+    pool = _mempool['pool']
+    if pool is None or Dsize < pool.min_size or dtype not in _NP_DTYPE or torch.device(device).type != 'cpu':
+        return None
+    return torch.from_numpy(pool.empty(Dsize, _NP_DTYPE[dtype]))
+
+
+def _empty(Dsize, dtype, device):
+    """ Uninitialized 1D tensor, allocated from active memory pool on cpu. """
+    newdata = _from_pool(Dsize, dtype, device)
+    if newdata is None:
+        return torch.empty((Dsize,), dtype=dtype, device=device)
+    return newdata
+
+
+def _zeros(Dsize, dtype, device):
+    """ 1D tensor of zeros, allocated from active memory pool on cpu. """
+    newdata = _from_pool(Dsize, dtype, device)
+    if newdata is None:
+        return torch.zeros((Dsize,), dtype=dtype, device=device)
+    return newdata.zero_()
+
+
 def grad(x):
     return x.grad
 
@@ -142,6 +209,13 @@ def max_abs(x):
     return x.abs().max()
 
 
+def max_abs_blocks(data, slcs):
+    if len(slcs) == 0:
+        return []
+    zero = torch.zeros((), dtype=data.real.dtype, device=data.device)
+    return torch.stack([data[slice(*sl)].abs().max() if sl[0] < sl[1] else zero for sl in slcs]).tolist()
+
+
 def norm_matrix(x):
     return torch.linalg.norm(x)
 
@@ -212,7 +286,7 @@ def ones(D, dtype='float64', device='cpu'):
 
 
 def rand(D, dtype='float64', device='cpu'):
-    ds = 1 if dtype=='float64' else 1 + 1j
+    ds = 1 if dtype in ('float64', 'float32') else 1 + 1j
     return 2 * torch.rand(D, dtype=DTYPE[dtype], device=device) - ds
 
 
@@ -273,7 +347,7 @@ else:
 def trace(data, order, meta, Dsize):
     """ Trace dict of tensors according to meta = [(tnew, told, Dreshape), ...].
         Repeating tnew are added."""
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for (sln, slo, Do, Drsh) in meta:
         temp = data[slice(*slo)].reshape(Do).permute(order).reshape(Drsh)
         newdata[slice(*sln)] += torch.sum(torch.diagonal(temp, dim1=0, dim2=1), dim=-1).ravel()
@@ -283,7 +357,7 @@ def trace(data, order, meta, Dsize):
 def trace_with_mask(data, order, meta, Dsize, tcon, msk12):
     """ Trace dict of tensors according to meta = [(tnew, told, Dreshape), ...].
         Repeating tnew are added."""
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for (sln, slo, Do, Drsh), tt in zip(meta, tcon):
         temp = data[slice(*slo)].reshape(Do).permute(order).reshape(Drsh)
         newdata[slice(*sln)] += torch.sum(temp[msk12[tt][0], msk12[tt][1]], axis=0).ravel()
@@ -350,9 +424,9 @@ def svd_lowrank(data, meta, sizes, n_iter=60, k_fac=6, **kwargs):
     # torch.svd_lowrank decomposes A = USV^T and return U,S,V
     # complex A is not supported
     real_dtype = data.real.dtype if data.is_complex() else data.dtype
-    Udata = torch.zeros((sizes[0],), dtype=data.dtype, device=data.device)
-    Sdata = torch.zeros((sizes[1],), dtype=real_dtype, device=data.device)
-    Vdata = torch.zeros((sizes[2],), dtype=data.dtype, device=data.device)
+    Udata = _zeros(sizes[0], data.dtype, data.device)
+    Sdata = _zeros(sizes[1], real_dtype, data.device)
+    Vdata = _zeros(sizes[2], data.dtype, data.device)
     for (sl, D, slU, DU, slS, slV, DV) in meta:
         q = slS[1] - slS[0]
         U, S, V = torch.svd_lowrank(data[slice(*sl)].view(D), q=q, niter=n_iter)
@@ -362,9 +436,97 @@ def svd_lowrank(data, meta, sizes, n_iter=60, k_fac=6, **kwargs):
     return Udata, Sdata, Vdata
 
 
+def _range_finder(A, l, n_iter):
+    G = torch.randn((A.shape[1], l), dtype=A.real.dtype, device=A.device).to(dtype=A.dtype)
+    Q = torch.linalg.qr(A @ G).Q
+    for _ in range(n_iter):
+        Z = torch.linalg.qr(A.mH @ Q).Q
+        Q = torch.linalg.qr(A @ Z).Q
+    return Q
+
+
+def svd_randomized(data, meta, sizes, n_iter=2, oversample=10, **kwargs):
+    real_dtype = data.real.dtype if data.is_complex() else data.dtype
+    Udata = _zeros(sizes[0], data.dtype, data.device)
+    Sdata = _zeros(sizes[1], real_dtype, data.device)
+    Vdata = _zeros(sizes[2], data.dtype, data.device)
+    for (sl, D, slU, DU, slS, slV, DV) in meta:
+        A = data[slice(*sl)].view(D)
+        k = DU[1]
+        if k + oversample < min(D):
+            Q = _range_finder(A, k + oversample, n_iter)
+            U, S, V = torch.linalg.svd(Q.mH @ A, full_matrices=False)
+            U = Q @ U[:, :k]
+        else:
+            U, S, V = torch.linalg.svd(A, full_matrices=False)
+        Udata[slice(*slU)].view(DU)[:] = U[:, :k]
+        Sdata[slice(*slS)] = S[:k]
+        Vdata[slice(*slV)].view(DV)[:] = V[:k]
+    return Udata, Sdata, Vdata
+
+
+def svdvals_randomized(data, meta, sizeS, n_iter=2, oversample=10, **kwargs):
+    real_dtype = data.real.dtype if data.is_complex() else data.dtype
+    Sdata = _zeros(sizeS, real_dtype, data.device)
+    for (sl, D, _, _, slS, _, _) in meta:
+        A = data[slice(*sl)].view(D)
+        k = slS[1] - slS[0]
+        if k + oversample < min(D):
+            A = _range_finder(A, k + oversample, n_iter).mH @ A
+        Sdata[slice(*slS)] = torch.linalg.svdvals(A)[:k]
+    return Sdata
+
+
+def svd_subspace(data, meta, sizes, Qdata, Qmeta, n_iter=2, tol=1e-8, **kwargs):
+    real_dtype = data.real.dtype if data.is_complex() else data.dtype
+    Udata = _zeros(sizes[0], data.dtype, data.device)
+    Sdata = _zeros(sizes[1], real_dtype, data.device)
+    Vdata = _zeros(sizes[2], data.dtype, data.device)
+    for (sl, D, slU, DU, slS, slV, DV), qm in zip(meta, Qmeta):
+        A = data[slice(*sl)].view(D)
+        k = DU[1]
+        USV = None
+        if qm is not None:
+            Q = Qdata[slice(*qm[0])].view(qm[1]).to(dtype=A.dtype)
+            if k > qm[1][1]:
+                G = torch.randn((D[0], k - qm[1][1]), dtype=A.real.dtype, device=A.device).to(dtype=A.dtype)
+                Q = torch.cat([Q, G], dim=1)
+            Q = torch.linalg.qr(Q).Q
+            for _ in range(n_iter):
+                Z = torch.linalg.qr(A.mH @ Q).Q
+                Q = torch.linalg.qr(A @ Z).Q
+            U, S, V = torch.linalg.svd(Q.mH @ A, full_matrices=False)
+            U = Q @ U
+            nc = min(qm[1][1], k)
+            R = A @ V[:nc].mH - U[:, :nc] * S[:nc]
+            if nc == 0 or torch.linalg.vector_norm(R, dim=0).max() <= tol * S[0]:
+                USV = U, S, V
+        if USV is None:
+            USV = torch.linalg.svd(A, full_matrices=False)
+        U, S, V = USV
+        Udata[slice(*slU)].view(DU)[:] = U[:, :k]
+        Sdata[slice(*slS)] = S[:k]
+        Vdata[slice(*slV)].view(DV)[:] = V[:k, :]
+    return Udata, Sdata, Vdata
+
+
+def svd_from_vectors(data, meta, sizes, triples):
+    real_dtype = data.real.dtype if data.is_complex() else data.dtype
+    Udata = _zeros(sizes[0], data.dtype, data.device)
+    Sdata = _zeros(sizes[1], real_dtype, data.device)
+    Vdata = _zeros(sizes[2], data.dtype, data.device)
+    for (_, _, slU, DU, slS, slV, DV), (S, Us, Vs) in zip(meta, triples):
+        k = min(len(S), DU[1])
+        if k > 0:
+            Sdata[slS[0]: slS[0] + k] = S[:k]
+            Udata[slice(*slU)].view(DU)[:, :k] = torch.stack(Us[:k], dim=1)
+            Vdata[slice(*slV)].view(DV)[:k, :] = torch.stack(Vs[:k], dim=0).conj()
+    return Udata, Sdata, Vdata
+
+
 def svdvals(data, meta, sizeS, **kwargss):
     real_dtype = data.real.dtype if data.is_complex() else data.dtype
-    Sdata = torch.zeros((sizeS,), dtype=real_dtype, device=data.device)
+    Sdata = _zeros(sizeS, real_dtype, data.device)
     for (sl, D, _, _, slS, _, _) in meta:
         torch.linalg.svdvals(data[slice(*sl)].view(D), out=Sdata[slice(*slS)])
     return Sdata
@@ -385,10 +547,11 @@ class kernel_svd(torch.autograd.Function):
             # device = data.device
             # data = data.to(device='cpu')
             real_dtype = data.real.dtype if data.is_complex() else data.dtype
-            Udata = torch.empty((sizes[0],), dtype=data.dtype, device=data.device)
-            Sdata = torch.empty((sizes[1],), dtype=real_dtype, device=data.device)
-            Vhdata = torch.empty((sizes[2],), dtype=data.dtype, device=data.device)
+            Udata = _empty(sizes[0], data.dtype, data.device)
+            Sdata = _empty(sizes[1], real_dtype, data.device)
+            Vhdata = _empty(sizes[2], data.dtype, data.device)
             reg = torch.as_tensor(ad_decomp_reg, dtype=real_dtype, device=data.device)
+
             for (sl, D, slU, DU, slS, slV, DV) in meta:
                 # is_zero_block = torch.linalg.vector_norm(data[slice(*sl)]) == 0. if _torch_version_check("1.7.0") \
                 #     else data[slice(*sl)].norm() == 0.
@@ -422,10 +585,11 @@ class kernel_svd(torch.autograd.Function):
             # device = data.device
             # data = data.to(device='cpu')
             real_dtype = data.real.dtype if data.is_complex() else data.dtype
-            Udata = torch.empty((sizes[0],), dtype=data.dtype, device=data.device)
-            Sdata = torch.empty((sizes[1],), dtype=real_dtype, device=data.device)
-            Vhdata = torch.empty((sizes[2],), dtype=data.dtype, device=data.device)
+            Udata = _empty(sizes[0], data.dtype, data.device)
+            Sdata = _empty(sizes[1], real_dtype, data.device)
+            Vhdata = _empty(sizes[2], data.dtype, data.device)
             reg= torch.as_tensor(ad_decomp_reg, dtype=data.real.dtype, device=data.device)
+
             for (sl, D, slU, DU, slS, slV, DV) in meta:
                 # is_zero_block = torch.linalg.vector_norm(data[slice(*sl)]) == 0. if _torch_version_check("1.7.0") \
                 #     else data[slice(*sl)].norm() == 0.
@@ -477,8 +641,8 @@ def fix_svd_signs(Udata, Vhdata, meta):
 
 def eigh(data, meta=None, sizes=(1, 1), order_by_magnitude=False, ad_decomp_reg=1.0e-12):
     real_dtype= data.real.dtype if data.is_complex() else data.dtype
-    Sdata = torch.zeros((sizes[0],), dtype=real_dtype, device=data.device)
-    Udata = torch.zeros((sizes[1],), dtype=data.dtype, device=data.device)
+    Sdata = _zeros(sizes[0], real_dtype, data.device)
+    Udata = _zeros(sizes[1], data.dtype, data.device)
     if meta is not None:
         if order_by_magnitude:
             reg = torch.as_tensor(ad_decomp_reg, dtype=real_dtype, device=data.device)
@@ -498,8 +662,8 @@ def eig(T):
 
 
 def qr(data, meta, sizes):
-    Qdata = torch.zeros((sizes[0],), dtype=data.dtype, device=data.device)
-    Rdata = torch.zeros((sizes[1],), dtype=data.dtype, device=data.device)
+    Qdata = _zeros(sizes[0], data.dtype, data.device)
+    Rdata = _zeros(sizes[1], data.dtype, data.device)
     for (sl, D, slQ, DQ, slR, DR) in meta:
         Q, R = torch.linalg.qr(data[slice(*sl)].view(D))
         sR = torch.sign(real(R.diag()))
@@ -510,6 +674,64 @@ def qr(data, meta, sizes):
 
 
 @torch.no_grad()
+def truncation_mask(data, seg, starts, D_block, tol_block, tol, D_total, truncate_multiplets=False):
+    # see backend_np.truncation_mask; numbers of kept values stay on device, avoiding synchronization with host
+    N, device = data.numel(), data.device
+    if N == 0:
+        return torch.zeros(0, dtype=torch.bool, device=device)
+    data = data.detach()
+    seg, starts = _to_index(seg, device), _to_index(starts, device)
+    D_block = torch.as_tensor(D_block, dtype=torch.float64, device=device)
+    tol_block = torch.as_tensor(tol_block, dtype=data.dtype, device=device)
+    bmax = torch.zeros(len(starts), dtype=data.dtype, device=device).scatter_reduce(0, seg, data.abs(), 'amax', include_self=False)
+    ar = torch.arange(N, device=device)
+    order = torch.argsort(-data, stable=True)
+    order = order[torch.argsort(seg[order], stable=True)]
+    rank = torch.empty(N, dtype=torch.int64, device=device)
+    rank[order] = ar - starts[seg[order]]
+    temp = data * ((data > tol_block[seg] * bmax[seg]) & (rank < D_block[seg]))
+    D = torch.count_nonzero(temp > tol * temp.abs().max())
+    if D_total < N:
+        D = torch.clamp(D, max=int(D_total))
+    order = torch.argsort(-temp, stable=True)
+    if truncate_multiplets:
+        s = data[order]
+        gaps = torch.cat([s.new_zeros(1), (s[:-1] - s[1:]).abs()])  # gaps[p] between p-th and (p+1)-th largest values
+        sp = torch.cat([s.new_zeros(1), s[:-1].abs()])
+        valid = (ar >= D) & (D > 0)
+        gaps = torch.where(valid, gaps, -torch.ones_like(gaps))
+        stop = valid & (torch.cummax(gaps, dim=0).values > sp)
+        stop = torch.where(stop.any(), torch.argmax(stop.to(torch.int8)), N - 1)
+        p = torch.argmax(torch.where(ar <= stop, gaps, -torch.ones_like(gaps)))
+        D = torch.where(valid.any(), p, D)
+    mask = torch.zeros(N, dtype=torch.bool, device=device)
+    mask[order] = ar < D
+    return mask
+
+
+def truncation_mask_multiplets(data, tol, D_total, eps_multiplet, pairs):
+    # see backend_np.truncation_mask_multiplets
+    N, device = data.numel(), data.device
+    if N == 0:
+        return torch.zeros(0, dtype=torch.bool, device=device)
+    data = data.detach()
+    order = torch.argsort(data, descending=True)
+    s = data[order]
+    D = torch.count_nonzero(s > s[0] * tol)
+    if D_total < N:
+        D = torch.clamp(D, max=int(D_total))
+    ar = torch.arange(N, device=device)
+    gaps = (s[:-1] - s[1:]).abs() / (torch.maximum(s[:-1].abs(), s[1:].abs()) + 1.0e-16)
+    cut = torch.where((ar[:-1] < D) & (gaps > eps_multiplet), ar[:-1] + 1, torch.zeros_like(ar[:-1]))
+    cut = cut.max() if N > 1 else D
+    D = torch.where((D < N) & (cut > 0), cut, D)
+    mask = torch.zeros(N, dtype=torch.bool, device=device)
+    mask[order] = ar < D
+    dst, src = _to_index(pairs[0], device), _to_index(pairs[1], device)
+    mask[dst] = mask[dst] & mask[src]
+    return mask
+
+
 def argsort(data):
     return torch.argsort(data)
 
@@ -527,13 +749,13 @@ def eigs_which(val, which):
 
 
 def embed_msk(data, msk, Dsize):
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     newdata[msk] = data
     return newdata
 
 
 def embed_slc(data, meta, Dsize):
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for sln, slo in meta:
         newdata[slice(*sln)] = data[slice(*slo)]
     return newdata
@@ -550,7 +772,7 @@ def allclose(Adata, Bdata, rtol, atol):
 
 def add(Adata, Bdata, meta, Dsize):
     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+    newdata = _zeros(Dsize, dtype, Adata.device)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -560,7 +782,7 @@ def add(Adata, Bdata, meta, Dsize):
 
 def sub(Adata, Bdata, meta, Dsize):
     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+    newdata = _zeros(Dsize, dtype, Adata.device)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -570,7 +792,7 @@ def sub(Adata, Bdata, meta, Dsize):
 
 def apxb(Adata, Bdata, x, meta, Dsize):
     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+    newdata = _zeros(Dsize, dtype, Adata.device)
     for sl_c, sl_a in meta[0]:
         newdata[slice(*sl_c)] += Adata[slice(*sl_a)]
     for sl_c, sl_b in meta[1]:
@@ -578,40 +800,70 @@ def apxb(Adata, Bdata, x, meta, Dsize):
     return newdata
 
 
+def apxb_(Adata, Bdata, x):
+    """ In-place Adata += x * Bdata, if dtype of Adata and autograd allow it; otherwise returns new tensor. """
+    if (Adata.requires_grad and torch.is_grad_enabled()) or \
+       torch.result_type(Adata, Bdata) != Adata.dtype or torch.result_type(Adata, x) != Adata.dtype:
+        return Adata + x * Bdata
+    return Adata.addcmul_(Bdata, torch.as_tensor(x, dtype=Adata.dtype, device=Adata.device))
+
+
+def scale_(data, x):
+    """ In-place data *= x, if dtype of data and autograd allow it; otherwise returns new tensor. """
+    if (data.requires_grad and torch.is_grad_enabled()) or torch.result_type(data, x) != data.dtype:
+        return data * x
+    return data.mul_(x)
+
+
 def apply_slice(data, slcn, slco):
     Dsize = slcn[-1][1] if len(slcn) > 0 else 0
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for sn, so in zip(slcn, slco):
         newdata[slice(*sn)] = data[slice(*so)]
     return newdata
 
 
-def vdot(Adata, Bdata):
+def vdot(Adata, Bdata, conj=(0, 0)):
     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
     if dtype != Adata.dtype:
         Adata = Adata.to(dtype=dtype)
     if dtype != Bdata.dtype:
         Bdata = Bdata.to(dtype=dtype)
+    if conj[0] and conj[1]:
+        return (Adata @ Bdata).conj()
+    if conj[0]:
+        return torch.vdot(Adata, Bdata)
+    if conj[1]:
+        return torch.vdot(Bdata, Adata)
     return Adata @ Bdata
 
 
 def diag_1dto2d(data, meta, Dsize):
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for sln, slo in meta:
         newdata[slice(*sln)] = torch.diag(data[slice(*slo)]).ravel()
     return newdata
 
 
 def diag_2dto1d(data, meta, Dsize):
-    newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+    newdata = _zeros(Dsize, data.dtype, data.device)
     for sln, slo, Do in meta:
         #newdata[slice(*sln)] = torch.diag(data[slice(*slo)].reshape(Do))
         torch.diag(data[slice(*slo)].reshape(Do), out=newdata[slice(*sln)])
     return newdata
 
 
-def dot(Adata, Bdata, meta_dot, Dsize):
-    return kernel_dot.apply(Adata, Bdata, meta_dot, Dsize)
+def dot(Adata, Bdata, meta_dot, Dsize, out=None):
+    newdata = kernel_dot.apply(Adata, Bdata, meta_dot, Dsize)
+    return _copy_to_out(newdata, out)
+
+
+def _copy_to_out(newdata, out):
+    """ Write result to preallocated output, if it fits and autograd allows it. """
+    if out is None or out.shape != newdata.shape or out.dtype != newdata.dtype or \
+       (torch.is_grad_enabled() and (newdata.requires_grad or out.requires_grad)):
+        return newdata
+    return out.copy_(newdata)
 
 
 if _torch_version_check("2.0"):
@@ -623,7 +875,7 @@ if _torch_version_check("2.0"):
                 Adata = Adata.to(dtype=dtype)
             if dtype != Bdata.dtype:
                 Bdata = Bdata.to(dtype=dtype)
-            newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+            newdata = _zeros(Dsize, dtype, Adata.device)
             for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
                 newdata[slice(*slc)].view(Dc)[:] = Adata[slice(*sla)].view(Da) @ Bdata[slice(*slb)].view(Db)
             return newdata
@@ -661,7 +913,7 @@ else:
                 Adata = Adata.to(dtype=dtype)
             if dtype != Bdata.dtype:
                 Bdata = Bdata.to(dtype=dtype)
-            newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+            newdata = _zeros(Dsize, dtype, Adata.device)
             for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
                 newdata[slice(*slc)].view(Dc)[:] = Adata[slice(*sla)].view(Da) @ Bdata[slice(*slb)].view(Db)
             return newdata
@@ -693,7 +945,7 @@ if _torch_version_check("2.0"):
                 Adata = Adata.to(dtype=dtype)
             if dtype != Bdata.dtype:
                 Bdata = Bdata.to(dtype=dtype)
-            Cdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+            Cdata = _zeros(Dsize, dtype, Adata.device)
             for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
                 Cdata[slice(*slc)].view(Dc)[:] = Adata[slice(*sla)].view(Da)[:, msk_a[ia]] @ Bdata[slice(*slb)].view(Db)[msk_b[ib], :]
             return Cdata
@@ -737,7 +989,7 @@ else:
                 Adata = Adata.to(dtype=dtype)
             if dtype != Bdata.dtype:
                 Bdata = Bdata.to(dtype=dtype)
-            Cdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
+            Cdata = _zeros(Dsize, dtype, Adata.device)
             for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
                 Cdata[slice(*slc)].view(Dc)[:] = Adata[slice(*sla)].view(Da)[:, msk_a[ia]] @ Bdata[slice(*slb)].view(Db)[msk_b[ib], :]
             return Cdata
@@ -756,57 +1008,234 @@ else:
                 Bdata_b[slice(*slb)].view(Db)[msk_b[ib],:]= Adata[slice(*sla)].view(Da)[:,msk_a[ia]].adjoint() @ Cdata_b[slice(*slc)].view(Dc)
             return Adata_b, Bdata_b, None, None, None, None
 
+def _batch_index(starts, Dp, device):
+    """ Index of elements of blocks of size Dp starting at starts. """
+    starts = torch.as_tensor(starts, dtype=torch.int64, device=device).reshape(-1, 1)
+    return (starts + torch.arange(Dp, dtype=torch.int64, device=device)).ravel()
+
+
+def _mask_subgroups(ias, msk_a):
+    """ Split positions in a group of blocks according to the length of the mask of contracted leg. """
+    subgroups = {}
+    for n, ia in enumerate(ias):
+        subgroups.setdefault(len(msk_a[ia]), []).append(n)
+    return subgroups.values()
+
+
+def dot_batched(Adata, Bdata, meta_batch, Dsize, out=None):
+    newdata = kernel_dot_batched.apply(Adata, Bdata, meta_batch, Dsize)
+    return _copy_to_out(newdata, out)
+
+
+def _dot_batched_forward(Adata, Bdata, meta_batch, Dsize):
+    dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
+    if dtype != Adata.dtype:
+        Adata = Adata.to(dtype=dtype)
+    if dtype != Bdata.dtype:
+        Bdata = Bdata.to(dtype=dtype)
+    device = Adata.device
+    newdata = _zeros(Dsize, dtype, device)
+    for (Dc, Da, Db, slc, sla, slb, _, _) in meta_batch:
+        nb = len(slc)
+        ind_a = _batch_index(sla, Da[0] * Da[1], device)
+        ind_b = _batch_index(slb, Db[0] * Db[1], device)
+        ind_c = _batch_index(slc, Dc[0] * Dc[1], device)
+        newdata[ind_c] = torch.bmm(Adata[ind_a].view(nb, *Da), Bdata[ind_b].view(nb, *Db)).ravel()
+    return newdata
+
+
+def _dot_batched_backward(Adata, Bdata, meta_batch, Cdata_b):
+    # adjoint of batched block-sparse matrix-matrix multiplication A.B = C
+    #
+    # A_b = C_b.B^T ; B_b = A^T . C_b
+    device = Adata.device
+    Adata_b = torch.zeros_like(Adata)
+    Bdata_b = torch.zeros_like(Bdata)
+    for (Dc, Da, Db, slc, sla, slb, _, _) in meta_batch:
+        nb = len(slc)
+        ind_a = _batch_index(sla, Da[0] * Da[1], device)
+        ind_b = _batch_index(slb, Db[0] * Db[1], device)
+        ind_c = _batch_index(slc, Dc[0] * Dc[1], device)
+        Ctemp_b = Cdata_b[ind_c].view(nb, *Dc)
+        Adata_b[ind_a] = torch.bmm(Ctemp_b, Bdata[ind_b].view(nb, *Db).adjoint()).ravel()
+        Bdata_b[ind_b] = torch.bmm(Adata[ind_a].view(nb, *Da).adjoint(), Ctemp_b).ravel()
+    return Adata_b, Bdata_b
+
+
+if _torch_version_check("2.0"):
+    class kernel_dot_batched(torch.autograd.Function):
+        @staticmethod
+        def forward(Adata, Bdata, meta_batch, Dsize):
+            return _dot_batched_forward(Adata, Bdata, meta_batch, Dsize)
+
+        @staticmethod
+        def setup_context(ctx, inputs, output):
+            Adata, Bdata, meta_batch, Dsize = inputs
+            ctx.save_for_backward(Adata, Bdata)
+            ctx.meta_batch = meta_batch
+
+        @staticmethod
+        def backward(ctx, Cdata_b):
+            Adata, Bdata = ctx.saved_tensors
+            Adata_b, Bdata_b = _dot_batched_backward(Adata, Bdata, ctx.meta_batch, Cdata_b)
+            return Adata_b, Bdata_b, None, None
+else:
+    class kernel_dot_batched(torch.autograd.Function):
+        @staticmethod
+        def forward(ctx, Adata, Bdata, meta_batch, Dsize):
+            ctx.save_for_backward(Adata, Bdata)
+            ctx.meta_batch = meta_batch
+            return _dot_batched_forward(Adata, Bdata, meta_batch, Dsize)
+
+        @staticmethod
+        def backward(ctx, Cdata_b):
+            Adata, Bdata = ctx.saved_tensors
+            Adata_b, Bdata_b = _dot_batched_backward(Adata, Bdata, ctx.meta_batch, Cdata_b)
+            return Adata_b, Bdata_b, None, None
+
+
+def dot_with_mask_batched(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b):
+    return kernel_dot_with_mask_batched.apply(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b)
+
+
+def _masked_batch(meta_batch, msk_a, msk_b, device):
+    """ Iterate over sub-groups of blocks with equal shapes after applying masks, yielding indices for gather/scatter. """
+    for (Dc, Da, Db, slc, sla, slb, ias, ibs) in meta_batch:
+        for sub in _mask_subgroups(ias, msk_a):
+            nb = len(sub)
+            ma = torch.stack([msk_a[ias[n]] for n in sub])
+            mb = torch.stack([msk_b[ibs[n]] for n in sub])
+            ma = ma[:, None, :].expand(nb, Da[0], ma.shape[1])
+            mb = mb[:, :, None].expand(nb, mb.shape[1], Db[1])
+            ind_a = _batch_index(tuple(sla[n] for n in sub), Da[0] * Da[1], device)
+            ind_b = _batch_index(tuple(slb[n] for n in sub), Db[0] * Db[1], device)
+            ind_c = _batch_index(tuple(slc[n] for n in sub), Dc[0] * Dc[1], device)
+            yield (nb, Dc, Da, Db, ind_c, ind_a, ind_b, ma, mb)
+
+
+def _dot_with_mask_batched_forward(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b):
+    dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
+    if dtype != Adata.dtype:
+        Adata = Adata.to(dtype=dtype)
+    if dtype != Bdata.dtype:
+        Bdata = Bdata.to(dtype=dtype)
+    Cdata = _zeros(Dsize, dtype, Adata.device)
+    for (nb, Dc, Da, Db, ind_c, ind_a, ind_b, ma, mb) in _masked_batch(meta_batch, msk_a, msk_b, Adata.device):
+        Atemp = torch.gather(Adata[ind_a].view(nb, *Da), 2, ma)
+        Btemp = torch.gather(Bdata[ind_b].view(nb, *Db), 1, mb)
+        Cdata[ind_c] = torch.bmm(Atemp, Btemp).ravel()
+    return Cdata
+
+
+def _dot_with_mask_batched_backward(Adata, Bdata, meta_batch, msk_a, msk_b, Cdata_b):
+    # adjoint of batched block-sparse matrix-matrix multiplication A.B = C
+    #
+    # A_b = C_b.B^T ; B_b = A^T . C_b
+    Adata_b = torch.zeros_like(Adata)
+    Bdata_b = torch.zeros_like(Bdata)
+    for (nb, Dc, Da, Db, ind_c, ind_a, ind_b, ma, mb) in _masked_batch(meta_batch, msk_a, msk_b, Adata.device):
+        Ctemp_b = Cdata_b[ind_c].view(nb, *Dc)
+        Atemp = torch.gather(Adata[ind_a].view(nb, *Da), 2, ma)
+        Btemp = torch.gather(Bdata[ind_b].view(nb, *Db), 1, mb)
+        Atemp_b = torch.zeros((nb, *Da), dtype=Adata.dtype, device=Adata.device)
+        Btemp_b = torch.zeros((nb, *Db), dtype=Bdata.dtype, device=Bdata.device)
+        Atemp_b.scatter_(2, ma, torch.bmm(Ctemp_b, Btemp.adjoint()))
+        Btemp_b.scatter_(1, mb, torch.bmm(Atemp.adjoint(), Ctemp_b))
+        Adata_b[ind_a] = Atemp_b.ravel()
+        Bdata_b[ind_b] = Btemp_b.ravel()
+    return Adata_b, Bdata_b
+
+
+if _torch_version_check("2.0"):
+    class kernel_dot_with_mask_batched(torch.autograd.Function):
+        @staticmethod
+        def forward(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b):
+            return _dot_with_mask_batched_forward(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b)
+
+        @staticmethod
+        def setup_context(ctx, inputs, output):
+            Adata, Bdata, meta_batch, Dsize, msk_a, msk_b = inputs
+            ctx.save_for_backward(Adata, Bdata)
+            ctx.meta_batch = meta_batch
+            ctx.msk_a = msk_a
+            ctx.msk_b = msk_b
+
+        @staticmethod
+        def backward(ctx, Cdata_b):
+            Adata, Bdata = ctx.saved_tensors
+            Adata_b, Bdata_b = _dot_with_mask_batched_backward(Adata, Bdata, ctx.meta_batch, ctx.msk_a, ctx.msk_b, Cdata_b)
+            return Adata_b, Bdata_b, None, None, None, None
+else:
+    class kernel_dot_with_mask_batched(torch.autograd.Function):
+        @staticmethod
+        def forward(ctx, Adata, Bdata, meta_batch, Dsize, msk_a, msk_b):
+            ctx.save_for_backward(Adata, Bdata)
+            ctx.meta_batch = meta_batch
+            ctx.msk_a = msk_a
+            ctx.msk_b = msk_b
+            return _dot_with_mask_batched_forward(Adata, Bdata, meta_batch, Dsize, msk_a, msk_b)
+
+        @staticmethod
+        def backward(ctx, Cdata_b):
+            Adata, Bdata = ctx.saved_tensors
+            Adata_b, Bdata_b = _dot_with_mask_batched_backward(Adata, Bdata, ctx.meta_batch, ctx.msk_a, ctx.msk_b, Cdata_b)
+            return Adata_b, Bdata_b, None, None, None, None
+
+
 def dot_diag(Adata, Bdata, meta, Dsize, axis, a_ndim):
     dim = [1] * a_ndim
     dim[axis] = -1
     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-    newdata = torch.empty((Dsize,), dtype=dtype, device=Adata.device)
+    newdata = _empty(Dsize, dtype, Adata.device)
     for sln, slb, Db, sla in meta:
         newdata[slice(*sln)].reshape(Db)[:] = Adata[slice(*sla)].reshape(dim) * Bdata[slice(*slb)].reshape(Db)
     return newdata
 
 
+def dot_diags(Adatas, Bdata, meta, Dsize, axes, b_ndim, out=None):
+    dims = []
+    for axis in axes:
+        dim = [1] * b_ndim
+        dim[axis] = -1
+        dims.append(dim)
+    dtype = reduce(torch.promote_types, (x.dtype for x in Adatas), Bdata.dtype)
+    if out is None or out.shape != (Dsize,) or out.dtype != dtype or \
+       (torch.is_grad_enabled() and (Bdata.requires_grad or any(x.requires_grad for x in Adatas))):
+        out = _empty(Dsize, dtype, Bdata.device)
+    for sln, slb, Db, slas in meta:
+        scale = reduce(torch.mul, (x[slice(*sla)].reshape(dim) for x, sla, dim in zip(Adatas, slas, dims)))
+        out[slice(*sln)].reshape(Db)[:] = Bdata[slice(*slb)].reshape(Db) * scale
+    return out
+
+
 def mask_diag(Adata, Bdata, meta, Dsize, axis, a_ndim):
     slc1 = (slice(None),) * axis
     slc2 = (slice(None),) * (a_ndim - (axis + 1))
-    newdata = torch.zeros((Dsize,), dtype=Adata.dtype, device=Adata.device)
+    newdata = _zeros(Dsize, Adata.dtype, Adata.device)
     for sln, sla, Da, slb in meta:
         cut = (Bdata[slice(*slb)].nonzero(),)
         newdata[slice(*sln)] = Adata[slice(*sla)].reshape(Da)[slc1 + cut + slc2].ravel()
     return newdata
 
 
-# dot_dict = {(0, 0): lambda x, y: x @ y,
-#             (0, 1): lambda x, y: x @ y.conj(),
-#             (1, 0): lambda x, y: x.conj() @ y,
-#             (1, 1): lambda x, y: x.conj() @ y.conj()}
-
-
-# def dot_nomerge(Adata, Bdata, cc, oA, oB, meta, Dsize):
-#     f = dot_dict[cc]  # proper conjugations
-#     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-#     newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
-#     for (sln, sla, Dao, Dan, slb, Dbo, Dbn) in meta:
-#         newdata[slice(*sln)] += f(Adata[slice(*sla)].reshape(Dao).permute(oA).reshape(Dan), \
-#                                   Bdata[slice(*slb)].reshape(Dbo).permute(oB).reshape(Dbn)).ravel()
-#     return newdata
-
+def dot_nomerge(Adata, Bdata, order_a, order_b, meta, Dsize, out=None):
+    dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
+    newdata = _zeros(Dsize, dtype, Adata.device)
+    for (sln, Dn, pairs) in meta:
+        for (sla, Dao, Dan, slb, Dbo, Dbn) in pairs:
+            newdata[slice(*sln)] += (Adata[slice(*sla)].reshape(Dao).permute(order_a).reshape(Dan) @ \
+                                     Bdata[slice(*slb)].reshape(Dbo).permute(order_b).reshape(Dbn)).ravel()
+    return _copy_to_out(newdata, out)
 
-# def dot_nomerge_masks(Adata, Bdata, cc, oA, oB, meta, Dsize, tcon, ma, mb):
-#     f = dot_dict[cc]  # proper conjugations
-#     dtype = torch.promote_types(Adata.dtype, Bdata.dtype)
-#     newdata = torch.zeros((Dsize,), dtype=dtype, device=Adata.device)
-#     for (sln, sla, Dao, Dan, slb, Dbo, Dbn), tt in zip(meta, tcon):
-#         newdata[slice(*sln)] += f(Adata[slice(*sla)].reshape(Dao).permute(oA).reshape(Dan)[:, ma[tt]], \
-#                                   Bdata[slice(*slb)].reshape(Dbo).permute(oB).reshape(Dbn)[mb[tt], :]).ravel()
-#     return newdata
 
 #####################################################
 #     block merging, truncations and un-merging     #
 #####################################################
 
 
-def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize):
+def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize, conj=False):
+    if conj:  # conjugate view; conjugation is resolved while copying blocks
+        data = data.conj()
     return kernel_transpose_and_merge.apply(data, order, meta_new, meta_mrg, Dsize)
 
 
@@ -818,8 +1247,17 @@ class kernel_transpose_and_merge(torch.autograd.Function):
         ctx.meta_mrg = meta_mrg
         ctx.D_source = data.numel()
 
+        ctx.gather = _gather._use_gather(len(meta_mrg), Dsize)
+        if ctx.gather:  # many small blocks; single gather with cached index
+            ind, src = _merge_index(order, meta_new, meta_mrg, Dsize, data.device)
+            if src is None:
+                return torch.index_select(data, 0, ind)
+            newdata = _zeros(Dsize, data.dtype, data.device)
+            newdata[ind] = data[src]
+            return newdata
+
         # Dsize - total size of fused representation (might include some zero-blocks)
-        newdata = torch.zeros((Dsize,), dtype=data.dtype, device=data.device)
+        newdata = _zeros(Dsize, data.dtype, data.device)
 
         # meta_new -> list of [(tn, Dn, sln), ...] where
         #             tn -> effective charge for block in fused tensor
@@ -852,6 +1290,13 @@ class kernel_transpose_and_merge(torch.autograd.Function):
         D_source = ctx.D_source
 
         newdata_b = torch.zeros((D_source,), dtype=data_b.dtype, device=data_b.device)
+        if ctx.gather:
+            ind, src = _merge_index(order, meta_new, meta_mrg, data_b.numel(), data_b.device)
+            if src is None:
+                newdata_b[ind] = data_b
+            else:
+                newdata_b[src] = data_b[ind]
+            return newdata_b, None, None, None, None
         for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_mrg, key=lambda x: x[0])):
             assert tn == t1
             tmp_b = data_b[slice(*sln)].view(Dn)
@@ -862,6 +1307,20 @@ class kernel_transpose_and_merge(torch.autograd.Function):
         return newdata_b, None, None, None, None
 
 
+def _merge_index(order, meta_new, meta_mrg, Dsize, device):
+    """ Index tensors for transpose_and_merge on device; see _gather.merge_index. """
+    return _gather.merge_index(order, meta_new, meta_mrg, Dsize, str(device), _to_index)
+
+
+def _unmerge_index(meta, Dsize, device):
+    """ Index tensor for unmerge on device; see _gather.unmerge_index. """
+    return _gather.unmerge_index(meta, Dsize, str(device), _to_index)
+
+
+def _to_index(ind, device):
+    return torch.as_tensor(ind, dtype=torch.int64, device=device)
+
+
 def merge_to_dense(data, Dtot, meta):
     newdata = torch.zeros(Dtot, dtype=data.dtype, device=data.device)
     for (sl, Dss) in meta:
@@ -872,7 +1331,7 @@ def merge_to_dense(data, Dtot, meta):
 def merge_super_blocks(pos_tens, meta_new, meta_block, Dsize):
     dtype = reduce(torch.promote_types, (a._data.dtype for a in pos_tens.values()))
     device = next(iter(pos_tens.values()))._data.device
-    newdata = torch.zeros((Dsize,), dtype=dtype, device=device)
+    newdata = _zeros(Dsize, dtype, device)
     for (tn, Dn, sln), (t1, gr) in zip(meta_new, groupby(meta_block, key=lambda x: x[0])):
         assert tn == t1
         for (_, slo, Do, pos, Dslc) in gr:
@@ -881,8 +1340,8 @@ def merge_super_blocks(pos_tens, meta_new, meta_block, Dsize):
     return newdata
 
 
-def unmerge(data, meta):
-    return kernel_unmerge.apply(data, meta)
+def unmerge(data, meta, out=None):
+    return _copy_to_out(kernel_unmerge.apply(data, meta), out)
 
 
 class kernel_unmerge(torch.autograd.Function):
@@ -893,6 +1352,9 @@ class kernel_unmerge(torch.autograd.Function):
         ctx.fwd_data_size = Dsize
         # slo -> slice in source tensor, specifying location of t_effective(fused) block
         # Do  -> shape of the fused block with t_eff
+        ctx.gather = _gather._use_gather(len(meta), data.numel())
+        if ctx.gather:  # many small blocks; single gather with cached index
+            return torch.index_select(data, 0, _unmerge_index(meta, data.numel(), data.device))
         # no zero blocks should be introduces here
         newdata = torch.empty(Dsize, dtype=data.dtype, device=data.device)
         for sln, Dn, slo, Do, sub_slc in meta:
@@ -908,6 +1370,9 @@ class kernel_unmerge(torch.autograd.Function):
         fwd_data_size = ctx.fwd_data_size
         # no zero blocks should be introduces here
         newdata_b = torch.empty(fwd_data_size, dtype=data_b.dtype, device=data_b.device)
+        if ctx.gather:
+            newdata_b[_unmerge_index(meta, data_b.numel(), data_b.device)] = data_b
+            return newdata_b, None, None, None
         for sln, Dn, slo, Do, sub_slc in meta:
             slcs = tuple(slice(*x) for x in sub_slc)
             newdata_b[slice(*slo)].view(Do)[slcs] = data_b[slice(*sln)].view(Dn)
@@ -18,13 +18,15 @@ import numpy as np
 import torch
 
 from .backend_torch import *
-from .backend_torch import transpose
+from .backend_torch import transpose, _copy_to_out
 
 import fused_transpose_merge_1d
 
 BACKEND_ID = "torch_cpp"
 
-def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize):
+def transpose_and_merge(data, order, meta_new, meta_mrg, Dsize, conj=False):
+    if conj and data.is_complex():  # compiled kernel does not resolve conjugate views
+        data = data.conj_physical()
     return kernel_transpose_and_merge_p2p_v3.apply(data, order, meta_new, meta_mrg, Dsize)
 
 
@@ -222,8 +224,8 @@ class kernel_transpose_and_merge_p2p_v3(torch.autograd.Function):
         return newdata_b, None, None, None, None
 
 
-def unmerge(data, meta):
-    return kernel_unmerge_ptp.apply(data, meta)
+def unmerge(data, meta, out=None):
+    return _copy_to_out(kernel_unmerge_ptp.apply(data, meta), out)
 
 class kernel_unmerge_ptp(torch.autograd.Function):
     @staticmethod
@@ -70,7 +70,8 @@ def make_config(**kwargs) -> NamedTuple:
 
     default_dtype: str
         Default data type (dtype) of YASTN tensors. Supported options are: ``'float64'``,
-        ``'complex128'``. If not specified, the default dtype is ``'float64'``.
+        ``'complex128'``, and single-precision ``'float32'``, ``'complex64'``.
+        If not specified, the default dtype is ``'float64'``.
     fermionic : bool or tuple[bool,...]
         Specify behavior of :meth:`yastn.swap_gate` function, allowing to introduce fermionic symmetries.
         Allowed values: ``False``, ``True``, or a tuple ``(True, False, ...)`` with one bool for each component
@@ -80,6 +81,44 @@ def make_config(**kwargs) -> NamedTuple:
         for details. Default is ``'hard'``.
     force_fusion : str
         Overrides fusion strategy provided in :meth:`yastn.Tensor.fuse_legs`. Default is ``None``.
+    batched_dot : bool
+        If ``True``, blocks of the effective block-matrices in :meth:`yastn.tensordot` that share
+        the same shapes are stacked together and multiplied with a single batched matrix-matrix
+        multiplication, reducing the overhead of dispatching many small ``matmul``-s.
+        Default is ``False``.
+    tensordot_policy : str
+        Strategy used by :meth:`yastn.tensordot`. With ``'fuse_to_matrix'``, both tensors are
+        merged into block-matrices that are multiplied and then unmerged. With ``'no_fuse'``,
+        pairs of matching blocks are multiplied directly and accumulated into the result, avoiding
+        temporary transposed copies of the tensors. With ``'auto'``, the strategy is selected
+        for each contraction based on a cost estimate from block counts and sizes (the decision is cached).
+        Contractions requiring masks for mismatched hard-fusions always use ``'fuse_to_matrix'``.
+        Default is ``'fuse_to_matrix'``.
+    lazy_transpose : bool
+        If ``True``, :meth:`yastn.Tensor.transpose` (and :meth:`yastn.Tensor.move_leg`) only records
+        the permutation, which is then fused with merging of blocks in the next :meth:`yastn.tensordot`,
+        decomposition or hard fusion, saving one copy of the data. The permutation is executed
+        when the data is accessed otherwise. Default is ``False``.
+    lazy_conj : bool
+        If ``True``, :meth:`yastn.Tensor.conj` (and :meth:`yastn.Tensor.conj_blocks`) only records
+        that the data should be conjugated, and conjugation is applied while copying blocks
+        in the next :meth:`yastn.tensordot`, decomposition or hard fusion, or when the data is accessed otherwise.
+        Conjugation requested by arguments of :meth:`yastn.tensordot`, :meth:`yastn.vdot`,
+        or :meth:`yastn.ncon` is always fused in this way. Default is ``False``.
+    mixed_precision : bool
+        If ``True``, contractions of single-precision tensors run in single precision,
+        while decompositions (:meth:`yastn.linalg.svd`, :meth:`yastn.linalg.eigh`, :meth:`yastn.linalg.qr`),
+        norms and scalar products (used, e.g., in orthogonalization of Krylov vectors) are computed in double precision.
+        Results of decompositions are cast back to single precision. Default is ``False``.
+    prune_tol : float
+        If positive, blocks where all elements are below ``prune_tol`` times the largest element of the tensor
+        are removed from the results of :meth:`yastn.tensordot` (without ``out``), addition and subtraction of tensors,
+        and sectors where all singular values are below ``prune_tol`` times the largest one are removed
+        in :meth:`yastn.linalg.svd_with_truncation`. See :meth:`yastn.remove_zero_blocks`.
+        Statistics are given by :meth:`yastn.get_pruning_info`. Default is ``0``, i.e., no pruning.
+    prune_every : int
+        Check for zero blocks only in every ``prune_every``-th result of the above operations,
+        limiting the overhead of pruning. Default is ``1``.
     """
     if "backend" not in kwargs:
 
@@ -162,21 +201,25 @@ def rand(config=None, legs=(), n=None, isdiag=False, **kwargs) -> yastn.Tensor:
 def randR(config=None, legs=(), n=None, isdiag=False, **kwargs) -> yastn.Tensor:
     r"""
     Initialize tensor with all allowed blocks filled with real random numbers,
-    see :meth:`yastn.rand`.
+    see :meth:`yastn.rand`. Single precision if it is the default of `config`.
     """
-    kwargs['dtype'] = 'float64'
+    kwargs['dtype'] = 'float32' if _single_precision(config) else 'float64'
     return _fill(config=config, legs=legs, n=n, isdiag=isdiag, val='rand', **kwargs)
 
 
 def randC(config=None, legs=(), n=None, isdiag=False, **kwargs) -> yastn.Tensor:
     r"""
     Initialize tensor with all allowed blocks filled with complex random numbers,
-    see :meth:`yastn.rand`.
+    see :meth:`yastn.rand`. Single precision if it is the default of `config`.
     """
-    kwargs['dtype'] = 'complex128'
+    kwargs['dtype'] = 'complex64' if _single_precision(config) else 'complex128'
     return _fill(config=config, legs=legs, n=n, isdiag=isdiag, val='rand', **kwargs)
 
 
+def _single_precision(config):
+    return getattr(config, 'default_dtype', 'float64') in ('float32', 'complex64')
+
+
 def zeros(config=None, legs=(), n=None, isdiag=False, **kwargs) -> yastn.Tensor:
     r"""
     Initialize tensor with all allowed blocks filled with zeros.
@@ -1 +1,2 @@
 from ._krylov import *
+from ._linear_operator import *
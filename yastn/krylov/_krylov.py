@@ -17,7 +17,7 @@ from __future__ import annotations
 import numpy as np
 from ..tensor import YastnError
 
-__all__ = ['expmv', 'eigs']
+__all__ = ['expmv', 'eigs', 'svds']
 
 
 # Krylov based methods, handled by anonymous function decribing action of matrix on a vector
@@ -216,3 +216,111 @@ def eigs(f, v0, k=1, which='SR', ncv=10, maxiter=None, tol=1e-13, hermitian=Fals
         sit = vr[:, it]
         Y.append(v0.linear_combination(*V, amplitudes=sit, **kwargs))
     return val[:k], Y
+
+
+def svds(f, fh, v0, k=1, ncv=None, tol=1e-13, maxiter=100, **kwargs) -> tuple[array, Sequence[vectors], Sequence[vectors]]:
+    r"""
+    Search for `k` largest singular values and corresponding singular vectors of linear operator :math:`A`,
+    using Golub-Kahan-Lanczos bidiagonalization with full reorthogonalization and thick restarts.
+
+    The operator enters only through its action on vectors, i.e., no dense factorization of :math:`A` is formed.
+    Singular vectors stay in the symmetry sector of `v0`, fixed by its charge.
+    For instance, leading singular triples of a product of CTM corners can be found without contracting it::
+
+        f = lambda v: cor_tl @ (cor_tr @ v)
+        fh = lambda u: cor_tr.tensordot(cor_tl.tensordot(u, axes=(0, 0), conj=(1, 0)), axes=(0, 0), conj=(1, 0))
+        S, U, V = yastn.svds(f, fh, v0, k=20)
+
+    Parameters
+    ----------
+        f: function
+            define an action of operator :math:`A` on the 'vector' `v0`, i.e., :math:`v \to Av`.
+
+        fh: function
+            define an action of adjoint operator on the 'vector' from the space of f(v0), i.e., :math:`u \to A^\dagger u`.
+
+        v0: Tensor
+            Initial guess, 'vector' to span the Krylov space.
+
+        k: int
+            Number of desired singular triples. The default is 1.
+
+        ncv: int
+            Dimension of the employed Krylov space, before it gets restarted.
+            Default is ``max(2 * k, k + 10)``. Must be greater than k.
+
+        maxiter: int
+            Maximal number of restarts. The default is 100.
+
+        tol: float
+            Stopping criterion. Singular triples are converged when their residuals
+            are below `tol` times the largest singular value. Default is 1e-13.
+
+        **kwargs: any
+            further parameters that are passed to linear_combination
+
+    Returns
+    -------
+    S, U, V
+        1D array of singular values in descending order, and lists of left and right singular vectors,
+        with :math:`A V[i] = S[i] U[i]`.
+        Fewer than `k` triples are returned if the Krylov space gets exhausted.
+    """
+    backend = v0.config.backend
+    normv = v0.norm()
+    if normv == 0:
+        raise YastnError('Initial vector v0 of svds should be nonzero.')
+    ncv = max(2 * k, k + 10) if ncv is None else ncv
+    if ncv <= k:
+        raise YastnError('svds requires ncv > k.')
+
+    V, U, B = [v0 / normv], [], {}  # B[i, j] = <U[i]| A |V[j]>
+    scale = 0
+    for it in range(maxiter + 1):
+        beta, happy = 0, False
+        for j in range(len(U), ncv):
+            p, amps = _orthogonalize(f(V[j]), U, backend, **kwargs)
+            for i in range(j):  # for i < j - 1, it gives an arrow from the restart
+                B[i, j] = amps[i]
+            alpha = backend.item(p.norm())
+            scale = max(scale, alpha)
+            if alpha <= 1e-13 * scale:  # A V[j] is in span of U; V[j] is kept for the projection
+                happy = True
+                break
+            B[j, j] = alpha
+            U.append(p / alpha)
+            q, _ = _orthogonalize(fh(U[j]), V, backend, **kwargs)
+            beta = backend.item(q.norm())
+            if beta <= 1e-13 * scale:  # span of V is an invariant subspace of A^dagger A
+                beta, happy = 0, True
+                break
+            V.append(q / beta)
+        m, n = len(U), (len(V) if len(V) == len(U) + 1 and happy else len(U))
+        if m == 0:
+            return backend.to_tensor([], dtype='float64', device=v0.device), [], []
+        Bm = np.zeros((m, n), dtype=np.result_type(*B.values()))
+        for (i, j), x in B.items():
+            Bm[i, j] = x
+        Ub, s, Vbh = np.linalg.svd(Bm, full_matrices=False)
+        res = beta * abs(Ub[m - 1, :k])
+        if happy or it == maxiter or all(res <= tol * s[0]):
+            break
+        l = min(max(k, (k + m) // 2), m - 1)  # thick restart keeps l Ritz triples and the residual vector
+        V = [v0.linear_combination(*V[:n], amplitudes=Vbh[i].conj(), **kwargs) for i in range(l)] + [V[m]]
+        U = [v0.linear_combination(*U, amplitudes=Ub[:, i], **kwargs) for i in range(l)]
+        B = {(i, i): s[i] for i in range(l)}
+
+    k = min(k, len(s))
+    Uk = [v0.linear_combination(*U, amplitudes=Ub[:, i], **kwargs) for i in range(k)]
+    Vk = [v0.linear_combination(*V[:n], amplitudes=Vbh[i].conj(), **kwargs) for i in range(k)]
+    return backend.to_tensor(s[:k], dtype='float64', device=v0.device), Uk, Vk
+
+
+def _orthogonalize(x, basis, backend, **kwargs):
+    """ Classical Gram-Schmidt against orthonormal basis, repeated twice for numerical stability. """
+    amps = [0] * len(basis)
+    for _ in range(2 if basis else 0):
+        cs = [backend.item(b.vdot(x)) for b in basis]
+        x = x.linear_combination(x, *basis, amplitudes=(1, *(-c for c in cs)), **kwargs)
+        amps = [a + c for a, c in zip(amps, cs)]
+    return x, amps
@@ -0,0 +1,98 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" Linking yastn tensors to matrix-free methods of scipy.sparse.linalg. """
+from __future__ import annotations
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+from ..tensor import compress_to_1d
+from ..initialize import decompress_from_1d
+
+__all__ = ['as_linear_operator']
+
+
+def as_linear_operator(f, v0, dtype=None) -> LinearOperator:
+    r"""
+    Wrap linear map of yastn tensors as :class:`scipy.sparse.linalg.LinearOperator` acting on 1D arrays,
+    which can be passed to, e.g., ``eigsh``, ``expm_multiply``, or ``gmres`` from ``scipy.sparse.linalg``.
+
+    The structure of 1D arrays is fixed by `v0`, see :meth:`yastn.Tensor.compress_to_1d`.
+    It is computed once; each application of the operator wraps the 1D array
+    as a tensor data without copying it (for NumPy backend),
+    and the result of `f` is returned without copying if it has the same structure as `v0`.
+    Otherwise, it is embedded into the structure of `v0`, filling in missing zero blocks.
+
+    Returned operator supports ``matvec`` and ``matmat``, where the latter applies `f` to consecutive columns.
+    It has attributes ``v0``, i.e., 1D array of `v0`, and ``meta``,
+    and a method ``to_tensor(x)`` turning 1D array, e.g., an eigenvector returned by scipy, into yastn tensor.
+
+    Parameters
+    ----------
+    f: Callable[[yastn.Tensor], yastn.Tensor]
+        linear map, with the result consistent with the structure of `v0`.
+
+    v0: yastn.Tensor
+        tensor setting the structure of 1D arrays.
+
+    dtype: str | None
+        data type of the operator, e.g., 'complex128', if `f` turns real tensors into complex ones.
+        The default is the data type of `v0`.
+    """
+    return _YastnLinearOperator(f, v0, dtype)
+
+
+class _YastnLinearOperator(LinearOperator):
+
+    def __init__(self, f, v0, dtype=None):
+        self.f = f
+        r1d, self.meta = compress_to_1d(v0)
+        self._template = decompress_from_1d(r1d, self.meta)
+        self._hfs = self._template.hfs
+        self._numpy = isinstance(r1d, np.ndarray)
+        self.v0 = r1d if self._numpy else v0.config.backend.to_numpy(r1d)
+        dtype = self.v0.dtype if dtype is None else np.dtype(dtype)
+        super().__init__(dtype=dtype, shape=(len(self.v0), len(self.v0)))
+
+    def to_tensor(self, x):
+        """ Turn 1D array into yastn tensor with structure of v0. """
+        return self._template._replace(data=self._to_data(x if x.ndim == 1 else x.reshape(-1)))
+
+    def _to_data(self, x):
+        if self._numpy:
+            return x
+        backend = self._template.config.backend
+        return backend.to_tensor(x, dtype=x.dtype.name, device=self._template.device)
+
+    def _to_1d(self, r):
+        meta = self.meta
+        if (r.struct is meta['struct'] or r.struct == meta['struct']) and \
+           (r.slices is meta['slices'] or r.slices == meta['slices']) and \
+            r.mfs == meta['mfs'] and r.hfs == self._hfs:
+            data = r._data
+        else:
+            data, _ = compress_to_1d(r, meta)
+        return data if self._numpy else r.config.backend.to_numpy(data)
+
+    def _matvec(self, x):
+        return self._to_1d(self.f(self.to_tensor(x)))
+
+    def _matmat(self, X):
+        X = X.T  # columns of X as rows
+        Y = None
+        for n, x in enumerate(X):
+            y = self._matvec(x)
+            if Y is None:
+                Y = np.empty((len(X), len(y)), dtype=np.result_type(y.dtype, self.dtype))
+            Y[n] = y
+        return np.empty((self.shape[0], 0), dtype=self.dtype) if Y is None else Y.T
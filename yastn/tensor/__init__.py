@@ -21,7 +21,7 @@ In principle, any number of symmetries can be used, including dense tensor with
 An instance of a Tensor is specified by a list of blocks (dense tensors) labeled by symmetries' charges on each leg.
 """
 from __future__ import annotations
-from ._auxliary import _struct, _config
+from ._auxliary import _struct, _config, _PendingData
 from ._merging import _Fusion
 from ._tests import YastnError
 from ._tests import *
@@ -33,6 +33,7 @@ from ._algebra import *
 from ._merging import *
 from .linalg import *
 from ._legs import *
+from ._plan import *
 from . import _tests
 from . import _control_lru
 from . import _contractions
@@ -42,6 +43,7 @@ from . import _algebra
 from . import linalg
 from . import _merging
 from . import _legs
+from . import _plan
 __all__ = ['Tensor', 'linalg', 'YastnError']
 __all__.extend(linalg.__all__)
 __all__.extend(_tests.__all__)
@@ -52,6 +54,7 @@ __all__.extend(_algebra.__all__)
 __all__.extend(_output.__all__)
 __all__.extend(_merging.__all__)
 __all__.extend(_legs.__all__)
+__all__.extend(_plan.__all__)
 
 
 class Tensor:
@@ -121,7 +124,8 @@ class Tensor:
     from ._initialize import set_block, _fill_tensor, __setitem__
     from .linalg import norm, svd, svd_with_truncation, eigh, eigh_with_truncation, qr
     from ._contractions import tensordot, __matmul__, vdot, trace, swap_gate, broadcast, apply_mask
-    from ._algebra import __add__, __sub__, __mul__, __rmul__, __array_ufunc__, __neg__, apxb
+    from ._contractions import broadcast_legs, broadcast_legs_
+    from ._algebra import __add__, __sub__, __mul__, __rmul__, __array_ufunc__, __neg__, apxb, apxb_, scale_
     from ._algebra import __lt__, __gt__, __le__, __ge__, __truediv__, __pow__
     from ._algebra import __abs__, real, imag, sqrt, rsqrt, reciprocal, exp, bitwise_not
     from ._single import conj, conj_blocks, flip_signature, flip_charges, transpose, moveaxis, move_leg, diag, grad
@@ -140,11 +144,33 @@ class Tensor:
 
     def _replace(self, **kwargs) -> yastn.Tensor:
         """ Creates a shallow copy replacing fields specified in kwargs """
-        for arg in ('config', 'struct', 'mfs', 'hfs', 'data', 'slices'):
+        for arg in ('config', 'struct', 'mfs', 'hfs', 'slices'):
             if arg not in kwargs:
                 kwargs[arg] = getattr(self, arg)
+        if 'data' not in kwargs:
+            kwargs['data'] = self._raw  # shallow copy shares pending transposition or conjugation
         return Tensor(**kwargs)
 
+    @property
+    def _data(self):
+        """ 1D container for tensor data; executes pending transposition or conjugation. """
+        data = self._raw
+        if type(data) is _PendingData:
+            data = self._raw = data.materialize(self.config.backend)
+        return data
+
+    @_data.setter
+    def _data(self, data):
+        self._raw = data  # 1D container for tensor data, or _PendingData
+
+    @property
+    def _source_data(self):
+        """ Data, or data of the source of pending operations; sufficient to read dtype and device. """
+        data = self._raw
+        if type(data) is _PendingData:
+            return data.data if data.result is None else data.result
+        return data
+
     @property
     def s(self) -> Sequence[int]:
         r"""
@@ -216,17 +242,21 @@ class Tensor:
     @property
     def device(self) -> str:
         """ Name of device on which the data resides. """
-        return self.config.backend.get_device(self._data)
+        return self.config.backend.get_device(self._source_data)
 
     @property
     def dtype(self) -> numpy.dtype | torch.dtype:
         """ dtype of tensor data used by the backend. """
-        return self.config.backend.get_dtype(self._data)
+        return self.config.backend.get_dtype(self._source_data)
 
     @property
     def yast_dtype(self) -> str:
-        """ Return 'complex128' if tensor data are complex else 'float64.' """
-        return 'complex128' if self.config.backend.is_complex(self._data) else 'float64'
+        """ Name of dtype of tensor data: 'float64', 'complex128', 'float32', or 'complex64'. """
+        dtype = self.dtype
+        for name, x in self.config.backend.DTYPE.items():
+            if x == dtype:
+                return name
+        return 'complex128' if self.config.backend.is_complex(self._source_data) else 'float64'
 
     @property
     def data(self) -> numpy.array | torch.tensor:
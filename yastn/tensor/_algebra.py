@@ -14,12 +14,14 @@
 # ==============================================================================
 """ Linear operations and operations on a single yastn.Tensor. """
 from __future__ import annotations
+import numpy as np
 from ._merging import _masks_for_add
 from ._tests import YastnError, _test_can_be_combined, _get_tD_legs, _test_axes_match
-from ._auxliary import _slc
+from ._auxliary import _slc, _materialize_readers
+from ._single import _prune_zero_blocks
 
 
-__all__ = ['apxb', 'real', 'imag', 'sqrt', 'rsqrt', 'reciprocal', 'exp', 'bitwise_not', 'allclose']
+__all__ = ['apxb', 'apxb_', 'real', 'imag', 'sqrt', 'rsqrt', 'reciprocal', 'exp', 'bitwise_not', 'allclose']
 
 
 def __add__(a, b) -> yastn.Tensor:
@@ -31,7 +33,7 @@ def __add__(a, b) -> yastn.Tensor:
     _test_can_be_combined(a, b)
     aA, bA, hfs, meta, struct, slices = _addition_meta(a, b)
     data = a.config.backend.add(aA, bA, meta, struct.size)
-    return a._replace(hfs=hfs, struct=struct, slices=slices, data=data)
+    return _prune_zero_blocks(a._replace(hfs=hfs, struct=struct, slices=slices, data=data))
 
 
 def __sub__(a, b) -> yastn.Tensor:
@@ -43,7 +45,7 @@ def __sub__(a, b) -> yastn.Tensor:
     _test_can_be_combined(a, b)
     aA, bA, hfs, meta, struct, slices = _addition_meta(a, b)
     data = a.config.backend.sub(aA, bA, meta, struct.size)
-    return a._replace(hfs=hfs, struct=struct, slices=slices, data=data)
+    return _prune_zero_blocks(a._replace(hfs=hfs, struct=struct, slices=slices, data=data))
 
 
 def apxb(a, b, x=1) -> yastn.Tensor:
@@ -57,10 +59,50 @@ def apxb(a, b, x=1) -> yastn.Tensor:
     """
     _test_can_be_combined(a, b)
     aA, bA, hfs, meta, struct, slices = _addition_meta(a, b)
-    data = a.config.backend.apxb(aA, bA, x, meta, struct.size)
+    data = a.config.backend.apxb(aA, bA, _as_scalar(x), meta, struct.size)
     return a._replace(hfs=hfs, struct=struct, slices=slices, data=data)
 
 
+def apxb_(a, b, x=1) -> yastn.Tensor:
+    r"""
+    In-place :math:`a \leftarrow a + x b`, returning updated ``a``.
+
+    If ``a`` and ``b`` have the same structure, and the data type of ``a`` can hold the result,
+    the data of ``a`` is overwritten without allocating new memory.
+    Otherwise, the result is computed as in :meth:`yastn.apxb` and replaces the content of ``a``.
+
+    Parameters
+    ----------
+    a, b : yastn.Tensor
+    x : number
+    """
+    _test_can_be_combined(a, b)
+    if a.struct == b.struct and a.slices == b.slices and a.hfs == b.hfs:
+        _materialize_readers(a._data, a.config.backend)
+        a._data = a.config.backend.apxb_(a._data, b._data, _as_scalar(x))
+        return a
+    aA, bA, hfs, meta, struct, slices = _addition_meta(a, b)
+    a._data = a.config.backend.apxb(aA, bA, _as_scalar(x), meta, struct.size)
+    a.struct, a.slices, a.hfs = struct, slices, hfs
+    return a
+
+
+def scale_(a, number) -> yastn.Tensor:
+    """
+    In-place multiplication of tensor by a number, returning updated ``a``.
+
+    The data of ``a`` is overwritten without allocating new memory if its data type can hold the result.
+    """
+    _materialize_readers(a._data, a.config.backend)
+    a._data = a.config.backend.scale_(a._data, _as_scalar(number))
+    return a
+
+
+def _as_scalar(number):
+    """ Numpy scalars as python numbers, which do not change the precision of tensor data, e.g., float32. """
+    return number.item() if isinstance(number, np.generic) else number
+
+
 def _addition_meta(a, b):
     """ meta-information for backend and new tensor charges and dimensions. """
     if a.struct.n != b.struct.n:
@@ -205,7 +247,7 @@ def __ge__(a, number) -> yastn.Tensor[bool]:
 
 def __mul__(a, number) -> yastn.Tensor:
     """ Multiply tensor by a number, use: `number * tensor`. """
-    data = a._data * number
+    data = a._data * _as_scalar(number)
     if a.config.backend.get_size(data) != a.struct.size:
         raise YastnError("Multiplication cannot change data size; broadcasting not supported.")
     return a._replace(data=data)
@@ -239,7 +281,7 @@ def __pow__(a, exponent) -> yastn.Tensor:
 
 def __truediv__(a, number) -> yastn.Tensor:
     """ Divide tensor by a scalar, use: `tensor / number`. """
-    data = a._data / number
+    data = a._data / _as_scalar(number)
     if a.config.backend.get_size(data) != a.struct.size:
         raise YastnError("truediv cannot change data size; broadcasting not supported.")
 
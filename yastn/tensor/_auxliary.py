@@ -15,6 +15,8 @@
 """ Auxliary functions used by yastn.Tensor. """
 from typing import NamedTuple
 from itertools import accumulate, chain
+import weakref
+import numpy as np
 from ..sym import sym_none
 
 
@@ -41,6 +43,90 @@ class _config(NamedTuple):
     default_dtype: str = 'float64'
     default_fusion: str = 'hard'
     force_fusion: str = None
+    batched_dot: bool = False
+    tensordot_policy: str = 'fuse_to_matrix'
+    lazy_transpose: bool = False
+    lazy_conj: bool = False
+    mixed_precision: bool = False
+    prune_tol: float = 0.
+    prune_every: int = 1
+
+
+# double-precision counterparts of single-precision dtypes; see mixed_precision in config
+_DOUBLE = {'float32': 'float64', 'complex64': 'complex128'}
+
+
+class _PendingData:
+    """
+    Data of a transposed and/or conjugated tensor, with permutation of blocks
+    and complex conjugation postponed until the data is needed.
+
+    Both are fused with merging of blocks to matrices in the next contraction or decomposition,
+    or executed by backend.transpose and backend.conj when the data is accessed (then the result is kept).
+    Tensors sharing this object, e.g., shallow copies, share the result.
+    Before data of the source is changed in place, pending operations reading it are executed;
+    see _materialize_readers.
+    """
+    __slots__ = ('data', 'axes', 'meta', 'struct', 'conj', 'result', '__weakref__')
+
+    def __init__(self, data, axes, meta, struct, conj=False):
+        self.data = data  # data of the source tensor
+        self.axes = axes  # permutation of native legs; None if blocks are not permuted
+        self.meta = meta  # meta of backend.transpose
+        self.struct = struct  # structure of the resulting tensor
+        self.conj = conj  # data should be complex-conjugated
+        self.result = None
+        _pending.add(self)
+
+    def pending_for(self, struct):
+        """ Operations can be fused with other operations on a tensor with struct (not changed by, e.g., add_leg). """
+        return self.result is None and (self.struct is struct or self.struct == struct)
+
+    def materialize(self, backend):
+        if self.result is None:
+            if self.axes is None:  # result does not share memory with the source, also for real data
+                conj = self.conj and backend.is_complex(self.data)
+                self.result = backend.conj(self.data) if conj else backend.clone(self.data)
+            else:
+                self.result = backend.transpose(self.data, self.axes, self.meta)
+                if self.conj and backend.is_complex(self.result):
+                    self.result = backend.conj(self.result)
+            self.data = None
+            _pending.discard(self)
+        return self.result
+
+
+# pending operations which have not been executed yet
+_pending = weakref.WeakSet()
+
+
+def _materialize_readers(data, backend):
+    """ Execute pending operations reading data, which is about to be changed in place. """
+    if _pending:
+        for pending in [x for x in _pending if x.data is data]:
+            pending.materialize(backend)
+
+
+def _unique_rows(x):
+    """
+    Lexicographically sorted unique rows of 2D integer array, indices of their first occurrences, and inverse.
+
+    Equivalent to np.unique(x, axis=0, return_index=True, return_inverse=True),
+    but faster, as rows are packed into single integers if their range allows it.
+    """
+    if x.shape[0] > 0 and x.shape[1] > 0:
+        low = x.min(axis=0)
+        span = (x.max(axis=0) - low + 1).tolist()
+        mult, total = [], 1
+        for sp in reversed(span):
+            mult.append(total)
+            total *= sp
+        if total < 2 ** 62:
+            keys = (x - low) @ np.array(mult[::-1], dtype=np.int64)
+            _, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+            return x[first], first, inv.reshape(-1)
+    rows, first, inv = np.unique(x, axis=0, return_index=True, return_inverse=True)
+    return rows, first, inv.reshape(-1)
 
 
 def _flatten(nested_iterator):
@@ -0,0 +1,271 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" Instrumented caches of meta-information. """
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from functools import update_wrapper
+from importlib import metadata
+from itertools import count
+from ._auxliary import _config
+
+
+_CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+_CacheStats = namedtuple("CacheStats", ["hits", "misses", "hit_rate", "maxsize", "currsize",
+                                        "nbytes", "maxbytes", "time"])
+
+_caches = []  # all instances of _interned_cache
+_budget = {'maxbytes': None, 'nbytes': 0}  # total memory budget and occupation of all caches
+
+
+class _interned_cache:
+    """
+    Least-recently-used cache of meta-information, replacing functools.lru_cache.
+
+    Large arguments, i.e., named tuples such as _struct or _config, and long tuples such as slices, are interned:
+    the first object with a given value that enters the cache becomes canonical and it is kept by the cache.
+    Later calls with the same objects are resolved by their ids, without hashing and comparing nested tuples.
+    Calls with equal but different objects fall back to comparing values,
+    and the new objects are registered as aliases of the cached entry (up to _MAX_ALIASES of them).
+
+    The cache records the time spent computing new entries, and the approximate memory of each entry.
+    Entries are evicted when the number of entries exceeds maxsize, memory exceeds maxbytes,
+    or the memory of all caches exceeds the total budget, see :meth:`yastn.set_cache_maxbytes`.
+    """
+
+    _MAX_ALIASES = 4
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.maxbytes = None
+        self.__wrapped__ = None
+        self._values = {}  # value key -> entry
+        self._lru = OrderedDict()  # token -> entry
+        self._ids = {}  # id key -> (entry, interned objects)
+        self._tokens = count()
+        self._store = {}  # persistent key -> result; entries loaded from disk
+        self.hits = self.misses = 0
+        self.nbytes = 0
+        self.time = 0.
+
+    def __call__(self, *args, **kwargs):
+        if self.__wrapped__ is None:  # used as a decorator
+            fun, = args
+            self.__wrapped__ = fun
+            update_wrapper(self, fun)
+            _caches.append(self)
+            return self
+        if self.maxsize == 0:
+            self.misses += 1
+            return self.__wrapped__(*args, **kwargs)
+        if kwargs:
+            return self._call_by_value(args + (_KWD_MARK,) + tuple(kwargs.items()), args, kwargs)
+        ikey = tuple((_ID_MARK, id(x)) if _is_heavy(x) else x for x in args)
+        try:
+            entry, _ = self._ids[ikey]
+        except (KeyError, TypeError):  # TypeError: unhashable light argument
+            return self._call_by_value(args, args, kwargs, ikey)
+        self.hits += 1
+        entry[4] += 1
+        self._lru.move_to_end(entry[2])
+        return entry[0]
+
+    def _call_by_value(self, vkey, args, kwargs, ikey=None):
+        try:
+            entry = self._values[vkey]
+            self.hits += 1
+            entry[4] += 1
+            self._lru.move_to_end(entry[2])
+        except KeyError:
+            self.misses += 1
+            result = self._store.pop(_persistent_key(vkey), _KWD_MARK) if self._store else _KWD_MARK
+            if result is _KWD_MARK:  # not found on disk
+                t0 = time.perf_counter()
+                result = self.__wrapped__(*args, **kwargs)
+                self.time += time.perf_counter() - t0
+            # entry = [result, value key, token, list of id keys, hits, nbytes]
+            entry = [result, vkey, next(self._tokens), [], 0, _sizeof((result, vkey))]
+            self._values[vkey] = entry
+            self._lru[entry[2]] = entry
+            self.nbytes += entry[5]
+            _budget['nbytes'] += entry[5]
+            self._evict()
+        if ikey is not None and entry[2] in self._lru:
+            if len(entry[3]) >= self._MAX_ALIASES:
+                del self._ids[entry[3].pop(0)]
+            self._ids[ikey] = (entry, args)  # keeping args prevents reuse of their ids
+            entry[3].append(ikey)
+        return entry[0]
+
+    def _evict(self):
+        while self._lru and ((self.maxsize is not None and len(self._lru) > self.maxsize) or
+                             (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+            self._pop()
+        if _budget['maxbytes'] is not None and _budget['nbytes'] > _budget['maxbytes']:
+            _evict_total()
+
+    def _pop(self):
+        """ Remove the least-recently used entry. """
+        _, old = self._lru.popitem(last=False)
+        del self._values[old[1]]
+        for key in old[3]:
+            del self._ids[key]
+        self.nbytes -= old[5]
+        _budget['nbytes'] -= old[5]
+
+    def cache_info(self):
+        """ Return statistics as a named tuple (hits, misses, maxsize, currsize). """
+        return _CacheInfo(self.hits, self.misses, self.maxsize, len(self._lru))
+
+    def cache_stats(self):
+        """ Return detailed statistics, including memory and time spent computing entries. """
+        calls = self.hits + self.misses
+        return _CacheStats(self.hits, self.misses, self.hits / calls if calls else 0., self.maxsize,
+                           len(self._lru), self.nbytes, self.maxbytes, self.time)
+
+    def cache_clear(self):
+        """ Clear the cache, entries loaded from disk, and statistics. """
+        _budget['nbytes'] -= self.nbytes
+        self._store.clear()
+        self._values.clear()
+        self._lru.clear()
+        self._ids.clear()
+        self.hits = self.misses = 0
+        self.nbytes = 0
+        self.time = 0.
+
+    def set_maxsize(self, maxsize):
+        """ Change maxsize; clears the cache. """
+        self.maxsize = maxsize
+        self.cache_clear()
+
+    def set_maxbytes(self, maxbytes):
+        """ Change the memory budget of the cache, evicting entries if necessary. """
+        self.maxbytes = maxbytes
+        self._evict()
+
+    def fingerprint(self):
+        """ Identifies the version of yastn and of the cached function; entries saved with other fingerprints are discarded. """
+        code = self.__wrapped__.__code__
+        return f"{_version()}-{hashlib.sha1(code.co_code + repr(code.co_names).encode()).hexdigest()[:16]}"
+
+    def save(self, fname):
+        """ Pickle cached entries, together with entries loaded from disk and not used yet. """
+        entries = dict(self._store)
+        for entry in self._lru.values():
+            if _KWD_MARK not in entry[1]:
+                entries[_persistent_key(entry[1])] = entry[0]
+        data = []
+        for entry in entries.items():
+            try:
+                data.append(pickle.dumps(entry))
+            except (pickle.PicklingError, TypeError, AttributeError):
+                pass  # entries with elements that cannot be pickled are not saved
+        with open(fname, 'wb') as f:
+            pickle.dump({'fingerprint': self.fingerprint(), 'entries': data}, f)
+        return len(data)
+
+    def load(self, fname):
+        """ Load entries pickled by :meth:`save`; they are moved to the cache on a miss. """
+        with open(fname, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('fingerprint') != self.fingerprint():
+            return 0
+        for entry in data['entries']:
+            key, result = pickle.loads(entry)
+            self._store[key] = result
+        return len(data['entries'])
+
+
+def _set_total_maxbytes(maxbytes):
+    """ Change the memory budget of all caches, evicting entries if necessary. """
+    _budget['maxbytes'] = maxbytes
+    if maxbytes is not None:
+        _evict_total()
+
+
+def _evict_total():
+    """
+    Evict entries until all caches fit in the total memory budget.
+
+    The least-recently used entries of all caches compete for eviction;
+    the one with the smallest number of hits per byte is removed first.
+    This shrinks caches that are thrashing or hold large rarely reused entries.
+    """
+    while _budget['nbytes'] > _budget['maxbytes']:
+        candidates = [(entry[4] / max(entry[5], 1), cache) for cache in _caches
+                      for entry in (next(iter(cache._lru.values()), None),) if entry is not None]
+        if not candidates:
+            return
+        _, cache = min(candidates, key=lambda x: x[0])
+        cache._pop()
+
+
+def _persistent_key(vkey):
+    """ Value key that does not depend on the backend; configs and symmetries are represented by their names. """
+    return tuple(_config_key(x) if isinstance(x, _config) else
+                 ('sym', x.SYM_ID) if isinstance(x, type) and hasattr(x, 'SYM_ID') else x for x in vkey)
+
+
+def _config_key(config):
+    return ('config', config.sym.SYM_ID, config.fermionic, config.default_fusion, config.force_fusion,
+            config.batched_dot, config.tensordot_policy)
+
+
+def _version():
+    try:
+        return metadata.version('yastn')
+    except metadata.PackageNotFoundError:
+        return 'dev'
+
+
+def _cache_dir(path):
+    """ Entries are stored in a subdirectory of path specific to yastn version. """
+    return os.path.join(path, f"yastn-{_version()}")
+
+
+_ID_MARK = object()
+_KWD_MARK = object()
+
+
+def _is_heavy(x):
+    """ Arguments that are interned by _interned_cache: named tuples, e.g., _struct, and long tuples. """
+    return isinstance(x, tuple) and (type(x) is not tuple or len(x) > 8)
+
+
+def _sizeof(obj):
+    """ Approximate memory used by nested tuples, lists, dicts, and arrays; shared objects are counted once. """
+    seen, size, stack = set(), 0, [obj]
+    while stack:
+        x = stack.pop()
+        if id(x) in seen:
+            continue
+        seen.add(id(x))
+        size += sys.getsizeof(x)
+        if isinstance(x, (tuple, list)):
+            stack.extend(x)
+        elif isinstance(x, dict):
+            stack.extend(x.keys())
+            stack.extend(x.values())
+        elif hasattr(x, 'nbytes') and not isinstance(x, (int, float, complex)):
+            try:
+                size += int(x.nbytes)
+            except TypeError:
+                pass
+    return size
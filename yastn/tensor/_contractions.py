@@ -14,16 +14,19 @@
 # ==============================================================================
 """ Contractions of yastn tensors """
 from __future__ import annotations
-from functools import lru_cache
 from itertools import groupby, accumulate
 import numpy as np
-from ._auxliary import _struct, _slc, _clear_axes, _unpack_axes, _flatten
-from ._tests import YastnError, _test_can_be_combined, _test_axes_match
-from ._merging import _merge_to_matrix, _unmerge, _meta_unmerge_matrix
+from ._auxliary import _struct, _slc, _clear_axes, _unpack_axes, _flatten, _unique_rows, _PendingData, _materialize_readers
+from ._cache import _interned_cache
+from ._tests import YastnError, _test_can_be_combined, _test_axes_match, _get_tD_legs
+from ._merging import _merge_to_matrix, _meta_unmerge_matrix, _no_change_in_unmerge, _data_or_pending
 from ._merging import _masks_for_tensordot, _masks_for_vdot, _masks_for_trace
+from ._single import _conj, _prune_zero_blocks
+from .linalg import _promote
 
 
-__all__ = ['tensordot', 'vdot', 'trace', 'swap_gate', 'ncon', 'einsum', 'broadcast', 'apply_mask']
+__all__ = ['tensordot', 'vdot', 'trace', 'swap_gate', 'ncon', 'ncon_path', 'einsum', 'broadcast',
+           'broadcast_legs', 'broadcast_legs_', 'apply_mask']
 
 
 def __matmul__(a, b) -> yastn.Tensor:
@@ -36,7 +39,7 @@ def __matmul__(a, b) -> yastn.Tensor:
     return tensordot(a, b, axes=(a.ndim - 1, 0))
 
 
-def tensordot(a, b, axes, conj=(0, 0)) -> yastn.Tensor:
+def tensordot(a, b, axes, conj=(0, 0), out=None) -> yastn.Tensor:
     r"""
     Compute tensor dot product of two tensor along specified axes.
 
@@ -57,18 +60,28 @@ def tensordot(a, b, axes, conj=(0, 0)) -> yastn.Tensor:
     conj: tuple[int, int]
         specify tensors to conjugate: (0, 0), (0, 1), (1, 0), or (1, 1).
         Default is (0, 0), i.e. neither tensor is conjugated
+
+    out: yastn.Tensor
+        Optional preallocated tensor with the structure of the result, independent of `a` and `b`.
+        The result is written into its data, if possible without allocating new memory,
+        and ``out`` is returned. Contractions with a diagonal tensor, or of legs with mismatched hard fusions,
+        do not reuse the memory of ``out``; its data are replaced by a newly allocated result.
     """
-    if conj[0]:
-        a = a.conj()
+    if out is not None and not (out.are_independent(a) and out.are_independent(b)):
+        raise YastnError('out should be independent of contracted tensors.')
+    if out is not None:  # data of out is overwritten
+        _materialize_readers(out._data, out.config.backend)
+    if conj[0]:  # conjugation of blocks is fused with merging blocks to matrices
+        a = _conj(a, lazy=True)
     if conj[1]:
-        b = b.conj()
+        b = _conj(b, lazy=True)
 
     in_a, in_b = _clear_axes(*axes)  # contracted meta legs
     needs_mask, (nin_a, nin_b) = _test_axes_match(a, b, sgn=-1, axes=(in_a, in_b))
     if a.isdiag:
-        return _tensordot_diag(a, b, in_b, destination=(0,))
+        return _write_out(_tensordot_diag(a, b, in_b, destination=(0,)), out)
     if b.isdiag:
-        return _tensordot_diag(b, a, in_a, destination=(-1,))
+        return _write_out(_tensordot_diag(b, a, in_a, destination=(-1,)), out)
 
     _test_can_be_combined(a, b)
     nout_a = tuple(ii for ii in range(a.ndim_n) if ii not in nin_a)  # outgoing native legs
@@ -78,47 +91,79 @@ def tensordot(a, b, axes, conj=(0, 0)) -> yastn.Tensor:
     mfs_c = tuple(a.mfs[ii] for ii in range(a.ndim) if ii not in in_a) + tuple(b.mfs[ii] for ii in range(b.ndim) if ii not in in_b)
     hfs_c = tuple(a.hfs[ii] for ii in nout_a) + tuple(b.hfs[ii] for ii in nout_b)
 
+    policy = a.config.tensordot_policy
+    if policy not in ('fuse_to_matrix', 'no_fuse', 'auto'):
+        raise YastnError("tensordot_policy should be 'fuse_to_matrix', 'no_fuse', or 'auto'.")
+    if policy != 'fuse_to_matrix' and not needs_mask:
+        meta_nf = _meta_tensordot_nofuse(a.config, a.struct, a.slices, b.struct, b.slices, nin_a, nin_b, nout_a, nout_b, policy)
+        if meta_nf is not None:
+            meta_dot, struct_c, slices_c = meta_nf
+            order_a, order_b = nout_a + nin_a, nin_b + nout_b
+            if out is not None and (out.struct != struct_c or out.slices != slices_c):
+                raise YastnError('out does not match the structure of the result.')
+            data = a.config.backend.dot_nomerge(a._data, b._data, order_a, order_b, meta_dot, struct_c.size,
+                                                out=None if out is None else out._data)
+            return _write_out(a._replace(data=data, struct=struct_c, slices=slices_c, mfs=mfs_c, hfs=hfs_c), out)
+
     ind_a, ind_b = _common_inds(a.struct.t, b.struct.t, nin_a, nin_b, a.ndim_n, b.ndim_n, a.config.sym.NSYM)
 
     data_a, struct_a, slices_a, ls_l, ls_ac = _merge_to_matrix(a, (nout_a, nin_a), ind_a)
     data_b, struct_b, slices_b, ls_bc, ls_r = _merge_to_matrix(b, (nin_b, nout_b), ind_b)
 
     meta_dot, struct_c, slices_c = _meta_tensordot(a.config, struct_a, slices_a, struct_b, slices_b)
+    meta_unmerge, struct_u, slices_u = _meta_unmerge_matrix(a.config, struct_c, slices_c, ls_l, ls_r, s_c)
+    if out is not None and (out.struct != struct_u or out.slices != slices_u):
+        raise YastnError('out does not match the structure of the result.')
+    skip_unmerge = _no_change_in_unmerge(meta_unmerge)
+    out_dot = out._data if (out is not None and skip_unmerge) else None
 
     if needs_mask:
         msk_a, msk_b = _masks_for_tensordot(a.config, a.struct, a.hfs, nin_a, ls_ac, b.struct, b.hfs, nin_b, ls_bc)
-        data = a.config.backend.dot_with_mask(data_a, data_b, meta_dot, struct_c.size, msk_a, msk_b)
+        if a.config.batched_dot:
+            data = a.config.backend.dot_with_mask_batched(data_a, data_b, meta_dot, struct_c.size, msk_a, msk_b)
+        else:
+            data = a.config.backend.dot_with_mask(data_a, data_b, meta_dot, struct_c.size, msk_a, msk_b)
     else:
         if ls_ac != ls_bc:
             raise YastnError('Bond dimensions do not match.')
-        data = a.config.backend.dot(data_a, data_b, meta_dot, struct_c.size)
+        if a.config.batched_dot:
+            data = a.config.backend.dot_batched(data_a, data_b, meta_dot, struct_c.size, out=out_dot)
+        elif out_dot is not None:
+            data = a.config.backend.dot(data_a, data_b, meta_dot, struct_c.size, out=out_dot)
+        else:
+            data = a.config.backend.dot(data_a, data_b, meta_dot, struct_c.size)
+
+    if not skip_unmerge:
+        data = a.config.backend.unmerge(data, meta_unmerge) if out is None else \
+               a.config.backend.unmerge(data, meta_unmerge, out=out._data)
+    return _write_out(a._replace(data=data, struct=struct_u, slices=slices_u, mfs=mfs_c, hfs=hfs_c), out)
+
 
-    meta_unmerge, struct_c, slices_c = _meta_unmerge_matrix(a.config, struct_c, slices_c, ls_l, ls_r, s_c)
-    data = _unmerge(a.config, data, meta_unmerge)
-    return a._replace(data=data, struct=struct_c, slices=slices_c, mfs=mfs_c, hfs=hfs_c)
+def _write_out(c, out):
+    """ Place result c in tensor out; without out, zero blocks of c can be pruned following config. """
+    if out is None:
+        return _prune_zero_blocks(c)
+    if out.struct != c.struct or out.slices != c.slices:
+        raise YastnError('out does not match the structure of the result.')
+    out._data, out.mfs, out.hfs = c._data, c.mfs, c.hfs
+    return out
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _common_inds(t_a, t_b, nin_a, nin_b, ndimn_a, ndimn_b, nsym):
     """ Return row indices of nparray a that are in b, and vice versa.  Outputs tuples."""
-    t_a = np.array(t_a, dtype=np.int64).reshape((len(t_a), ndimn_a, nsym))
-    t_b = np.array(t_b, dtype=np.int64).reshape((len(t_b), ndimn_b, nsym))
-    t_a = t_a[:, nin_a, :].reshape(len(t_a), len(nin_a) * nsym).tolist()
-    t_b = t_b[:, nin_b, :].reshape(len(t_b), len(nin_b) * nsym).tolist()
-    la = [tuple(x) for x in t_a]
-    lb = [tuple(x) for x in t_b]
-    sa = set(la)
-    sb = set(lb)
-    ia = tuple(ii for ii, el in enumerate(la) if el in sb)
-    ib = tuple(ii for ii, el in enumerate(lb) if el in sa)
-    if len(ia) == len(la):
-        ia = None
-    if len(ib) == len(lb):
-        ib = None
+    na, nb = len(t_a), len(t_b)
+    t_a = np.array(t_a, dtype=np.int64).reshape((na, ndimn_a, nsym))[:, nin_a, :].reshape(na, len(nin_a) * nsym)
+    t_b = np.array(t_b, dtype=np.int64).reshape((nb, ndimn_b, nsym))[:, nin_b, :].reshape(nb, len(nin_b) * nsym)
+    _, _, inv = _unique_rows(np.vstack([t_a, t_b]))
+    ia = np.flatnonzero(np.isin(inv[:na], inv[na:]))
+    ib = np.flatnonzero(np.isin(inv[na:], inv[:na]))
+    ia = None if len(ia) == na else tuple(ia.tolist())
+    ib = None if len(ib) == nb else tuple(ib.tolist())
     return ia, ib
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_tensordot(config, struct_a, slices_a, struct_b, slices_b):
     nsym = len(struct_a.n)
     n_c = np.array(struct_a.n + struct_b.n, dtype=np.int64).reshape((1, 2, nsym))
@@ -137,9 +182,117 @@ def _meta_tensordot(config, struct_a, slices_a, struct_b, slices_b):
     meta = tuple((sl.slcs[0], *mt[1:]) for sl, mt in zip(slices_c, meta))
     s_c = (struct_a.s[0], struct_b.s[1])
     struct_c = _struct(s=s_c, n=n_c, t=t_c, D=D_c, size=sum(Dp_c))
+    if config.batched_dot:
+        meta = _meta_dot_batched(meta)
     return meta, struct_c, slices_c
 
 
+def _meta_dot_batched(meta_dot):
+    """
+    Group blocks in meta_dot that have identical shapes (Da, Db),
+    to be multiplied by a single batched matmul in the backend.
+    For each group, collects the offsets of blocks in the 1D data of c, a and b,
+    and the contracted charges of a and b (used to pick masks).
+    """
+    groups = {}
+    for (slc, Dc, sla, Da, slb, Db, ia, ib) in meta_dot:
+        groups.setdefault((Dc, Da, Db), []).append((slc[0], sla[0], slb[0], ia, ib))
+    return tuple((Dc, Da, Db, *zip(*gr)) for (Dc, Da, Db), gr in groups.items())
+
+
+# Relative costs used to choose between tensordot policies, expressed in units of
+# a single copied element. They are rough estimates for a dispatch of a small kernel
+# from Python and for a single multiply-add in BLAS.
+_COST_CALL = 2000
+_COST_FLOP = 0.25
+
+
+@_interned_cache(maxsize=1024)
+def _meta_tensordot_nofuse(config, struct_a, slices_a, struct_b, slices_b, nin_a, nin_b, nout_a, nout_b, policy):
+    """
+    Meta-information for contracting pairs of native blocks of a and b directly,
+    without merging the tensors into block-matrices.
+
+    The structure of the result is identical to the one produced by ``'fuse_to_matrix'`` policy;
+    in particular, zero blocks appearing after merging are kept.
+    For policy ``'auto'``, returns ``None`` if the estimated cost is higher than the one of
+    merging to matrices followed by matrix multiplication.
+    """
+    nsym = len(struct_a.n)
+    ta = np.array(struct_a.t, dtype=np.int64).reshape((len(struct_a.t), len(struct_a.s), nsym))
+    tb = np.array(struct_b.t, dtype=np.int64).reshape((len(struct_b.t), len(struct_b.s), nsym))
+    s_in = tuple(struct_a.s[ii] for ii in nin_a)
+    qa = config.sym.fuse(ta[:, nin_a, :], s_in, 1).tolist()
+    ta_in = ta[:, nin_a, :].reshape(len(ta), -1).tolist()
+    tb_in = tb[:, nin_b, :].reshape(len(tb), -1).tolist()
+    ta_out = ta[:, nout_a, :].reshape(len(ta), -1).tolist()
+    tb_out = tb[:, nout_b, :].reshape(len(tb), -1).tolist()
+
+    blocks_b = {}
+    for tin, tout, D, sl in zip(tb_in, tb_out, struct_b.D, slices_b):
+        Din = tuple(D[ii] for ii in nin_b)
+        Dout = tuple(D[ii] for ii in nout_b)
+        blocks_b.setdefault(tuple(tin), []).append((tuple(tout), Din, Dout, sl))
+
+    # rows[q] and cols[q] collect outgoing charges of a and b, that would form
+    # the rows and columns of the block-matrix with the contracted charge q after merging.
+    rows, cols, pairs, Dins = {}, {}, {}, {}
+    nblocks = 0
+    for tin, tout, q, D, sl in zip(ta_in, ta_out, qa, struct_a.D, slices_a):
+        tin, tout, q = tuple(tin), tuple(tout), tuple(q)
+        if tin not in blocks_b:
+            continue
+        Din = tuple(D[ii] for ii in nin_a)
+        Dout = tuple(D[ii] for ii in nout_a)
+        Dinp = int(np.prod(Din, dtype=np.int64))
+        nblocks += 1
+        rows.setdefault(q, {})[tout] = Dout
+        Dins.setdefault(q, {})[tin] = Dinp
+        for tbout, Dbin, Dbout, slb in blocks_b[tin]:
+            if Din != Dbin:
+                raise YastnError('Bond dimensions do not match.')
+            cols.setdefault(q, {})[tbout] = Dbout
+            pairs.setdefault(tout + tbout, []).append((sl.slcs[0], sl.D, (sl.Dp // Dinp, Dinp),
+                                                       slb.slcs[0], slb.D, (Dinp, slb.Dp // Dinp)))
+
+    meta = sorted((t1 + t2, D1 + D2) for q in rows for t1, D1 in rows[q].items() for t2, D2 in cols[q].items())
+    t_c = tuple(x[0] for x in meta)
+    D_c = tuple(x[1] for x in meta)
+    Dp_c = tuple(int(np.prod(D, dtype=np.int64)) for D in D_c)
+    slices_c = tuple(_slc(((stop - dp, stop),), ds, dp) for stop, dp, ds in zip(accumulate(Dp_c), Dp_c, D_c))
+    s_c = tuple(struct_a.s[ii] for ii in nout_a) + tuple(struct_b.s[ii] for ii in nout_b)
+    n_c = np.array(struct_a.n + struct_b.n, dtype=np.int64).reshape((1, 2, nsym))
+    n_c = tuple(config.sym.fuse(n_c, (1, 1), 1).reshape(nsym).tolist())
+    struct_c = _struct(s=s_c, n=n_c, t=t_c, D=D_c, size=sum(Dp_c))
+
+    nout = len(nout_a)
+    meta_dot = []
+    for t, D, sl in zip(t_c, D_c, slices_c):
+        Dc = (int(np.prod(D[:nout], dtype=np.int64)), int(np.prod(D[nout:], dtype=np.int64)))
+        meta_dot.append((sl.slcs[0], Dc, tuple(pairs.get(t, ()))))
+    meta_dot = tuple(meta_dot)
+
+    if policy == 'auto':
+        # estimated cost of merging to block-matrices, matrix multiplication, and unmerging
+        Dl = {q: sum(np.prod(D, dtype=np.int64) for D in rows[q].values()) for q in rows}
+        Dr = {q: sum(np.prod(D, dtype=np.int64) for D in cols[q].values()) for q in rows}
+        Dm = {q: sum(Dins[q].values()) for q in rows}
+        nblocks += sum(len(blocks_b[tin]) for q in Dins for tin in Dins[q])
+        cost_fuse = _COST_CALL * (nblocks + len(rows) + len(meta_dot)) + 3 * struct_c.size + \
+                    sum(2 * (Dl[q] + Dr[q]) * Dm[q] + _COST_FLOP * Dl[q] * Dm[q] * Dr[q] for q in rows)
+        # estimated cost of contracting native blocks directly
+        copy_a = nout_a + nin_a != tuple(range(len(struct_a.s)))
+        copy_b = nin_b + nout_b != tuple(range(len(struct_b.s)))
+        cost_nofuse = struct_c.size
+        for _, Dc, prs in meta_dot:
+            for (_, _, Dam, _, _, Dbm) in prs:
+                cost_nofuse += _COST_CALL * 3 + copy_a * Dam[0] * Dam[1] + copy_b * Dbm[0] * Dbm[1] + \
+                               2 * Dc[0] * Dc[1] + _COST_FLOP * Dam[0] * Dam[1] * Dbm[1]
+        if cost_nofuse >= cost_fuse:
+            return None
+    return meta_dot, struct_c, slices_c
+
+
 def _tensordot_diag(a, b, in_b, destination):
     """ executes broadcast and then transpose into order expected by tensordot. """
     if len(in_b) == 1:
@@ -190,6 +343,92 @@ def broadcast(a, *args, axes=0) -> yastn.Tensor | iterable[yastn.Tensor]:
     return results if multiple_axes else results.pop()
 
 
+def broadcast_legs(a, *diags, axes) -> yastn.Tensor:
+    r"""
+    Multiply several legs of tensor `a` by diagonal tensors in a single pass over its data.
+
+    Equivalent to consecutive :meth:`yastn.broadcast` of each diagonal tensor with `a`, i.e.,
+    ``broadcast_legs(a, S0, S1, axes=(0, 2))`` gives ``S1.broadcast(S0.broadcast(a, axes=0), axes=2)``,
+    without allocating intermediate tensors.
+
+    Parameters
+    ----------
+    a: yastn.Tensor
+        tensor with legs to be multiplied.
+
+    diags: yastn.Tensor
+        diagonal tensors.
+
+    axes: Sequence[int]
+        different legs of `a` multiplied by consecutive diagonal tensors.
+    """
+    data, struct, slices = _broadcast_legs(a, diags, axes, in_place=False)
+    return a._replace(struct=struct, slices=slices, data=data)
+
+
+def broadcast_legs_(a, *diags, axes) -> yastn.Tensor:
+    r"""
+    In-place version of :meth:`yastn.broadcast_legs`, returning updated ``a``.
+
+    The data of ``a`` is overwritten without allocating new memory if no blocks are removed,
+    and the data type of ``a`` can hold the result.
+    """
+    a._data, a.struct, a.slices = _broadcast_legs(a, diags, axes, in_place=True)
+    return a
+
+
+def _broadcast_legs(a, diags, axes, in_place):
+    axes = tuple(axes) if hasattr(axes, '__iter__') else (axes,)
+    if len(axes) != len(diags):
+        raise YastnError("There should be exactly one axis for each diagonal tensor.")
+    if a.isdiag:
+        raise YastnError("Tensor with legs to be multiplied cannot be diagonal; use broadcast.")
+    uaxes = []
+    for d, ax in zip(diags, axes):
+        _test_can_be_combined(d, a)
+        ax = _broadcast_input(ax, a.mfs, d.isdiag)
+        if a.hfs[ax].tree != (1,):
+            raise YastnError('Second tensor`s leg specified in axes cannot be fused.')
+        uaxes.append(ax)
+    uaxes = tuple(uaxes)
+    if len(set(uaxes)) != len(uaxes):
+        raise YastnError("Repeated axis in axes.")
+    meta, struct, slices = _meta_broadcast_legs(a.struct, a.slices, tuple(d.struct for d in diags),
+                                                tuple(d.slices for d in diags), uaxes)
+    out = a._data if (in_place and len(struct.t) == len(a.struct.t)) else None  # no blocks removed
+    if out is not None:
+        _materialize_readers(out, a.config.backend)
+    data = a.config.backend.dot_diags(tuple(d._data for d in diags), a._data, meta, struct.size, uaxes, a.ndim_n, out=out)
+    return data, struct, slices
+
+
+@_interned_cache(maxsize=1024)
+def _meta_broadcast_legs(b_struct, b_slices, a_structs, a_slices, axes):
+    """ meta information for backend, and new tensor structure for broadcast_legs """
+    nsym = len(b_struct.n)
+    sl_as = [{x[:nsym]: sl.slcs[0] for x, sl in zip(st.t, sls)} for st, sls in zip(a_structs, a_slices)]
+    meta = []
+    for tb, slb, Db in zip(b_struct.t, b_slices, b_struct.D):
+        slas = tuple(sl_a.get(tb[ax * nsym: (ax + 1) * nsym]) for sl_a, ax in zip(sl_as, axes))
+        if all(sla is not None for sla in slas):
+            if any(Db[ax] != sla[1] - sla[0] for sla, ax in zip(slas, axes)):
+                raise YastnError("Bond dimensions do not match.")
+            meta.append((tb, slb, Db, slas))
+
+    if len(meta) < len(b_struct.t):
+        c_t = tuple(mt[0] for mt in meta)
+        c_D = tuple(mt[2] for mt in meta)
+        c_Dp = tuple(mt[1].Dp for mt in meta)
+        c_slices = tuple(_slc(((stop - dp, stop),), ds, dp) for stop, dp, ds in zip(accumulate(c_Dp), c_Dp, c_D))
+        c_struct = b_struct._replace(t=c_t, D=c_D, size=sum(c_Dp))
+    else:
+        c_struct = b_struct
+        c_slices = b_slices
+
+    meta = tuple((sln.slcs[0], slb.slcs[0], Db, slas) for (_, slb, Db, slas), sln in zip(meta, c_slices))
+    return meta, c_struct, c_slices
+
+
 def _broadcast_input(axis, mf, isdiag):
     if not isdiag:
         raise YastnError('First tensor should be diagonal.')
@@ -200,7 +439,7 @@ def _broadcast_input(axis, mf, isdiag):
     return axis
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_broadcast(b_struct, b_slices, a_struct, a_slices, axis):
     """ meta information for backend, and new tensor structure for brodcast """
     nsym = len(a_struct.n)
@@ -269,7 +508,7 @@ def apply_mask(a, *args, axes=0) -> yastn.Tensor | iterable[yastn.Tensor]:
     return results.pop() if len(results) == 1 else results
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_mask(a_struct, a_slices, a_isdiag, b_struct, b_slices, Dbnew, axis):
     """ meta information for backend, and new tensor structure for mask."""
     nsym = len(a_struct.n)
@@ -311,12 +550,12 @@ def vdot(a, b, conj=(1, 0)) -> number:
     """
     _test_can_be_combined(a, b)
     if conj[0] == 1:
-        a = a.conj()
+        a = _conj(a, lazy=True)
     if conj[1] == 1:
-        b = b.conj()
+        b = _conj(b, lazy=True)
     needs_mask, _ = _test_axes_match(a, b, sgn=-1)
+    (Adata, conj_a), (Bdata, conj_b) = _data_and_conj(a), _data_and_conj(b)
     if a.struct.t == b.struct.t and a.slices == b.slices:
-        Adata, Bdata = a._data, b._data
         struct_a, slices_a = a.struct, a.slices
         struct_b, slices_b = b.struct, b.slices
     else:
@@ -343,8 +582,8 @@ def vdot(a, b, conj=(1, 0)) -> number:
         struct_b = b.struct._replace(t=tuple(tb), D=tuple(Db), size=sum(Dpb))
         slices_a = tuple(_slc((x,), y, z) for x, y, z in zip(sla, Da, Dpa))
         slices_b = tuple(_slc((x,), y, z) for x, y, z in zip(slb, Db, Dpb))
-        Adata = a.config.backend.apply_slice(a._data, sla, inter_sla)
-        Bdata = b.config.backend.apply_slice(b._data, slb, inter_slb)
+        Adata = a.config.backend.apply_slice(Adata, sla, inter_sla)
+        Bdata = b.config.backend.apply_slice(Bdata, slb, inter_slb)
     if needs_mask:
         msk_a, msk_b, struct_a, slices_a, struct_b, slices_b = _masks_for_vdot(a.config, struct_a, slices_a, a.hfs, struct_b, slices_b, b.hfs)
         Adata = Adata[msk_a]
@@ -355,10 +594,20 @@ def vdot(a, b, conj=(1, 0)) -> number:
     c_n = np.array(a.struct.n + b.struct.n, dtype=np.int64).reshape((1, 2, a.config.sym.NSYM))
     c_n = tuple(a.config.sym.fuse(c_n, (1, 1), 1).ravel().tolist())
     if len(struct_a.D) > 0 and c_n == a.config.sym.zero():
-        return a.config.backend.vdot(Adata, Bdata)
+        if a.config.mixed_precision:  # accumulate in double precision
+            Adata, Bdata = _promote(a, Adata), _promote(b, Bdata)
+        return a.config.backend.vdot(Adata, Bdata, conj=(conj_a, conj_b))
     return a.zero_of_dtype()
 
 
+def _data_and_conj(a):
+    """ Data of a and whether it should be conjugated, keeping pending conjugation of blocks. """
+    data = _data_or_pending(a)
+    if type(data) is _PendingData and data.axes is None:
+        return data.data, data.conj
+    return a._data, False
+
+
 def trace(a, axes=(0, 1)) -> yastn.Tensor:
     """
     Compute trace of legs specified by axes.
@@ -400,7 +649,7 @@ def trace(a, axes=(0, 1)) -> yastn.Tensor:
 
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_trace(struct, slices, in1, in2, out):
     """ meta-information for backend and struct of traced tensor. """
     lt, nsym = len(struct.t), len(struct.n)
@@ -485,7 +734,7 @@ def swap_gate(a, axes, charge=None) -> yastn.Tensor:
     return c
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_swap_gate(t, mf, ndim, nsym, axes, fss):
     """ calculate which blocks to negate. """
     axes = _unpack_axes(mf, *axes)
@@ -504,7 +753,7 @@ def _meta_swap_gate(t, mf, ndim, nsym, axes, fss):
     return tuple((tp % 2).tolist())
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_swap_gate_charge(t, charge, mf, ndim, nsym, axes, fss):
     """ calculate which blocks to negate. """
     axes, = _unpack_axes(mf, axes)
@@ -518,7 +767,7 @@ def _meta_swap_gate_charge(t, charge, mf, ndim, nsym, axes, fss):
     return tuple(fp.tolist())
 
 
-def einsum(subscripts, *operands, order='Alphabetic') -> yastn.Tensor:
+def einsum(subscripts, *operands, order='Alphabetic', optimize=None) -> yastn.Tensor:
     """
     Execute series of tensor contractions.
 
@@ -535,6 +784,10 @@ def einsum(subscripts, *operands, order='Alphabetic') -> yastn.Tensor:
         Specify order in which repeated indices from subscipt are contracted.
         By default, follows alphabetic order.
 
+    optimize: None | str
+        Select the order of contractions based on the block-sparse structure of operands,
+        see :meth:`yastn.ncon`. Overrides `order`.
+
     Example
     -------
 
@@ -596,10 +849,10 @@ def einsum(subscripts, *operands, order='Alphabetic') -> yastn.Tensor:
         raise YastnError('order does not cover all contracted indices')
     inds = [tuple(d[v] for v in ss) for ss in sin.split(',')]
     ts = list(operands)
-    return ncon(ts, inds, conjs)
+    return ncon(ts, inds, conjs, optimize=optimize)
 
 
-def ncon(ts, inds, conjs=None) -> yastn.Tensor:
+def ncon(ts, inds, conjs=None, optimize=None) -> yastn.Tensor:
     """
     Execute series of tensor contractions.
 
@@ -619,6 +872,11 @@ def ncon(ts, inds, conjs=None) -> yastn.Tensor:
         For each tensor in `ts` contains either 0 or 1.
         If the value is 1, the tensor is conjugated.
 
+    optimize: None | str
+        If ``'greedy'`` or ``'optimal'``, the order of contractions is selected
+        based on the block-sparse structure of the tensors, ignoring the values of positive labels,
+        see :meth:`yastn.ncon_path`. The selected order is cached. Default is ``None``.
+
     Note
     ----
     :meth:`yastn.ncon` and :meth:`yastn.einsum` differ only by syntax.
@@ -636,15 +894,9 @@ def ncon(ts, inds, conjs=None) -> yastn.Tensor:
 
         yastn.ncon([a, b], ((-0, -2), (-1, -3)))
     """
-    if len(ts) != len(inds):
-        raise YastnError('Number of tensors and indices do not match.')
-    for tensor, ind in zip(ts, inds):
-        if tensor.ndim != len(ind):
-            raise YastnError('Number of legs of one of the tensors do not match provided indices.')
-
-    inds = tuple(_clear_axes(*inds))
-    if conjs is not None:
-        conjs = tuple(conjs)
+    inds, conjs = _ncon_input(ts, inds, conjs)
+    if optimize is not None:
+        inds = _meta_ncon_path(inds, conjs, tuple((t.config.sym, t.struct, t.mfs) for t in ts), optimize)[0]
 
     meta_tr, meta_dot, meta_transpose = _meta_ncon(inds, conjs)
     ts = dict(enumerate(ts))
@@ -661,7 +913,7 @@ def ncon(ts, inds, conjs=None) -> yastn.Tensor:
     return ts[t].conj() if to_conj else ts[t]
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_ncon(inds, conjs):
     """ turning information in inds and conjs into list of contraction commands """
     if not all(-256 < x < 256 for x in _flatten(inds)):
@@ -731,3 +983,230 @@ def _consume_edges(edges, conjs):
         axes = None
     meta_transpose = (t1, axes, conjs[t1])
     return tuple(meta_tr), tuple(meta_dot), meta_transpose
+
+
+def ncon_path(ts, inds, conjs=None, optimize=None) -> dict:
+    """
+    Estimate the cost of contracting a network with :meth:`yastn.ncon`, optionally optimizing the order of pairwise contractions.
+
+    The estimates employ the block-sparse structure of the tensors in `ts`,
+    i.e., the charge sectors and their dimensions on each leg.
+    Intermediate tensors are assumed to have all blocks allowed by the symmetry.
+
+    Parameters
+    ----------
+    ts, inds, conjs:
+        as in :meth:`yastn.ncon`
+
+    optimize: None | str
+        If ``None``, the cost of contracting legs in the order of ascending labels in `inds` is estimated.
+        ``'greedy'`` iteratively selects the pair of tensors which contraction reduces the memory the most.
+        ``'optimal'`` finds the order of contractions minimizing the number of operations by exhaustive search;
+        it falls back to ``'greedy'`` for networks of more than 8 tensors.
+
+    Returns
+    -------
+    dict
+        ``'inds'`` with new labels of contracted legs, that can be provided to :meth:`yastn.ncon`
+        to execute the selected order of contractions;
+        ``'path'`` with a sequence of contracted pairs of tensors,
+        where the result of contracting tensors ``(i, j)``, ``i < j``, takes the position ``i``;
+        ``'flops'`` with the estimated number of multiply-add operations;
+        ``'peak_memory'`` with the estimated maximal number of elements stored in all tensors at any stage.
+    """
+    inds, conjs = _ncon_input(ts, inds, conjs)
+    inds, path, flops, peak = _meta_ncon_path(inds, conjs, tuple((t.config.sym, t.struct, t.mfs) for t in ts), optimize)
+    return {'inds': inds, 'path': path, 'flops': flops, 'peak_memory': peak}
+
+
+@_interned_cache(maxsize=1024)
+def _meta_ncon_path(inds, conjs, structs, optimize):
+    """ Selects the order of contractions and estimates its cost. """
+    sym = structs[0][0]
+    nodes = [_ncon_node(sym, struct, mfs, ind, cj) for (_, struct, mfs), ind, cj
+             in zip(structs, inds, conjs or (0,) * len(inds))]
+    if optimize not in (None, 'greedy', 'optimal'):
+        raise YastnError("optimize should be None, 'greedy', or 'optimal'.")
+    if optimize is not None:
+        traced = [_ncon_trace(sym, node) for node in nodes]
+        if optimize == 'optimal' and len(nodes) <= 8:
+            path = _ncon_path_optimal(sym, traced)
+        else:
+            path = _ncon_path_greedy(sym, traced)
+        inds = _ncon_relabel(inds, path)
+    meta_tr, meta_dot, _ = _meta_ncon(inds, conjs)
+
+    sizes = {ii: struct.size for ii, (_, struct, _) in enumerate(structs)}
+    flops, peak = 0, sum(sizes.values())
+    for ii, _ in meta_tr:
+        nodes[ii] = _ncon_trace(sym, nodes[ii])
+        size = _ncon_size(sym, nodes[ii])
+        peak = max(peak, sum(sizes.values()) + size)
+        sizes[ii] = size
+    for (t1, t2), _, _ in meta_dot:
+        fl, size, nodes[t1] = _ncon_pair(sym, nodes[t1], nodes[t2])
+        flops += fl
+        peak = max(peak, sum(sizes.values()) + size)
+        sizes[t1] = size
+        del sizes[t2]
+    return inds, tuple(x[0] for x in meta_dot), flops, peak
+
+
+def _ncon_input(ts, inds, conjs):
+    """ Test and clear input of ncon. """
+    if len(ts) != len(inds):
+        raise YastnError('Number of tensors and indices do not match.')
+    for tensor, ind in zip(ts, inds):
+        if tensor.ndim != len(ind):
+            raise YastnError('Number of legs of one of the tensors do not match provided indices.')
+    inds = tuple(_clear_axes(*inds))
+    if conjs is not None:
+        conjs = tuple(conjs)
+    return inds, conjs
+
+
+def _ncon_node(sym, struct, mfs, ind, conj):
+    """
+    Legs of a tensor in the network, as a list of (label, signature, {charge: dimension}) for each native leg,
+    and the tensor charge.
+    """
+    _, _, tD_dict = _get_tD_legs(struct)
+    sgn = -1 if conj else 1
+    legs = []
+    for label, axes in zip(ind, _unpack_axes(mfs, *((ii,) for ii in range(len(mfs))))):
+        legs.extend((label, sgn * struct.s[ax], tD_dict[ax]) for ax in axes)
+    n = _ncon_fuse_charges(sym, struct.n, (), sgn)
+    return legs, n
+
+
+def _ncon_fuse_charges(sym, q1, q2, s2):
+    """ fuse two charges, with signature of the second one given by s2; q2=() is treated as zero charge. """
+    if q2 == ():
+        return tuple(sym.fuse(np.array([[q1]], dtype=np.int64), (s2,), 1).ravel().tolist())
+    return tuple(sym.fuse(np.array([[q1, q2]], dtype=np.int64), (1, s2), 1).ravel().tolist())
+
+
+def _ncon_dist(sym, legs):
+    """ For legs fused together, dimension of each fused charge sector. """
+    dist = {sym.zero(): 1}
+    for _, s, tD in legs:
+        new = {}
+        for q, d in dist.items():
+            for t, D in tD.items():
+                qn = _ncon_fuse_charges(sym, q, t, s)
+                new[qn] = new.get(qn, 0) + d * D
+        dist = new
+    return dist
+
+
+def _ncon_size(sym, node):
+    """ Number of elements in a tensor, assuming that all allowed blocks are present. """
+    legs, n = node
+    return _ncon_dist(sym, legs).get(n, 0)
+
+
+def _ncon_trace(sym, node):
+    """ Remove legs traced within a single tensor. """
+    legs, n = node
+    labels = [x[0] for x in legs]
+    return [x for x in legs if x[0] <= 0 or labels.count(x[0]) == 1], n
+
+
+def _ncon_pair(sym, node1, node2):
+    """ Number of multiply-add operations and size of the result of contracting two tensors. """
+    legs1, n1 = node1
+    legs2, n2 = node2
+    con = set(x[0] for x in legs1 if x[0] > 0) & set(x[0] for x in legs2 if x[0] > 0)
+    out1 = [x for x in legs1 if x[0] not in con]
+    out2 = [x for x in legs2 if x[0] not in con]
+    in1 = sorted((x for x in legs1 if x[0] in con), key=lambda x: x[0])
+    in2 = sorted((x for x in legs2 if x[0] in con), key=lambda x: x[0])
+    inc = [(l1, s1, {t: D for t, D in tD1.items() if t in tD2}) for (l1, s1, tD1), (_, _, tD2) in zip(in1, in2)]
+    d1, d2, dc = _ncon_dist(sym, out1), _ncon_dist(sym, out2), _ncon_dist(sym, inc)
+    flops, size = 0, 0
+    for qc, dim in dc.items():
+        rows = d1.get(_ncon_fuse_charges(sym, n1, qc, -1), 0)
+        cols = d2.get(_ncon_fuse_charges(sym, n2, qc, 1), 0)
+        flops += rows * dim * cols
+        size += rows * cols
+    return flops, size, (out1 + out2, _ncon_fuse_charges(sym, n1, n2, 1))
+
+
+def _ncon_connected(node1, node2):
+    return any(l1 > 0 and l1 == l2 for l1, _, _ in node1[0] for l2, _, _ in node2[0])
+
+
+def _ncon_path_greedy(sym, nodes):
+    """
+    Contract pairs of connected tensors that lead to the largest decrease of memory,
+    and then the smallest number of operations.
+    """
+    nodes = dict(enumerate(nodes))
+    sizes = {ii: _ncon_size(sym, node) for ii, node in nodes.items()}
+    path = []
+    while True:
+        best = None
+        for i1 in nodes:
+            for i2 in nodes:
+                if i1 < i2 and _ncon_connected(nodes[i1], nodes[i2]):
+                    flops, size, node = _ncon_pair(sym, nodes[i1], nodes[i2])
+                    cost = (size - sizes[i1] - sizes[i2], flops)
+                    if best is None or cost < best[0]:
+                        best = (cost, i1, i2, size, node)
+        if best is None:
+            return tuple(path)
+        _, i1, i2, sizes[i1], nodes[i1] = best
+        del nodes[i2], sizes[i2]
+        path.append((i1, i2))
+
+
+def _ncon_path_optimal(sym, nodes):
+    """
+    Exhaustive search over contractions of connected subsets of tensors, minimizing the number of operations.
+    Disconnected parts of the network are contracted separately.
+    """
+    n = len(nodes)
+    best = {1 << ii: (0, node, ()) for ii, node in enumerate(nodes)}  # subset: (flops, node, path)
+    for subset in range(1, 1 << n):
+        if subset in best:
+            continue
+        low = subset & -subset
+        sub1 = (subset - 1) & subset
+        while sub1:
+            sub2 = subset ^ sub1
+            if sub1 & low and sub2 and sub1 in best and sub2 in best:
+                fl1, node1, path1 = best[sub1]
+                fl2, node2, path2 = best[sub2]
+                if _ncon_connected(node1, node2):
+                    flops, _, node = _ncon_pair(sym, node1, node2)
+                    flops += fl1 + fl2
+                    if subset not in best or flops < best[subset][0]:
+                        pair = (low.bit_length() - 1, (sub2 & -sub2).bit_length() - 1)
+                        best[subset] = (flops, node, path1 + path2 + (pair,))
+            sub1 = (sub1 - 1) & subset
+    path, left = (), (1 << n) - 1
+    while left:  # largest connected components
+        subset = max((x for x in best if x & left == x), key=lambda x: (bin(x).count('1'), -x))
+        path += best[subset][2]
+        left ^= subset
+    return path
+
+
+def _ncon_relabel(inds, path):
+    """ New positive labels, such that ascending order of labels follows the path. """
+    new, label = {}, 1
+    for ten, ind in enumerate(inds):  # traces first
+        for x in ind:
+            if x > 0 and ind.count(x) == 2 and (ten, x) not in new:
+                new[ten, x] = label
+                label += 1
+    members = {ii: [ii] for ii in range(len(inds))}
+    for t1, t2 in path:
+        shared = sorted(set(x for ii in members[t1] for x in inds[ii] if x > 0) &
+                        set(x for ii in members[t2] for x in inds[ii] if x > 0))
+        for x in shared:
+            new[x] = label
+            label += 1
+        members[t1] += members.pop(t2)
+    return tuple(tuple(x if x <= 0 else new.get((ten, x), new.get(x, x)) for x in ind)
+                 for ten, ind in enumerate(inds))
@@ -13,61 +13,130 @@
 # limitations under the License.
 # ==============================================================================
 """ Dynamical changing of lru_cache maxsize. """
-from functools import lru_cache
-from . import _merging, _contractions
+import os
+from ..backend import _gather
+from . import _merging, _contractions, _cache, linalg
+from ._tests import YastnError
 
 
-__all__ = ['set_cache_maxsize', 'get_cache_info', 'clear_cache']
+__all__ = ['set_cache_maxsize', 'set_cache_maxbytes', 'get_cache_info', 'clear_cache', 'save_cache', 'load_cache']
+
+
+def _caches():
+    return {"merge_to_matrix": _merging._meta_merge_to_matrix,
+            "unmerge_from_matrix": _merging._meta_unmerge_matrix,
+            "fuse_hard": _merging._meta_fuse_hard,
+            "unfuse_hard": _merging._meta_unfuse_hard,
+            "merge_pending": _merging._meta_merge_pending,
+            "transpose_pending": _merging._meta_transpose_pending,
+            "intersect_hfs": _merging._intersect_hfs,
+            "combine_leg_structure": _merging._leg_structure_combine_charges_prod,
+            "tensordot_1": _contractions._meta_tensordot,
+            "tensordot_2": _contractions._common_inds,
+            "tensordot_nofuse": _contractions._meta_tensordot_nofuse,
+            "broadcast": _contractions._meta_broadcast,
+            "broadcast_legs": _contractions._meta_broadcast_legs,
+            "mask": _contractions._meta_mask,
+            "trace": _contractions._meta_trace,
+            "swap_gate": _contractions._meta_swap_gate,
+            "swap_gate_charge": _contractions._meta_swap_gate_charge,
+            "svd": linalg._meta_svd,
+            "truncation_mask": linalg._meta_truncation_mask,
+            "ncon": _contractions._meta_ncon,
+            "ncon_path": _contractions._meta_ncon_path,
+            "gather_merge": _gather.merge_index,
+            "gather_unmerge": _gather.unmerge_index}
 
 
 def set_cache_maxsize(maxsize=0):
     """Change maxsize of lru_cache to reuses some metadata."""
-    _contractions._meta_broadcast = lru_cache(maxsize)(_contractions._meta_broadcast.__wrapped__)
-    _contractions._meta_tensordot = lru_cache(maxsize)(_contractions._meta_tensordot.__wrapped__)
-    _contractions._meta_mask = lru_cache(maxsize)(_contractions._meta_mask.__wrapped__)
-    _contractions._common_inds = lru_cache(maxsize)(_contractions._common_inds.__wrapped__)
-    _contractions._meta_swap_gate = lru_cache(maxsize)(_contractions._meta_swap_gate.__wrapped__)
-    _contractions._meta_swap_gate_charge = lru_cache(maxsize)(_contractions._meta_swap_gate_charge.__wrapped__)
-    _contractions._meta_trace = lru_cache(maxsize)(_contractions._meta_trace.__wrapped__)
-    _contractions._meta_ncon = lru_cache(maxsize)(_contractions._meta_ncon.__wrapped__)
-    _merging._meta_merge_to_matrix = lru_cache(maxsize)(_merging._meta_merge_to_matrix.__wrapped__)
-    _merging._meta_unmerge_matrix = lru_cache(maxsize)(_merging._meta_unmerge_matrix.__wrapped__)
-    _merging._intersect_hfs = lru_cache(maxsize)(_merging._intersect_hfs.__wrapped__)
-    _merging._leg_structure_combine_charges_prod = lru_cache(maxsize)(_merging._leg_structure_combine_charges_prod.__wrapped__)
-    _merging._meta_fuse_hard = lru_cache(maxsize)(_merging._meta_fuse_hard.__wrapped__)
-    _merging._meta_unfuse_hard = lru_cache(maxsize)(_merging._meta_unfuse_hard.__wrapped__)
+    for cache in _caches().values():
+        cache.set_maxsize(maxsize)
+
+
+def set_cache_maxbytes(maxbytes=None, **budgets):
+    """
+    Limit the memory used by caches of metadata.
+
+    Memory of cached entries is estimated when they are computed.
+    If the total budget is exceeded, the least-recently used entries of all caches compete for eviction,
+    and the ones with the smallest number of hits per byte are removed first.
+    In this way, the budget adapts to the caches that are effectively reused.
+
+    Parameters
+    ----------
+    maxbytes: int | None
+        Total memory budget of all caches in bytes; ``None`` for no limit.
+
+    budgets: int | None
+        Budgets of individual caches, with names as in :meth:`yastn.get_cache_info`,
+        e.g., ``set_cache_maxbytes(2**30, merge_to_matrix=2**28)``.
+    """
+    caches = _caches()
+    for name in budgets:
+        if name not in caches:
+            raise YastnError(f"Unknown cache {name}; should be one of {tuple(caches)}.")
+    for name, nbytes in budgets.items():
+        caches[name].set_maxbytes(nbytes)
+    _cache._set_total_maxbytes(maxbytes)
 
 
 def clear_cache():
     """Change maxsize of lru_cache to reuses some metadata."""
-    _contractions._meta_broadcast.cache_clear()
-    _contractions._meta_tensordot.cache_clear()
-    _contractions._meta_mask.cache_clear()
-    _contractions._common_inds.cache_clear()
-    _contractions._meta_swap_gate.cache_clear()
-    _contractions._meta_swap_gate_charge.cache_clear()
-    _contractions._meta_trace.cache_clear()
-    _contractions._meta_ncon.cache_clear()
-    _merging._meta_merge_to_matrix.cache_clear()
-    _merging._meta_unmerge_matrix.cache_clear()
-    _merging._intersect_hfs.cache_clear()
-    _merging._leg_structure_combine_charges_prod.cache_clear()
-    _merging._meta_fuse_hard.cache_clear()
-    _merging._meta_unfuse_hard.cache_clear()
-
-
-def get_cache_info():
-    """Return statistics of lru_caches used in yastn."""
-    return {"merge_to_matrix": _merging._meta_merge_to_matrix.cache_info(),
-            "unmerge_from_matrix": _merging._meta_unmerge_matrix.cache_info(),
-            "fuse_hard": _merging._meta_fuse_hard.cache_info(),
-            "unfuse_hard": _merging._meta_unfuse_hard.cache_info(),
-            "intersect_hfs": _merging._intersect_hfs.cache_info(),
-            "combine_leg_structure": _merging._leg_structure_combine_charges_prod.cache_info(),
-            "tensordot_1": _contractions._meta_tensordot.cache_info(),
-            "tensordot_2": _contractions._common_inds.cache_info(),
-            "broadcast": _contractions._meta_broadcast.cache_info(),
-            "mask": _contractions._meta_mask.cache_info(),
-            "trace": _contractions._meta_trace.cache_info(),
-            "swap_gate": _contractions._meta_swap_gate.cache_info(),
-            "ncon": _contractions._meta_ncon.cache_info()}
+    for cache in _caches().values():
+        cache.cache_clear()
+
+
+def get_cache_info(detailed=False):
+    """
+    Return statistics of lru_caches used in yastn.
+
+    By default, each cache is described by a named tuple (hits, misses, maxsize, currsize).
+    For ``detailed=True``, it is extended to
+    (hits, misses, hit_rate, maxsize, currsize, nbytes, maxbytes, time),
+    where ``nbytes`` is the estimated memory of cached entries,
+    and ``time`` is the total time in seconds spent computing them.
+    """
+    if detailed:
+        return {name: cache.cache_stats() for name, cache in _caches().items()}
+    return {name: cache.cache_info() for name, cache in _caches().items()}
+
+
+def save_cache(path):
+    """
+    Save cached metadata to disk, to be reused by other runs with :meth:`yastn.load_cache`.
+
+    Entries of each cache are pickled to a separate file in a subdirectory of ``path`` specific to yastn version.
+    Entries are identified by the structures of tensors and by the symmetry and fusion settings of the config,
+    and do not depend on the backend. Entries that cannot be pickled are skipped.
+
+    Returns
+    -------
+    dict[str, int]
+        number of saved entries for each cache.
+    """
+    directory = _cache._cache_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    return {name: cache.save(os.path.join(directory, name + ".pkl")) for name, cache in _caches().items()}
+
+
+def load_cache(path):
+    """
+    Load metadata saved with :meth:`yastn.save_cache`.
+
+    Loaded entries are consulted on a cache miss, before computing the metadata,
+    and are moved to the cache when used. Entries saved by a different version of yastn,
+    or of the function computing them, are ignored.
+    Loaded entries are discarded by :meth:`yastn.clear_cache` and :meth:`yastn.set_cache_maxsize`.
+
+    Returns
+    -------
+    dict[str, int]
+        number of loaded entries for each cache.
+    """
+    directory = _cache._cache_dir(path)
+    loaded = {}
+    for name, cache in _caches().items():
+        fname = os.path.join(directory, name + ".pkl")
+        loaded[name] = cache.load(fname) if os.path.isfile(fname) else 0
+    return loaded
@@ -19,7 +19,7 @@ from itertools import product, accumulate
 from operator import mul
 import numbers
 import numpy as np
-from ._auxliary import _flatten, _slc
+from ._auxliary import _flatten, _slc, _materialize_readers
 from ._tests import YastnError, _test_tD_consistency, _test_struct_types
 
 
@@ -42,6 +42,7 @@ def __setitem__(a, key, newvalue):
     except ValueError as exc:
         raise YastnError('Tensor does not have a block specified by the key.') from exc
     slc = slice(*a.slices[ind].slcs[0])
+    _materialize_readers(a._data, a.config.backend)
     a._data[slc] = newvalue.reshape(-1)
 
 
@@ -14,12 +14,13 @@
 # ==============================================================================
 """ Support for merging blocks in yastn.Tensor """
 from __future__ import annotations
-from functools import lru_cache
 from itertools import groupby, product, accumulate
 from operator import itemgetter
 from typing import NamedTuple
 import numpy as np
-from ._auxliary import _slc, _flatten, _clear_axes, _ntree_to_mf, _mf_to_ntree, _unpack_legs
+from ._auxliary import _slc, _flatten, _clear_axes, _ntree_to_mf, _mf_to_ntree, _unpack_legs, _unique_rows
+from ._auxliary import _PendingData
+from ._cache import _interned_cache
 from ._tests import YastnError, _test_axes_all, _get_tD_legs
 
 
@@ -62,18 +63,49 @@ def _merge_to_matrix(a, axes, inds=None):
     """ Main function merging tensor into effective block matrix. """
     order = axes[0] + axes[1]
     struct, slices, meta_mrg, ls_l, ls_r = _meta_merge_to_matrix(a.config, a.struct, a.slices, axes, inds)
-    data = _transpose_and_merge(a.config, a._data, order, struct, slices, meta_mrg, inds)
+    data = _transpose_and_merge(a.config, _data_or_pending(a), order, struct, slices, meta_mrg, inds)
     return data, struct, slices, ls_l, ls_r
 
 
+def _data_or_pending(a):
+    """ Pending transposition or conjugation of a if it can be fused with the next operation; data of a otherwise. """
+    data = a._raw
+    if type(data) is _PendingData and data.pending_for(a.struct):
+        return data
+    return a._data
+
+
 def _transpose_and_merge(config, data, order, struct, slices, meta_mrg, inds=None):
     meta_new = tuple((x, y, z.slcs[0]) for x, y, z in zip(struct.t, struct.D, slices))
+    if type(data) is _PendingData:  # permute and conjugate source blocks directly into merged blocks
+        if data.axes is not None:
+            order, meta_mrg = _meta_merge_pending(data.axes, data.meta, order, meta_mrg)
+        elif inds is None and tuple(range(len(order))) == order and struct.size == len(data.data) \
+             and _no_change_in_transpose_and_merge(meta_mrg, meta_new, struct.size):
+            return config.backend.conj(data.data) if data.conj else data.data
+        return config.backend.transpose_and_merge(data.data, order, meta_new, meta_mrg, struct.size, conj=data.conj)
     if inds is None and tuple(range(len(order))) == order and struct.size == len(data) \
        and _no_change_in_transpose_and_merge(meta_mrg, meta_new, struct.size):
         return data
     return config.backend.transpose_and_merge(data, order, meta_new, meta_mrg, struct.size)
 
 
+@_interned_cache(maxsize=1024)
+def _meta_merge_pending(axes, meta_transpose, order, meta_mrg):
+    """ Compose pending transposition with transpose_and_merge, pointing meta_mrg to blocks of the source tensor. """
+    source = {sln: (slo, Do) for sln, _, slo, Do in meta_transpose}
+    meta_mrg = tuple((t, *source[slo], Dslc, Drsh) for t, slo, _, Dslc, Drsh in meta_mrg)
+    return tuple(axes[n] for n in order), meta_mrg
+
+
+@_interned_cache(maxsize=1024)
+def _meta_transpose_pending(axes, meta_transpose, new_axes, new_meta):
+    """ Compose pending transposition with another transposition. """
+    source = {sln: (slo, Do) for sln, _, slo, Do in meta_transpose}
+    new_meta = tuple((sln, Dn, *source[slo]) for sln, Dn, slo, _ in new_meta)
+    return tuple(axes[n] for n in new_axes), new_meta
+
+
 def _no_change_in_transpose_and_merge(meta_mrg, meta_new, Dsize):
     """ Assumes C ordering on backend reshape """
     low = 0
@@ -119,57 +151,82 @@ def _no_change_in_unmerge(meta):
     return True
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_merge_to_matrix(config, struct, slices, axes, inds):
     """ Meta information for backend needed to merge tensor into effective block matrix. """
-    s_eff = []
-    s_eff.append(struct.s[axes[0][0]] if len(axes[0]) > 0 else 1)
-    s_eff.append(struct.s[axes[1][0]] if len(axes[1]) > 0 else -1)
+    s_eff = (struct.s[axes[0][0]] if len(axes[0]) > 0 else 1,
+             struct.s[axes[1][0]] if len(axes[1]) > 0 else -1)
 
     t_old = struct.t if inds is None else [struct.t[ii] for ii in inds]
     D_old = struct.D if inds is None else [struct.D[ii] for ii in inds]
     sl_old = slices if inds is None else [slices[ii] for ii in inds]
-    tset = np.array(t_old, dtype=np.int64).reshape((len(t_old), len(struct.s), config.sym.NSYM))
-    Dset = np.array(D_old, dtype=np.int64).reshape(len(D_old), len(struct.s))
-    t, teff, ls = [], [], []
+    nblocks, nsym = len(t_old), config.sym.NSYM
+    tset = np.array(t_old, dtype=np.int64).reshape((nblocks, len(struct.s), nsym))
+    Dset = np.array(D_old, dtype=np.int64).reshape(nblocks, len(struct.s))
+    ls, irow, ileg, Dlow, Dhigh, Dprod = [], [], [], [], [], []
     for n in (0, 1):
         ta = tset[:, axes[n], :]
-        Da = Dset[:, axes[n]]
-        Deff = np.prod(Da, axis=1, dtype=np.int64).tolist()
-        Da = [tuple(x) for x in Da.tolist()]
         s = tuple(struct.s[ii] for ii in axes[n])
-        ta_eff = [tuple(x) for x in config.sym.fuse(ta, s, s_eff[n]).tolist()]
-        ta = [tuple(x) for x in ta.reshape(len(ta), len(s) * config.sym.NSYM).tolist()]
-        teff.append(ta_eff)
-        t.append(ta)
-        ls.append(_leg_structure_merge(ta_eff, ta, Deff, Da))
-
-    smeta = sorted((tel, ter, tl, tr, slo.slcs[0], Do)
-                for tel, ter, tl, tr, slo, Do in zip(teff[0], teff[1], t[0], t[1], sl_old, D_old))
-
-    meta_mrg, t_new, D_new, slices_new, Dlow = [], [], [], [],  0
-    for (tel, ter), gr in groupby(smeta, key=lambda x: x[:2]):
-        ind0 = ls[0].t.index(tel)
-        ind1 = ls[1].t.index(ter)
-        tn = tel + ter
-        t_new.append(tn)
-        D0, D1 = ls[0].D[ind0], ls[1].D[ind1]
-        D_new.append((D0, D1))
-        Dp = D0 * D1
-        Dhigh = Dlow + Dp
-        slices_new.append(_slc(((Dlow, Dhigh),), (D0, D1), Dp))
-        Dlow = Dhigh
-        try:
-            _, _, tl, tr, slo, Do = next(gr)
-            for d0, d1 in product(ls[0].dec[ind0], ls[1].dec[ind1]):
-                if d0.t == tl and d1.t == tr:
-                    meta_mrg.append((tn, slo, Do, (d0.Dslc, d1.Dslc), (d0.Dprod, d1.Dprod)))
-                    _, _, tl, tr, slo, Do = next(gr)
-        except StopIteration:
-            pass
-    struct_new = struct._replace(t=tuple(t_new), D=tuple(D_new), s=tuple(s_eff), size=Dlow)
-    slices_new = tuple(slices_new)
-    return struct_new, slices_new, tuple(meta_mrg), ls[0], ls[1]
+        ta_eff = config.sym.fuse(ta, s, s_eff[n])
+        ta = ta.reshape(nblocks, len(s) * nsym)
+        lsn, ir, il, lo, hi, dp = _leg_structure_merge_array(ta_eff, ta, Dset[:, axes[n]])
+        ls.append(lsn)
+        irow.append(ir)  # for each block, index of its row in the decomposition of merged leg
+        ileg.append(il[ir])  # for each block, index of its charge on the merged leg
+        Dlow.append(lo[ir])
+        Dhigh.append(hi[ir])
+        Dprod.append(dp[ir])
+
+    # blocks sorted by (tel, ter, tl, tr); rows of decompositions are sorted by (tel, tl)
+    order = np.lexsort((irow[1], irow[0], ileg[1], ileg[0]))
+    ind0, ind1 = ileg[0][order], ileg[1][order]
+    first = np.ones(nblocks, dtype=bool)
+    first[1:] = (ind0[1:] != ind0[:-1]) | (ind1[1:] != ind1[:-1])
+    ngrp = np.cumsum(first) - 1  # for each sorted block, index of the new block
+    g0, g1 = ind0[first].tolist(), ind1[first].tolist()
+    D0 = np.array(ls[0].D, dtype=np.int64)[ind0[first]] if nblocks > 0 else np.zeros(0, dtype=np.int64)
+    D1 = np.array(ls[1].D, dtype=np.int64)[ind1[first]] if nblocks > 0 else np.zeros(0, dtype=np.int64)
+    Dp = D0 * D1
+    Dcum = np.cumsum(Dp)
+
+    t_new = tuple(ls[0].t[x] + ls[1].t[y] for x, y in zip(g0, g1))
+    D_new = tuple(zip(D0.tolist(), D1.tolist()))
+    slices_new = tuple(_slc(((lo, hi),), D, dp) for lo, hi, D, dp in zip((Dcum - Dp).tolist(), Dcum.tolist(), D_new, Dp.tolist()))
+
+    order = order.tolist()
+    meta_mrg = tuple((t_new[n], sl_old[ii].slcs[0], D_old[ii], ((lo0, hi0), (lo1, hi1)), (dp0, dp1))
+                     for ii, n, lo0, hi0, lo1, hi1, dp0, dp1 in
+                     zip(order, ngrp.tolist(), *(x[order].tolist() for x in (Dlow[0], Dhigh[0], Dlow[1], Dhigh[1], Dprod[0], Dprod[1]))))
+    struct_new = struct._replace(t=t_new, D=D_new, s=s_eff, size=int(Dcum[-1]) if nblocks > 0 else 0)
+    return struct_new, slices_new, meta_mrg, ls[0], ls[1]
+
+
+def _leg_structure_merge_array(teff, tlegs, Dlegs):
+    """
+    LegDecomposition for merging into a single leg, from arrays of charges and dimensions of all blocks.
+
+    Returns _LegSlices, and arrays: for each block, index of its row in decomposition;
+    for each row, index of effective charge, slice of the merged leg, and its size.
+    """
+    nsym = teff.shape[1]
+    rows, first, inv = _unique_rows(np.hstack([teff, tlegs]))
+    Drows = Dlegs[first]
+    Dp = np.prod(Drows, axis=1, dtype=np.int64)
+    new = np.ones(len(rows), dtype=bool)
+    new[1:] = np.any(rows[1:, :nsym] != rows[:-1, :nsym], axis=1)
+    ileg = np.cumsum(new) - 1
+    Dcum = np.cumsum(Dp)
+    base = (Dcum - Dp)[new]
+    lo = Dcum - Dp - base[ileg]
+    hi = lo + Dp
+    Dtot = np.add.reduceat(Dp, np.flatnonzero(new)) if len(rows) > 0 else Dp
+
+    t = tuple(map(tuple, rows[new, :nsym].tolist()))
+    recs = [_DecRecord(tl, (l, h), dp, Dl) for tl, l, h, dp, Dl in
+            zip(map(tuple, rows[:, nsym:].tolist()), lo.tolist(), hi.tolist(), Dp.tolist(), map(tuple, Drows.tolist()))]
+    starts = np.flatnonzero(new).tolist() + [len(rows)]
+    dec = tuple(tuple(recs[i:j]) for i, j in zip(starts[:-1], starts[1:]))
+    return _LegSlices(t, tuple(Dtot.tolist()), dec), inv, ileg, lo, hi, Dp
 
 
 def _leg_struct_trivial(struct, axis=0):
@@ -268,14 +325,14 @@ def fuse_legs(a, axes, mode=None) -> yastn.Tensor:
 def _fuse_legs_hard(a, axes, order):
     """ Function performing hard fusion. axes are for native legs and are cleaned outside."""
     struct, slices, meta_mrg, t_in, D_in = _meta_fuse_hard(a.config, a.struct, a.slices, axes)
-    data = _transpose_and_merge(a.config, a._data, order, struct, slices, meta_mrg)
+    data = _transpose_and_merge(a.config, _data_or_pending(a), order, struct, slices, meta_mrg)
     mfs = ((1,),) * len(struct.s)
     hfs = tuple(_fuse_hfs(a.hfs, t_in, D_in, struct.s[n], axis) if len(axis) > 1 else a.hfs[axis[0]]
                 for n, axis in enumerate(axes))
     return a._replace(mfs=mfs, hfs=hfs, struct=struct, slices=slices, data=data)
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_fuse_hard(config, struct, slices, axes):
     """ Meta information for backend needed to hard-fuse some legs. """
     lt, ndim_n, nsym = len(struct.t), len(struct.s), len(struct.n)
@@ -329,7 +386,7 @@ def _meta_fuse_hard(config, struct, slices, axes):
     Dp_new = np.prod(D_new, axis=1, dtype=np.int64).tolist() if D_new else []
     struct_new = struct._replace(t=tuple(t_new), D=tuple(D_new), s=s_eff, size=sum(Dp_new))
     slices_new = tuple(_slc(((stop - dp, stop),), ds, dp) for stop, dp, ds in zip(accumulate(Dp_new), Dp_new, D_new))
-    return struct_new, slices_new, meta_mrg, t_in, D_in
+    return struct_new, slices_new, tuple(meta_mrg), t_in, D_in
 
 
 def fuse_meta_to_hard(a):
@@ -424,7 +481,7 @@ def unfuse_legs(a, axes) -> yastn.Tensor:
     return a._replace(mfs=tuple(mfs))
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_unfuse_hard(config, struct, slices, axes, hfs):
     """ Meta information for backend needed to hard-unfuse some legs. """
     t_in, _, tD_dict = _get_tD_legs(struct)
@@ -464,7 +521,7 @@ def _meta_unfuse_hard(config, struct, slices, axes, hfs):
     return meta, struct_new, slices_new, tuple(nlegs_unfused), tuple(hfs_new)
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _meta_unmerge_matrix(config, struct, slices, ls0, ls1, snew):
     meta, nsym = [], config.sym.NSYM
     for to, slo, Do in zip(struct.t, slices, struct.D):
@@ -645,7 +702,7 @@ def _embed_tensor(a, legs, legs_new):
 
 #  =========== auxliary functions handling fusion logic ======================
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _leg_structure_combine_charges_prod(sym, t_in, D_in, s_in, t_out, s_out):
     """ Combine effective charges and dimensions from a list of charges and dimensions for a few legs. """
     comb_t = list(product(*t_in))
@@ -767,7 +824,7 @@ def _mask_falsify_mismatches(ms1, ms2):
     return ms1, ms2
 
 
-@lru_cache(maxsize=1024)
+@_interned_cache(maxsize=1024)
 def _intersect_hfs(config, ts, Ds, hfs):
     """
     Returns mask1 and mask2, finding common leg indices for each teff.
@@ -203,7 +203,7 @@ def is_complex(a) -> bool:
     """
     Return ``True`` if tensor data are complex
     """
-    return a.config.backend.is_complex(a._data)
+    return a.config.backend.is_complex(a._source_data)
 
 
 def get_tensor_charge(a) -> Sequence[int]:
@@ -267,7 +267,7 @@ def get_dtype(a) -> numpy.dtype | torch.dtype:
     """
     dtype of tensor data used by the backend.
     """
-    return a.config.backend.get_dtype(a._data)
+    return a.config.backend.get_dtype(a._source_data)
 
 
 def __getitem__(a, key) -> numpy.ndarray | torch.tensor:
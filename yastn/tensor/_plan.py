@@ -0,0 +1,238 @@
+# Copyright 2024 The YASTN Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+""" Recording sequences of operations on tensors, to be replayed on tensors with the same structure. """
+from __future__ import annotations
+
+__all__ = ['ContractionPlan']
+
+
+# backend functions modifying their arguments in place are never removed from the tape
+_IN_PLACE = ('random_seed', 'set_num_threads', 'detach_', 'requires_grad_', 'apxb_', 'scale_')
+# results of these backend functions control the flow of computation or the structure of results,
+# e.g., pruning of zero blocks, or truncation of singular values and application of masks
+_DATA_DEPENDENT = ('max_abs_blocks', 'count_nonzero', 'truncation_mask', 'truncation_mask_multiplets')
+
+
+class ContractionPlan:
+
+    def __init__(self, f, retrace=False):
+        r"""
+        Compiled sequence of operations on yastn tensors, e.g., :meth:`yastn.tensordot`,
+        :meth:`yastn.ncon`, or :meth:`yastn.fuse_legs`.
+
+        At the first call, ``f(*tensors)`` is executed, recording all calls to the backend (data kernels)
+        together with their meta-information. Subsequent calls with tensors of the same structure
+        (signature, charges, block shapes, fusions) only replay the recorded data kernels,
+        skipping all manipulations of meta-information.
+        If the structures do not match, ``f`` is executed in a standard way,
+        or traced again if ``retrace=True``.
+
+        Function ``f`` should take and return yastn tensors (or a tuple of them), with all tensors
+        entering the computation passed as arguments. It should not use
+        the values of tensor elements to control the flow of computation.
+        Plans that could not be faithfully recorded,
+        e.g., using data of tensors not provided as arguments, always fall back to executing ``f``.
+
+        Parameters
+        ----------
+        f: Callable[..., yastn.Tensor | tuple[yastn.Tensor, ...]]
+            function of yastn tensors to compile.
+
+        retrace: bool
+            If ``True``, record a new plan each time the structures of input tensors change.
+            Default is ``False``.
+
+        Example
+        -------
+
+        ::
+
+            plan = yastn.ContractionPlan(lambda A, B, C: yastn.ncon([A, B, C], [(-0, 1), (1, 2), (2, -1)]))
+            D = plan(A, B, C)  # trace
+            D = plan(A, B, C)  # replay
+        """
+        self.f = f
+        self.retrace = retrace
+        self._keys = None  # structures of input tensors
+        self._tape = None  # recorded data kernels; None if recording failed
+        self._outputs = None  # templates of output tensors
+        self.replays = 0
+
+    def __call__(self, *tensors):
+        keys = tuple((t.config, t.struct, t.slices, t.mfs, t.hfs) for t in tensors)
+        if self._keys is None or (self.retrace and keys != self._keys):
+            return self.trace(*tensors)
+        if self._tape is None or keys != self._keys:
+            return self.f(*tensors)
+        self.replays += 1
+        return self._replay(tensors)
+
+    def trace(self, *tensors):
+        """ Execute ``f`` recording all calls to the backend. """
+        self._keys = tuple((t.config, t.struct, t.slices, t.mfs, t.hfs) for t in tensors)
+        self._tape, self._outputs = None, None
+        if len(tensors) == 0:
+            return self.f()
+        config = tensors[0].config
+        backend = _RecordingBackend(config.backend, [t._data for t in tensors])
+        traced = [t._replace(config=t.config._replace(backend=backend)) for t in tensors]
+        try:
+            out = self.f(*traced)
+        finally:
+            backend._recording = False
+        single = not isinstance(out, (tuple, list))
+        outs = (out,) if single else tuple(out)
+        outs = tuple(t._replace(config=config) for t in outs)
+        tape, refs = backend._finalize(tuple(t._data for t in outs))
+        if tape is not None:
+            self._tape = tape
+            self._outputs = (single, refs, tuple(t._replace(data=None) for t in outs))
+            replayed = self._replay(tensors)
+            replayed = (replayed,) if single else replayed
+            if not all(t.config.backend.allclose(r._data, t._data, 1e-13, 1e-13) for t, r in zip(outs, replayed)):
+                self._tape, self._outputs = None, None  # f does not rely only on backend kernels
+        return outs[0] if single else outs
+
+    def _replay(self, tensors):
+        values = [t._data for t in tensors]
+        for fun, args, kwargs, refs in self._tape:
+            if refs:
+                args = list(args)
+                for pos, spec in refs:
+                    args[pos] = _decode(spec, values)
+            values.append(fun(*args, **kwargs))
+        single, refs, templates = self._outputs
+        outs = tuple(t._replace(data=_decode(spec, values)) for t, spec in zip(templates, refs))
+        return outs[0] if single else outs
+
+
+class _RecordingBackend:
+    """ Forwards calls to backend, recording calls and tracking data flow. """
+
+    def __init__(self, backend, inputs):
+        self._backend = backend
+        self._recording = True
+        self._failed = False
+        self._calls = []
+        self._keep = [*inputs]  # keep references, so that ids of tracked objects are not reused
+        self._refs = {id(x): ('ref', n, None) for n, x in enumerate(inputs)}
+        self._ninputs = len(inputs)
+        self._data_type = type(inputs[0])
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+
+        def record(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if self._recording:
+                self._record(name, attr, args, kwargs, result)
+            return result
+        return record
+
+    def _record(self, name, fun, args, kwargs, result):
+        n = self._ninputs + len(self._calls)
+        refs = []
+        for pos, arg in enumerate(args):
+            spec = self._encode(arg)
+            if spec is not None:
+                refs.append((pos, spec))
+        if name in _DATA_DEPENDENT:
+            self._failed = True
+        if any(self._encode(v) is not None for v in kwargs.values()):
+            self._failed = True  # data passed as keyword arguments are not tracked
+        self._calls.append((name, fun, args, kwargs, tuple(refs)))
+        self._keep.append(result)
+        if isinstance(result, self._data_type):
+            self._refs[id(result)] = ('ref', n, None)
+        elif isinstance(result, tuple):
+            for ii, x in enumerate(result):
+                if isinstance(x, self._data_type):
+                    self._refs[id(x)] = ('ref', n, ii)
+
+    def _encode(self, arg):
+        """ Specification how to rebuild an argument that depends on tracked data; None if it does not. """
+        if id(arg) in self._refs:
+            return self._refs[id(arg)]
+        if isinstance(arg, (tuple, list)):
+            specs = [self._encode(x) for x in arg]
+            if any(spec is not None for spec in specs):
+                return ('tuple', tuple(('const', x) if spec is None else spec for x, spec in zip(arg, specs)))
+        elif isinstance(arg, dict):
+            specs = {k: self._encode(x) for k, x in arg.items()}
+            if any(spec is not None for spec in specs.values()):
+                return ('dict', tuple((k, ('const', arg[k]) if spec is None else spec) for k, spec in specs.items()))
+        elif isinstance(arg, self._data_type) and ('float' in str(arg.dtype) or 'complex' in str(arg.dtype)):
+            self._failed = True  # data not originating from input tensors
+        return None
+
+    def _finalize(self, outputs):
+        """ Remove calls which results are not used, and return the tape and specification of outputs. """
+        refs = tuple(self._encode(x) for x in outputs)
+        if self._failed or any(spec is None for spec in refs):
+            self._calls, self._keep, self._refs = [], [], {}
+            return None, None
+        used = set()
+        _collect(refs, used)
+        for n in range(len(self._calls) - 1, -1, -1):
+            name, _, _, _, crefs = self._calls[n]
+            if (n + self._ninputs) in used or name in _IN_PLACE:
+                used.add(n + self._ninputs)
+                _collect(tuple(spec for _, spec in crefs), used)
+        # renumber references to account for removed calls
+        new = {n: n for n in range(self._ninputs)}
+        for n in range(len(self._calls)):
+            if n + self._ninputs in used:
+                new[n + self._ninputs] = len(new)
+        tape = []
+        for n, (_, fun, args, kwargs, crefs) in enumerate(self._calls):
+            if n + self._ninputs in new:
+                args = list(args)
+                for pos, _ in crefs:
+                    args[pos] = None  # do not keep references to recorded data
+                tape.append((fun, tuple(args), kwargs, tuple((pos, _renumber(spec, new)) for pos, spec in crefs)))
+        self._calls, self._keep, self._refs = [], [], {}
+        return tuple(tape), tuple(_renumber(spec, new) for spec in refs)
+
+
+def _collect(specs, used):
+    for spec in specs:
+        if spec[0] == 'ref':
+            used.add(spec[1])
+        elif spec[0] == 'tuple':
+            _collect(spec[1], used)
+        elif spec[0] == 'dict':
+            _collect(tuple(x for _, x in spec[1]), used)
+
+
+def _renumber(spec, new):
+    if spec[0] == 'ref':
+        return ('ref', new[spec[1]], spec[2])
+    if spec[0] == 'tuple':
+        return ('tuple', tuple(_renumber(x, new) for x in spec[1]))
+    if spec[0] == 'dict':
+        return ('dict', tuple((k, _renumber(x, new)) for k, x in spec[1]))
+    return spec
+
+
+def _decode(spec, values):
+    if spec[0] == 'ref':
+        return values[spec[1]] if spec[2] is None else values[spec[1]][spec[2]]
+    if spec[0] == 'const':
+        return spec[1]
+    if spec[0] == 'tuple':
+        return tuple(_decode(x, values) for x in spec[1])
+    return {k: _decode(x, values) for k, x in spec[1]}
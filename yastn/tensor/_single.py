@@ -14,17 +14,18 @@
 # ==============================================================================
 """ Linear operations and operations on a single yastn.Tensor. """
 from __future__ import annotations
+from collections import namedtuple
 from itertools import accumulate
 import numpy as np
-from ._auxliary import _slc, _clear_axes, _unpack_axes
-from ._merging import _Fusion
+from ._auxliary import _slc, _clear_axes, _unpack_axes, _PendingData
+from ._merging import _Fusion, _meta_transpose_pending, _data_or_pending
 from ._tests import YastnError, _test_axes_all
 
 
 __all__ = ['conj', 'conj_blocks', 'flip_signature', 'flip_charges',
            'transpose', 'moveaxis', 'move_leg', 'diag', 'remove_zero_blocks',
            'add_leg', 'remove_leg', 'copy', 'clone', 'detach', 'to',
-           'requires_grad_', 'grad', 'drop_leg_history']
+           'requires_grad_', 'grad', 'drop_leg_history', 'get_pruning_info', 'clear_pruning_info']
 
 
 def copy(a) -> yastn.Tensor:
@@ -113,17 +114,34 @@ def conj(a) -> yastn.Tensor:
     the total charge `n` to `-n`, and complex conjugate each block of the tensor.
 
     Follows the behavior of the backend.conj() when it comes to creating a new copy of the data.
+    If configuration has ``lazy_conj=True``, conjugation of blocks is fused with merging of blocks
+    in the next :meth:`yastn.tensordot`, decomposition, or hard fusion, or performed when the data of the tensor is accessed.
     """
+    return _conj(a, a.config.lazy_conj)
+
+
+def _conj(a, lazy):
+    """ Conjugate tensor; if lazy, conjugation of blocks is postponed. """
     nsym = a.config.sym.NSYM
     an = np.array(a.struct.n, dtype=np.int64).reshape((1, 1, nsym))
     newn = tuple(a.config.sym.fuse(an, (1,), -1).reshape(nsym).tolist())
     news = tuple(-x for x in a.struct.s)
     struct = a.struct._replace(s=news, n=newn)
     hfs = tuple(hf.conj() for hf in a.hfs)
-    data = a.config.backend.conj(a._data)
+    data = _pending_conj(a, struct) if lazy else a.config.backend.conj(a._data)
     return a._replace(hfs=hfs, struct=struct, data=data)
 
 
+def _pending_conj(a, struct):
+    """ Data of a with conjugation postponed, for the conjugated tensor with struct. """
+    if a.isdiag:
+        return a.config.backend.conj(a._data)
+    data = _data_or_pending(a)
+    if type(data) is _PendingData:
+        return _PendingData(data.data, data.axes, data.meta, struct, not data.conj)
+    return _PendingData(data, None, None, struct, True)
+
+
 def conj_blocks(a) -> yastn.Tensor:
     """
     Complex-conjugate all blocks leaving symmetry structure (signature, blocks charge, and
@@ -131,7 +149,7 @@ def conj_blocks(a) -> yastn.Tensor:
 
     Follows the behavior of the backend.conj() when it comes to creating a new copy of the data.
     """
-    data = a.config.backend.conj(a._data)
+    data = _pending_conj(a, a.struct) if a.config.lazy_conj else a.config.backend.conj(a._data)
     return a._replace(data=data)
 
 
@@ -231,6 +249,10 @@ def transpose(a, axes=None) -> yastn.Tensor:
     axes: Sequence[int]
         new order of legs. Has to be a valid permutation of (0, 1, ..., ndim-1)
         If not provided, defaults to range(a.ndim)[::-1], which reverses the order of the axes.
+
+    If configuration has ``lazy_transpose=True``, blocks are not permuted immediately.
+    The permutation is fused with merging of blocks in the next :meth:`yastn.tensordot`,
+    decomposition, or hard fusion, or performed when the data of the tensor is accessed.
     """
     if axes is None:
         axes = tuple(range(a.ndim-1, -1, -1))
@@ -260,7 +282,18 @@ def transpose(a, axes=None) -> yastn.Tensor:
     struct = a.struct._replace(s=c_s, t=c_t, D=c_D)
     meta = tuple((sln.slcs[0], sln.D, mt[2].slcs[0], mt[2].D) for sln, mt, in zip(slices, meta))
 
-    data = a._data if a.isdiag else a.config.backend.transpose(a._data, uaxes, meta)
+    if a.isdiag:
+        data = a._data
+    elif a.config.lazy_transpose:
+        data = _data_or_pending(a)
+        if type(data) is _PendingData:
+            if data.axes is not None:
+                uaxes, meta = _meta_transpose_pending(data.axes, data.meta, uaxes, meta)
+            data = _PendingData(data.data, uaxes, meta, struct, data.conj)
+        else:
+            data = _PendingData(data, uaxes, meta, struct)
+    else:
+        data = a.config.backend.transpose(a._data, uaxes, meta)
     return a._replace(mfs=mfs, hfs=hfs, struct=struct, slices=slices, data=data)
 
 
@@ -455,9 +488,16 @@ def remove_zero_blocks(a, rtol=1e-12, atol=0) -> yastn.Tensor:
     Cutoff is a combination of absolut tolerance and
     relative tolerance with respect to maximal element in the tensor.
     """
-    cutoff = atol + rtol * a.norm(p='inf')
-    meta = [(t, D, sl) for t, D, sl in zip(a.struct.t, a.struct.D, a.slices) \
-             if a.config.backend.max_abs(a._data[slice(*sl.slcs[0])]) > cutoff]
+    if len(a.struct.t) == 0:
+        return a
+    maxs = a.config.backend.max_abs_blocks(a._data, tuple(sl.slcs[0] for sl in a.slices))
+    cutoff = atol + rtol * max(maxs)
+    return _remove_blocks(a, tuple(x > cutoff for x in maxs))
+
+
+def _remove_blocks(a, keep):
+    """ Keep blocks of a indicated by a tuple of bools. """
+    meta = [(t, D, sl) for t, D, sl, k in zip(a.struct.t, a.struct.D, a.slices, keep) if k]
     c_t = tuple(mt[0] for mt in meta)
     c_D = tuple(mt[1] for mt in meta)
     old_sl = tuple(mt[2] for mt in meta)
@@ -468,3 +508,61 @@ def remove_zero_blocks(a, rtol=1e-12, atol=0) -> yastn.Tensor:
     struct = a.struct._replace(t=c_t, D=c_D, size=sum(c_Dp))
     data = a.config.backend.apply_slice(a._data, c_sl, old_sl)
     return a._replace(struct=struct, slices=slices, data=data)
+
+
+# zero-block pruning policy set by prune_tol and prune_every in config
+_PruningInfo = namedtuple("PruningInfo", ["calls", "checks", "pruned", "blocks", "nbytes"])
+_pruning = {'calls': 0, 'checks': 0, 'pruned': 0, 'blocks': 0, 'nbytes': 0}
+
+
+def _blocks_to_keep(a):
+    """
+    Following pruning policy in a.config, return a tuple of bools indicating blocks of a to keep;
+    None if a should not be pruned.
+    """
+    _pruning['calls'] += 1
+    if _pruning['calls'] % a.config.prune_every or len(a.struct.t) == 0:
+        return None
+    _pruning['checks'] += 1
+    maxs = a.config.backend.max_abs_blocks(a._data, tuple(sl.slcs[0] for sl in a.slices))
+    cutoff = a.config.prune_tol * max(maxs)
+    keep = tuple(x > cutoff for x in maxs)
+    return None if all(keep) else keep
+
+
+def _prune_zero_blocks(a):
+    """ Remove blocks of a with all elements below a cutoff, following pruning policy in a.config. """
+    if not a.config.prune_tol:
+        return a
+    keep = _blocks_to_keep(a)
+    if keep is None:
+        return a
+    c = _remove_blocks(a, keep)
+    _record_pruning((a,), (c,))
+    return c
+
+
+def _record_pruning(olds, news):
+    _pruning['pruned'] += 1
+    _pruning['blocks'] += sum(len(a.struct.t) - len(c.struct.t) for a, c in zip(olds, news))
+    _pruning['nbytes'] += sum((a.struct.size - c.struct.size) * np.dtype(a.yast_dtype).itemsize
+                              for a, c in zip(olds, news))
+
+
+def get_pruning_info():
+    """
+    Return statistics of zero-block pruning, see ``prune_tol`` in :meth:`yastn.make_config`,
+    as a named tuple (calls, checks, pruned, blocks, nbytes).
+
+    ``calls`` is the number of results of operations subject to pruning,
+    ``checks`` the number of those that were checked for zero blocks (following ``prune_every``),
+    ``pruned`` the number of results where some blocks were removed,
+    ``blocks`` and ``nbytes`` the total number of removed blocks and their memory in bytes.
+    """
+    return _PruningInfo(**_pruning)
+
+
+def clear_pruning_info():
+    """ Reset statistics of zero-block pruning. """
+    for k in _pruning:
+        _pruning[k] = 0
@@ -16,10 +16,12 @@
 from __future__ import annotations
 from itertools import accumulate
 import numpy as np
-from ._auxliary import _struct, _slc, _clear_axes, _unpack_axes
+from ._auxliary import _struct, _slc, _clear_axes, _unpack_axes, _DOUBLE
+from ._cache import _interned_cache
 from ._tests import YastnError, _test_axes_all
-from ._merging import _merge_to_matrix, _meta_unmerge_matrix, _unmerge
+from ._merging import _merge_to_matrix, _meta_merge_to_matrix, _meta_unmerge_matrix, _unmerge
 from ._merging import _Fusion, _leg_struct_trivial
+from ._single import _blocks_to_keep, _remove_blocks, _record_pruning
 
 __all__ = ['qr', 'norm', 'entropy', 'truncation_mask', 'truncation_mask_multiplets',
            'svd', 'svd_with_truncation', 'eigh', 'eigh_with_truncation']
@@ -36,7 +38,22 @@ def norm(a, p='fro') -> number:
     """
     if p not in ('fro', 'inf'):
         raise YastnError("Error in norm: p not in ('fro', 'inf'). ")
-    return a.config.backend.norm(a._data, p)
+    return a.config.backend.norm(_promote(a, a._data), p)
+
+
+def _promote(a, data):
+    """ Under mixed-precision policy, data of single-precision tensor a is promoted to double precision. """
+    if a.config.mixed_precision and a.yast_dtype in _DOUBLE:
+        return a.config.backend.move_to(data, dtype=_DOUBLE[a.yast_dtype])
+    return data
+
+
+def _demote(a, *datas):
+    """ Under mixed-precision policy, cast results of decomposition back to the precision of tensor a. """
+    if not (a.config.mixed_precision and a.yast_dtype in _DOUBLE):
+        return datas
+    backend = a.config.backend
+    return tuple(backend.move_to(x, dtype=a.yast_dtype if backend.is_complex(x) else 'float32') for x in datas)
 
 
 def svd_with_truncation(a, axes=(0, 1), sU=1, nU=True,
@@ -72,8 +89,21 @@ def svd_with_truncation(a, axes=(0, 1), sU=1, nU=True,
         it is the last leg of U and the first of V.
 
     policy: str
-        "fullrank" or "lowrank". Use standard full (but reduced) SVD for "fullrank".
+        "fullrank", "lowrank", "randomized", or "krylov". Use standard full (but reduced) SVD for "fullrank".
         For "lowrank", uses randomized/truncated SVD and requires providing `D_block` in `kwargs`.
+        For "krylov", computes ``k`` leading singular triples of each block with :meth:`yastn.svds`,
+        where ``k`` defaults to ``min(D_total, D_block)``, see :meth:`yastn.linalg.svd`.
+        For "subspace", refines the subspace of left singular vectors ``U0`` from a previous decomposition,
+        e.g., of a slightly different tensor in an iterative algorithm, see :meth:`yastn.linalg.svd`.
+        Exact SVD is used if ``U0`` is None, if `a` requires grad, or if truncation keeps all singular values
+        found in some sector that was not decomposed exactly.
+        For "randomized", first estimates how many singular values each block contributes to the truncated spectrum,
+        from a sketch of at most ``min(D_total, D_block)`` leading singular values of each block,
+        and then computes only those with a randomized range finder, see :meth:`yastn.linalg.svd`.
+        Exact SVD is used if there is no finite ``D_total`` or ``D_block``, or if the estimate turns out to be unreliable,
+        i.e., all computed singular values in some block (including one extra) are kept by truncation.
+        Option ``diagnostics`` of the exact SVD is dropped by "randomized" and "subspace" decompositions,
+        which do not use its backward pass; it is used only by their fallback to the exact SVD.
 
     tol: float
         relative tolerance of singular values below which to truncate across all blocks.
@@ -101,22 +131,98 @@ def svd_with_truncation(a, axes=(0, 1), sU=1, nU=True,
     -------
     U, S, V
     """
-    diagnostics = kwargs['diagonostics'] if 'diagonostics' in kwargs else None
-    U, S, V = svd(a, axes=axes, sU=sU, nU=nU, policy=policy, D_block=D_block, diagnostics=diagnostics, fix_signs=fix_signs)
-
-    if mask_f:
+    if not mask_f:
+        mask_f = lambda S: truncation_mask(S, tol=tol, tol_block=tol_block,
+                                           D_block=D_block, D_total=D_total,
+                                           truncate_multiplets=truncate_multiplets)
+    USVmask, opts = None, {}
+    if policy == 'randomized':
+        USVmask = _svd_randomized_with_mask(a, axes, sU, nU, fix_signs, mask_f, D_block, D_total, kwargs)
+        policy = 'fullrank'
+    elif policy == 'subspace':
+        USVmask = _svd_subspace_with_mask(a, axes, sU, nU, Uaxis, fix_signs, mask_f, kwargs)
+        policy = 'fullrank'
+    elif policy == 'krylov':
+        opts = {x: kwargs[x] for x in ('ncv', 'maxiter', 'krylov_tol') if x in kwargs}
+        opts['k'] = kwargs['k'] if 'k' in kwargs else \
+                    min(D_total, max(D_block.values(), default=0) if isinstance(D_block, dict) else D_block)
+        if opts['k'] == float('inf'):
+            raise YastnError("krylov policy in svd_with_truncation requires passing argument k, or finite D_block or D_total.")
+    if USVmask is None:
+        diagnostics = kwargs.get('diagnostics', kwargs.get('diagonostics', None))
+        U, S, V = svd(a, axes=axes, sU=sU, nU=nU, policy=policy, D_block=D_block, diagnostics=diagnostics, fix_signs=fix_signs, **opts)
         Smask = mask_f(S)
     else:
-        Smask = truncation_mask(S, tol=tol, tol_block=tol_block,
-                                D_block=D_block, D_total=D_total,
-                                truncate_multiplets=truncate_multiplets)
+        U, S, V, Smask = USVmask
     U, S, V = Smask.apply_mask(U, S, V, axes=(-1, 0, 0))
+    if a.config.prune_tol:
+        U, S, V = _prune_svd(U, S, V)
 
     U = U.move_leg(source=-1, destination=Uaxis)
     V = V.move_leg(source=0, destination=Vaxis)
     return U, S, V
 
 
+def _svd_randomized_with_mask(a, axes, sU, nU, fix_signs, mask_f, D_block, D_total, kwargs):
+    """
+    Randomized SVD computing in each block only the singular values kept by truncation, and one extra.
+    The numbers of singular values are estimated from a sketch of the spectrum with a single power iteration.
+    Return U, S, V, and truncation mask; None if the estimate is not possible or not reliable.
+    """
+    D_cap = min(D_total, max(D_block.values(), default=0) if isinstance(D_block, dict) else D_block)
+    if D_cap == float('inf'):
+        return None
+    opts = {k: kwargs[k] for k in ('n_iter', 'oversample') if k in kwargs}
+    S = svd(a, axes=axes, sU=sU, nU=nU, compute_uv=False, policy='randomized', D_block=D_cap,
+            n_iter=1, oversample=opts.get('oversample', 10))
+    Smask = mask_f(S)
+    nsym = a.config.sym.NSYM
+    backend = a.config.backend
+    ks = {t[:nsym]: backend.count_nonzero(Smask._data[slice(*sl.slcs[0])]) for t, sl in zip(Smask.struct.t, Smask.slices)}
+    ks = {t: int(k) + 1 for t, k in ks.items() if k > 0}
+    U, S, V = svd(a, axes=axes, sU=sU, nU=nU, policy='randomized', D_block=ks, fix_signs=fix_signs, **opts)
+    Smask = mask_f(S)
+    for t, D, sl in zip(Smask.struct.t, Smask.struct.D, Smask.slices):
+        if D[0] == ks[t[:nsym]] and backend.count_nonzero(Smask._data[slice(*sl.slcs[0])]) == D[0]:
+            return None  # the block might contribute more singular values
+    return U, S, V, Smask
+
+
+def _svd_subspace_with_mask(a, axes, sU, nU, Uaxis, fix_signs, mask_f, kwargs):
+    """
+    SVD refining a subspace of left singular vectors U0 from a previous decomposition, and truncation mask.
+    Return None if U0 is not given, if `a` requires grad, or if truncation keeps all computed singular values
+    in some sector that was not decomposed exactly, i.e., the sector might contribute more singular values.
+    """
+    if kwargs.get('U0', None) is None or a.requires_grad:
+        return None
+    opts = {x: kwargs[x] for x in ('n_iter', 'oversample', 'subspace_tol') if x in kwargs}
+    U0 = kwargs['U0'].move_leg(source=Uaxis, destination=-1)
+    U, S, V = svd(a, axes=axes, sU=sU, nU=nU, policy='subspace', U0=U0, fix_signs=fix_signs, **opts)
+    Smask = mask_f(S)
+    lout_l, lout_r = _clear_axes(*axes)
+    struct = _meta_merge_to_matrix(a.config, a.struct, a.slices, _unpack_axes(a.mfs, lout_l, lout_r), None)[0]
+    full = dict(zip(_svd_charges(a.config, struct, sU, nU), (min(D) for D in struct.D)))
+    nsym = a.config.sym.NSYM
+    backend = a.config.backend
+    for t, D, sl in zip(Smask.struct.t, Smask.struct.D, Smask.slices):
+        if D[0] < full[t[:nsym]] and backend.count_nonzero(Smask._data[slice(*sl.slcs[0])]) == D[0]:
+            return None
+    return U, S, V, Smask
+
+
+def _prune_svd(U, S, V):
+    """ Remove sectors where all singular values are below a cutoff, following pruning policy in config. """
+    keep = _blocks_to_keep(S)
+    if keep is None:
+        return U, S, V
+    Sp = _remove_blocks(S, keep)
+    Smask = Sp._replace(data=Sp._data > -float('inf'))  # all True
+    Up, Vp = Smask.apply_mask(U, V, axes=(-1, 0))
+    _record_pruning((U, S, V), (Up, Sp, Vp))
+    return Up, Sp, Vp
+
+
 def svd(a, axes=(0, 1), sU=1, nU=True, compute_uv=True,
         Uaxis=-1, Vaxis=0, policy='fullrank',
         fix_signs=False, **kwargs) -> tuple[yastn.Tensor, yastn.Tensor, yastn.Tensor] | yastn.Tensor:
@@ -147,8 +253,23 @@ def svd(a, axes=(0, 1), sU=1, nU=True, compute_uv=True,
         it is the last leg of U and the first of V, in which case a = U @ S @ V.
 
     policy: str
-        "fullrank" or "lowrank". Use standard full (but reduced) SVD for "fullrank".
+        "fullrank", "lowrank", "randomized", or "krylov". Use standard full (but reduced) SVD for "fullrank".
         For "lowrank", uses randomized/truncated SVD and requires providing `D_block` in `kwargs`.
+        For "krylov", computes ``k`` leading singular triples in each block with Golub-Kahan-Lanczos bidiagonalization
+        of :meth:`yastn.svds`, using only products of the block with vectors; ``k`` is given in `kwargs`,
+        either as int or a dict with charges of the new leg as keys.
+        Optional ``ncv``, ``maxiter``, and ``krylov_tol`` are passed to :meth:`yastn.svds` as ``ncv``, ``maxiter``, and ``tol``.
+        For "subspace", refines the subspace of left singular vectors ``U0``, e.g., from the previous step of an iterative algorithm,
+        with ``n_iter`` subspace iterations (default 2); ``U0`` has the same legs as `U` (with the new leg at `Uaxis`).
+        In each sector, it computes ``oversample`` (default 2) more singular triples than there are columns in ``U0``.
+        Sectors where ``U0`` is missing or does not fit are decomposed exactly,
+        as are sectors where the residual of a singular triple exceeds ``subspace_tol`` (default 1e-8) times the largest singular value.
+        ``U0`` is treated as a constant. As subspace iterations are not differentiated,
+        "subspace" falls back to "fullrank" if `a` requires grad.
+        For "randomized", computes `D_block` leading singular values in each block with a randomized range finder,
+        with ``oversample`` extra random vectors (default 10) and ``n_iter`` power iterations (default 2), given in `kwargs`;
+        blocks too small for the range finder to pay off are decomposed exactly.
+        If `D_block` is a dict, its keys are charges of the new leg, as in :meth:`yastn.linalg.truncation_mask`.
 
     fix_signs: bool
         Whether or not to fix phases in `U` and `V`,
@@ -161,26 +282,38 @@ def svd(a, axes=(0, 1), sU=1, nU=True, compute_uv=True,
     U, S, V or S
     """
     _test_axes_all(a, axes)
+    if policy == 'subspace' and a.requires_grad:
+        policy = 'fullrank'
     lout_l, lout_r = _clear_axes(*axes)
     axes = _unpack_axes(a.mfs, lout_l, lout_r)
 
     data, struct, slices, ls_l, ls_r = _merge_to_matrix(a, axes)
 
     minD = tuple(min(ds) for ds in struct.D)
-    if policy == 'lowrank':
-        if 'D_block' not in kwargs:
-            raise YastnError("lowrank policy in svd requires passing argument D_block.")
-        D_block = kwargs['D_block']
+    if policy in ('lowrank', 'randomized', 'krylov'):
+        key = 'k' if policy == 'krylov' else 'D_block'
+        if key not in kwargs:
+            raise YastnError(f"{policy} policy in svd requires passing argument {key}.")
+        D_block = kwargs[key]
         if not isinstance(D_block, dict):
             minD = tuple(min(D_block, d) for d in minD)
-        else:
+        elif policy == 'lowrank':
             nsym = a.config.sym.NSYM
             st = [x[nsym:] for x in struct.t] if nU else [x[:nsym] for x in struct.t]
             minD = tuple(min(D_block.get(t, 0), d) for t, d in zip(st, minD))
+        else:  # charges of the new leg, as in truncation_mask
+            st = _svd_charges(a.config, struct, sU, nU)
+            minD = tuple(min(D_block.get(t, 0), d) for t, d in zip(st, minD))
+    elif policy == 'subspace':
+        if kwargs.get('U0', None) is None:
+            raise YastnError("subspace policy in svd requires passing argument U0.")
+        U0 = kwargs['U0'].move_leg(source=Uaxis, destination=-1)
+        minD, Qdata, Qmeta = _svd_starting_subspace(a, U0, axes, struct, ls_l, minD, kwargs.get('oversample', 2))
 
     meta, Ustruct, Uslices, Sstruct, Sslices, Vstruct, Vslices = _meta_svd(a.config, struct, slices, minD, sU, nU)
     sizes = tuple(x.size for x in (Ustruct, Sstruct, Vstruct))
 
+    data = _promote(a, data)
     if compute_uv and policy == 'fullrank':
         Udata, Sdata, Vdata = a.config.backend.svd(data, meta, sizes, \
             diagnostics=kwargs['diagnostics'] if 'diagnostics' in kwargs else None)
@@ -188,11 +321,24 @@ def svd(a, axes=(0, 1), sU=1, nU=True, compute_uv=True,
         Sdata = a.config.backend.svdvals(data, meta, sizes[1])
     elif compute_uv and policy == 'lowrank':
         Udata, Sdata, Vdata = a.config.backend.svd_lowrank(data, meta, sizes, **kwargs)
+    elif compute_uv and policy == 'randomized':
+        Udata, Sdata, Vdata = a.config.backend.svd_randomized(data, meta, sizes, **kwargs)
+    elif not compute_uv and policy == 'randomized':
+        Sdata = a.config.backend.svdvals_randomized(data, meta, sizes[1], **kwargs)
+    elif policy == 'subspace':
+        Udata, Sdata, Vdata = a.config.backend.svd_subspace(data, meta, sizes, a.config.backend.detach(_promote(U0, Qdata)), Qmeta,
+            n_iter=kwargs.get('n_iter', 2), tol=kwargs.get('subspace_tol', 1e-8))
+    elif policy == 'krylov':
+        Udata, Sdata, Vdata = _svd_krylov(a, data, struct, slices, minD, meta, sizes, kwargs)
     else:
-        raise YastnError('svd policy should in (`lowrank`, `fullrank`). compute_uv == False only works with `fullrank`')
+        raise YastnError('svd policy should in (`lowrank`, `fullrank`, `randomized`, `krylov`, `subspace`). compute_uv == False does not work with `lowrank`')
 
     if compute_uv and fix_signs:
         Udata, Vdata = a.config.backend.fix_svd_signs(Udata, Vdata, meta)
+    if compute_uv:
+        Udata, Sdata, Vdata = _demote(a, Udata, Sdata, Vdata)
+    else:
+        Sdata, = _demote(a, Sdata)
 
     ls_s = _leg_struct_trivial(Sstruct, axis=0)
 
@@ -222,6 +368,54 @@ def svd(a, axes=(0, 1), sU=1, nU=True, compute_uv=True,
     return U, S, V
 
 
+def _svd_starting_subspace(a, U0, axes, struct, ls_l, minD, oversample):
+    """
+    Blocks of U0 (with the new leg last) merged into a matrix with rows consistent with the matrix of struct.
+    Return numbers of singular triples in consecutive blocks, data of U0, and
+    (slice, shape) of starting subspace for consecutive blocks; None for blocks to be decomposed exactly.
+    """
+    if U0.ndim_n != len(axes[0]) + 1 or U0.struct.s[:-1] != tuple(a.struct.s[ii] for ii in axes[0]):
+        raise YastnError("U0 does not match legs of U.")
+    nsym = a.config.sym.NSYM
+    Qdata, Qstruct, Qslices, Qls_l, _ = _merge_to_matrix(U0, (tuple(range(U0.ndim_n - 1)), (U0.ndim_n - 1,)))
+    decs, Qdecs = dict(zip(ls_l.t, ls_l.dec)), dict(zip(Qls_l.t, Qls_l.dec))
+    Qblocks = {t[:nsym]: (sl.slcs[0], D) for t, D, sl in zip(Qstruct.t, Qstruct.D, Qslices)}
+    newD, Qmeta = [], []
+    for t, mD in zip(struct.t, minD):
+        tl = t[:nsym]
+        k = min(Qblocks[tl][1][1] + oversample, mD) if tl in Qblocks and Qdecs[tl] == decs[tl] else mD
+        newD.append(k)
+        if mD > 0:
+            Qmeta.append(Qblocks[tl] if k < mD else None)
+    return tuple(newD), Qdata, tuple(Qmeta)
+
+
+def _svd_krylov(a, data, struct, slices, minD, meta, sizes, kwargs):
+    """
+    Singular triples of consecutive blocks of matrix, found by :meth:`yastn.svds`.
+    Krylov vectors are one-leg tensors with a single block, on which the matrix acts with tensordot.
+    """
+    from ..krylov import svds
+    config, backend = a.config, a.config.backend
+    nsym = config.sym.NSYM
+    sl, sr = struct.s
+    m = a._replace(struct=struct, slices=slices, data=data, mfs=((1,), (1,)), hfs=(_Fusion(s=(sl,)), _Fusion(s=(sr,))))
+    f = lambda v: m.tensordot(v, axes=(1, 0))
+    fh = lambda u: m.tensordot(u, axes=(0, 0), conj=(1, 0))
+    opts = {'ncv': kwargs.get('ncv', None), 'maxiter': kwargs.get('maxiter', 100), 'tol': kwargs.get('krylov_tol', 1e-13)}
+    tr = [t[nsym:] for t, mD in zip(struct.t, minD) if mD > 0]
+    ns = config.sym.fuse(np.array(tr, dtype=np.int64).reshape((len(tr), 1, nsym)), (-sr,), 1).tolist()
+    triples = []
+    for t, n, (_, D, _, DU, _, _, _) in zip(tr, ns, meta):
+        vstruct = _struct(s=(-sr,), n=tuple(n), diag=False, t=(t,), D=((D[1],),), size=D[1])
+        v0 = m._replace(struct=vstruct, slices=(_slc(((0, D[1]),), (D[1],), D[1]),), mfs=((1,),), hfs=(_Fusion(s=(-sr,)),),
+                        data=backend.rand((D[1],), dtype=m.yast_dtype, device=m.device))
+        S, Us, Vs = svds(f, fh, v0, k=DU[1], **opts)
+        triples.append((S, [u._data for u in Us], [v._data for v in Vs]))
+    return backend.svd_from_vectors(data, meta, sizes, triples)
+
+
+@_interned_cache(maxsize=1024)
 def _meta_svd(config, struct, slices, minD, sU, nU):
     """
     meta and struct for svd
@@ -240,16 +434,7 @@ def _meta_svd(config, struct, slices, minD, sU, nU):
         minD = tuple(mD for mD in minD if mD > 0)
         struct = struct._replace(t=at, D=aD)
 
-    if nU and sU == struct.s[1]:
-        t_con = tuple(x[nsym:] for x in struct.t)
-    elif nU: # and -sQ == struct.s[1]
-        t_con = np.array(struct.t, dtype=np.int64).reshape((len(struct.t), 2, nsym))
-        t_con = tuple(map(tuple, config.sym.fuse(t_con[:, 1:, :], (1,), -1).tolist()))
-    elif sU == -struct.s[0]: # and nV (not nU)
-        t_con = tuple(x[:nsym] for x in struct.t)
-    else: # not nU and sU == struct.s[0]
-        t_con = np.array(struct.t, dtype=np.int64).reshape((len(struct.t), 2, nsym))
-        t_con = tuple(map(tuple, config.sym.fuse(t_con[:, :1, :], (1,), -1).tolist()))
+    t_con = _svd_charges(config, struct, sU, nU)
     Un, Vn = (struct.n, n0) if nU else (n0, struct.n)
 
     Ut = tuple(x[:nsym] + y for x, y in zip(struct.t, t_con))
@@ -278,6 +463,21 @@ def _meta_svd(config, struct, slices, minD, sU, nU):
     return meta, Ustruct, Usl, Sstruct, Ssl, Vstruct, Vsl
 
 
+def _svd_charges(config, struct, sU, nU):
+    """ Charges of the new leg in S for consecutive blocks of a matrix with struct. """
+    nsym = config.sym.NSYM
+    if nU and sU == struct.s[1]:
+        return tuple(x[nsym:] for x in struct.t)
+    if nU: # and -sQ == struct.s[1]
+        t_con = np.array(struct.t, dtype=np.int64).reshape((len(struct.t), 2, nsym))
+        return tuple(map(tuple, config.sym.fuse(t_con[:, 1:, :], (1,), -1).tolist()))
+    if sU == -struct.s[0]: # and nV (not nU)
+        return tuple(x[:nsym] for x in struct.t)
+    # not nU and sU == struct.s[0]
+    t_con = np.array(struct.t, dtype=np.int64).reshape((len(struct.t), 2, nsym))
+    return tuple(map(tuple, config.sym.fuse(t_con[:, :1, :], (1,), -1).tolist()))
+
+
 def truncation_mask_multiplets(S, tol=0, D_total=float('inf'),
                                eps_multiplet=1e-13, **kwargs) -> yastn.Tensor[bool]:
     """
@@ -301,64 +501,12 @@ def truncation_mask_multiplets(S, tol=0, D_total=float('inf'),
         two consecutive elements of S is larger than ``eps_multiplet``, these
         elements are not considered as part of the same multiplet.
     """
-    if not (S.isdiag and S.yast_dtype == "float64"):
+    if not (S.isdiag and S.yast_dtype in ("float64", "float32")):
         raise YastnError("Truncation_mask requires S to be real and diagonal")
 
-    # makes a copy for partial truncations; also detaches from autograd computation graph
-    Smask = S.copy()
-    Smask._data = Smask.data > float('inf') # all False ?
-    S_global_max = None
-
-    # find all multiplets in the spectrum
-    # 0) convert to plain dense numpy vector and sort in descending order
-    s = S.config.backend.to_numpy(S.data)
-    inds = np.argsort(s)[::-1].copy() # make descending
-    s = s[inds]
-
-    S_global_max = s[0]
-    D_trunc = min(sum(s > (S_global_max * tol)), D_total)
-    if D_trunc >= len(s):
-        # no truncation
-        Smask._data = S.data > -float('inf') # all True ?
-        return Smask
-
-    # compute gaps and normalize by magnitude of (abs) larger value.
-    # value of gaps[i] gives gap between i-th and i+1 the element of s
-    maxgap = np.maximum(np.abs(s[:len(s) - 1]), np.abs(s[1:len(s)])) + 1.0e-16
-    gaps = np.abs(s[:len(s) - 1] - s[1:len(s)]) / maxgap
-
-    # find nearest multiplet boundary, keeping at most D_trunc elements
-    # i-th element of gaps gives gap between i-th and (i+1)-th element of s
-    # Note, s[:D_trunc] selects D_trunc values: from 0th to (D_trunc-1)-th element
-    for i in range(D_trunc - 1, -1, -1):
-        if gaps[i] > eps_multiplet:
-            D_trunc = i+1
-            break
-
-    Smask._data[inds[:D_trunc]] = True
-
-    # check symmetry related blocks and truncate to equal length
-    active_sectors = filter(lambda x: any(Smask[x]), Smask.struct.t)
-    for t in active_sectors:
-        tn = np.array(t, dtype=np.int64).reshape((1, 1, -1))
-        tn = tuple(S.config.sym.fuse(tn, (1,), -1).ravel().tolist())
-        if t == tn:
-            continue
-
-        common_size = min(len(Smask[t]), len(Smask[tn]))
-        # if related blocks do not have equal length
-        if common_size > len(Smask[t]):
-            # assert sum(Smask[t][common_size:]) <= 0 ,\
-            #     "Symmetry-related blocks do not match"
-            Smask[t][common_size:] = False
-        if common_size > len(Smask[tn]):
-            # assert sum(Smask[tn][common_size:])<=0,\
-            #     "Symmetry-related blocks do not match"
-            Smask[tn][common_size:] = False
-
-        if not all(Smask[t][:common_size] == Smask[tn][:common_size]):
-            Smask[t][:common_size] = Smask[tn][:common_size] = Smask[t][:common_size] & Smask[tn][:common_size]
-    return Smask
+    _, _, pairs = _meta_truncation_mask(S.config, S.struct, S.slices)
+    mask = S.config.backend.truncation_mask_multiplets(S._data, tol, D_total, eps_multiplet, pairs)
+    return S._replace(data=mask)
 
 
 def truncation_mask(S, tol=0, tol_block=0,
@@ -395,54 +543,46 @@ def truncation_mask(S, tol=0, tol_block=0,
         If True, tol_block and D_block are ignored, as truncate_multiplets is a global condition.
         The default is False.
     """
-    if not (S.isdiag and S.yast_dtype == "float64"):
+    if not (S.isdiag and S.yast_dtype in ("float64", "float32")):
         raise YastnError("Truncation_mask requires S to be real and diagonal")
 
-    # makes a copy for partial truncations; also detaches from autograd computation graph
-    S = S.copy()
-    Smask = S.copy()
-    Smask._data = Smask._data > -float('inf') # all True
-
     if truncate_multiplets:
         tol_block, D_block = 0, float('inf')
 
+    seg, starts, _ = _meta_truncation_mask(S.config, S.struct, S.slices)
     nsym = S.config.sym.NSYM
-    tol_null = 0. if isinstance(tol_block, dict) else tol_block
-    D_null = 0 if isinstance(D_block, dict) else D_block
-    for t, sl in zip(S.struct.t, S.slices):
-        t = t[:nsym]
-        tol_rel = tol_block[t] if (isinstance(tol_block, dict) and t in tol_block) else tol_null
-        D_tol = sum(S.data[slice(*sl.slcs[0])] > tol_rel * S.config.backend.max_abs(S.data[slice(*sl.slcs[0])])).item()
-        D_bl = D_block[t] if (isinstance(D_block, dict) and t in D_block) else D_null
-        D_bl = min(D_bl, D_tol)
-        if 0 < D_bl < sl.Dp:  # block truncation
-            inds = S.config.backend.argsort(S.data[slice(*sl.slcs[0])])
-            Smask._data[slice(*sl.slcs[0])][inds[:-D_bl]] = False
-        elif D_bl == 0:
-            Smask._data[slice(*sl.slcs[0])] = False
-
-    temp_data = S._data * Smask.data
-    D_tol = sum(temp_data > tol * S.config.backend.max_abs(temp_data)).item()
-    D_total = min(D_total, D_tol)
-
-    if D_total == 0:
-        Smask._data[:] = False
-        return Smask
-
-    inds = S.config.backend.argsort(temp_data)
-
-    if truncate_multiplets and D_total < len(inds):
-        gap = -1
-        for p in range(D_total, len(inds)):
-            gap_p = abs(S._data[inds[-p]] - S._data[inds[-p - 1]])
-            if gap_p > gap:
-                D_total = p
-                gap = gap_p
-            if gap > abs(S._data[inds[-p]]):
-                break
-
-    Smask._data[inds[:-D_total]] = False
-    return Smask
+    ts = [t[:nsym] for t, D in zip(S.struct.t, S.struct.D) if D[0] > 0]
+    if isinstance(D_block, dict):
+        D_block = np.array([D_block.get(t, 0) for t in ts], dtype=np.float64)
+    if isinstance(tol_block, dict):
+        tol_block = np.array([tol_block.get(t, 0.) for t in ts], dtype=np.float64)
+    D_block = np.broadcast_to(np.asarray(D_block, dtype=np.float64), (len(ts),))
+    tol_block = np.broadcast_to(np.asarray(tol_block, dtype=np.float64), (len(ts),))
+    mask = S.config.backend.truncation_mask(S._data, seg, starts, D_block, tol_block, tol, D_total, truncate_multiplets)
+    return S._replace(data=mask)
+
+
+@_interned_cache(maxsize=1024)
+def _meta_truncation_mask(config, struct, slices):
+    """
+    Segments of data of diagonal tensor, skipping empty blocks: index of the block of each element, and the first element of each block.
+    Index pairs (dst, src) of elements at the same positions in blocks with opposite charges.
+    """
+    Dp = [sl.Dp for sl in slices if sl.Dp > 0]
+    seg = np.repeat(np.arange(len(Dp), dtype=np.int64), Dp)
+    starts = np.array([sl.slcs[0][0] for sl in slices if sl.Dp > 0], dtype=np.int64)
+    blocks = {t: sl for t, sl in zip(struct.t, slices)}
+    dst, src = [], []
+    if len(struct.t) > 0:
+        tn = np.array(struct.t, dtype=np.int64).reshape((len(struct.t), 1, -1))
+        tn = [tuple(x) for x in config.sym.fuse(tn, (1,), -1).reshape(len(struct.t), -1).tolist()]
+        for t, n in zip(struct.t, tn):
+            if n != t and n in blocks:
+                D = min(blocks[t].Dp, blocks[n].Dp)
+                dst.append(np.arange(blocks[t].slcs[0][0], blocks[t].slcs[0][0] + D, dtype=np.int64))
+                src.append(np.arange(blocks[n].slcs[0][0], blocks[n].slcs[0][0] + D, dtype=np.int64))
+    pairs = tuple(np.concatenate(x) if x else np.zeros(0, dtype=np.int64) for x in (dst, src))
+    return seg, starts, pairs
 
 
 def qr(a, axes=(0, 1), sQ=1, Qaxis=-1, Raxis=0) -> tuple[yastn.Tensor, yastn.Tensor]:
@@ -475,7 +615,7 @@ def qr(a, axes=(0, 1), sQ=1, Qaxis=-1, Raxis=0) -> tuple[yastn.Tensor, yastn.Ten
     meta, Qstruct, Qslices, Rstruct, Rslices = _meta_qr(a.config, struct, slices, sQ)
 
     sizes = tuple(x.size for x in (Qstruct, Rstruct))
-    Qdata, Rdata = a.config.backend.qr(data, meta, sizes)
+    Qdata, Rdata = _demote(a, *a.config.backend.qr(_promote(a, data), meta, sizes))
 
     ls = _leg_struct_trivial(Rstruct, axis=0)
 
@@ -570,7 +710,7 @@ def eigh(a, axes, sU=1, Uaxis=-1) -> tuple[yastn.Tensor, yastn.Tensor]:
     meta, Sstruct, Sslices, Ustruct, Uslices = _meta_eigh(a.config, struct, slices, sU)
     sizes = tuple(x.size for x in (Sstruct, Ustruct))
 
-    Sdata, Udata = a.config.backend.eigh(data, meta, sizes)
+    Sdata, Udata = _demote(a, *a.config.backend.eigh(_promote(a, data), meta, sizes))
 
     ls_s = _leg_struct_trivial(Sstruct, axis=1)
 
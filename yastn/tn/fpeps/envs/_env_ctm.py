@@ -16,7 +16,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import NamedTuple
 import logging
-from .... import rand, ones, eye, YastnError, Leg, tensordot, qr, truncation_mask, vdot
+from .... import rand, ones, eye, YastnError, Leg, tensordot, qr, truncation_mask, svd_with_truncation, vdot
 from ... import mps
 from .._peps import Peps, Peps2Layers
 from .._gates_auxiliary import apply_gate_onsite, gate_product_operator, gate_fix_order
@@ -85,6 +85,7 @@ class EnvCTM(Peps):
             raise YastnError(f"EnvCTM {init=} not recognized. Should be 'rand', 'eye', None.")
         for site in self.sites():
             self[site] = EnvCTM_local()
+        self._svd_subspaces = {}  # left singular vectors of the last projectors, for opts_svd['policy'] == 'subspace'
         if init is not None:
             self.reset_(init=init, leg=leg)
 
@@ -472,6 +473,8 @@ class EnvCTM(Peps):
         ----------
         opts_svd: dict
             A dictionary of options to pass to the SVD algorithm.
+            With ``'policy': 'subspace'``, the SVD of each projector is warm-started from its
+            singular vectors in the previous update, see :meth:`yastn.linalg.svd_with_truncation`.
 
         method: str
             '2site' or '1site'. The default is '2site'.
@@ -488,6 +491,7 @@ class EnvCTM(Peps):
         if method not in ('1site', '2site'):
             raise YastnError(f"CTM update {method=} not recognized. Should be '1site' or '2site'")
         update_proj_ = update_2site_projectors_ if method == '2site' else update_1site_projectors_
+        subspaces = env._svd_subspaces if opts_svd.get('policy', None) == 'subspace' else None
         #
         # Empty structure for projectors
         proj = Peps(env.geometry)
@@ -496,7 +500,7 @@ class EnvCTM(Peps):
         #
         # horizontal projectors
         for site in env.sites():
-            update_proj_(proj, site, 'lr', env, opts_svd)
+            update_proj_(proj, site, 'lr', env, opts_svd, subspaces)
         trivial_projectors_(proj, 'lr', env)  # fill None's
         #
         # horizontal move
@@ -507,7 +511,7 @@ class EnvCTM(Peps):
         #
         # vertical projectors
         for site in env.sites():
-            update_proj_(proj, site, 'tb', env, opts_svd)
+            update_proj_(proj, site, 'tb', env, opts_svd, subspaces)
         trivial_projectors_(proj, 'tb', env)
         #
         # vertical move
@@ -700,7 +704,7 @@ def calculate_corner_svd(env):
     return corner_sv
 
 
-def update_2site_projectors_(proj, site, dirn, env, opts_svd):
+def update_2site_projectors_(proj, site, dirn, env, opts_svd, subspaces=None):
     r"""
     Calculate new projectors for CTM moves from 4x4 extended corners.
     """
@@ -727,12 +731,12 @@ def update_2site_projectors_(proj, site, dirn, env, opts_svd):
     if 'r' in dirn:
         _, r_t = qr(cor_tt, axes=(0, 1))
         _, r_b = qr(cor_bb, axes=(1, 0))
-        proj[tr].hrb, proj[br].hrt = proj_corners(r_t, r_b, opts_svd=opts_svd)
+        proj[tr].hrb, proj[br].hrt = proj_corners(r_t, r_b, opts_svd, subspaces, (tr, 'hrb'))
 
     if 'l' in dirn:
         _, r_t = qr(cor_tt, axes=(1, 0))
         _, r_b = qr(cor_bb, axes=(0, 1))
-        proj[tl].hlb, proj[bl].hlt = proj_corners(r_t, r_b, opts_svd=opts_svd)
+        proj[tl].hlb, proj[bl].hlt = proj_corners(r_t, r_b, opts_svd, subspaces, (tl, 'hlb'))
 
     if ('t' in dirn) or ('b' in dirn):
         cor_ll = cor_bl @ cor_tl
@@ -741,15 +745,15 @@ def update_2site_projectors_(proj, site, dirn, env, opts_svd):
     if 't' in dirn:
         _, r_l = qr(cor_ll, axes=(0, 1))
         _, r_r = qr(cor_rr, axes=(1, 0))
-        proj[tl].vtr, proj[tr].vtl = proj_corners(r_l, r_r, opts_svd=opts_svd)
+        proj[tl].vtr, proj[tr].vtl = proj_corners(r_l, r_r, opts_svd, subspaces, (tl, 'vtr'))
 
     if 'b' in dirn:
         _, r_l = qr(cor_ll, axes=(1, 0))
         _, r_r = qr(cor_rr, axes=(0, 1))
-        proj[bl].vbr, proj[br].vbl = proj_corners(r_l, r_r, opts_svd=opts_svd)
+        proj[bl].vbr, proj[br].vbl = proj_corners(r_l, r_r, opts_svd, subspaces, (bl, 'vbr'))
 
 
-def update_1site_projectors_(proj, site, dirn, env, opts_svd):
+def update_1site_projectors_(proj, site, dirn, env, opts_svd, subspaces=None):
     r"""
     Calculate new projectors for CTM moves from 4x2 extended corners.
     """
@@ -769,10 +773,10 @@ def update_1site_projectors_(proj, site, dirn, env, opts_svd):
         r_br, r_bl = regularize_1site_corners(cor_br, cor_bl)
 
     if 'r' in dirn:
-        proj[tr].hrb, proj[br].hrt = proj_corners(r_tr, r_br, opts_svd=opts_svd)
+        proj[tr].hrb, proj[br].hrt = proj_corners(r_tr, r_br, opts_svd, subspaces, (tr, 'hrb'))
 
     if 'l' in dirn:
-        proj[tl].hlb, proj[bl].hlt = proj_corners(r_tl, r_bl, opts_svd=opts_svd)
+        proj[tl].hlb, proj[bl].hlt = proj_corners(r_tl, r_bl, opts_svd, subspaces, (tl, 'hlb'))
 
     if ('t' in dirn) or ('b' in dirn):
         cor_bl = (env[br].bl @ env[br].l).fuse_legs(axes=((0, 1), 2))
@@ -783,10 +787,10 @@ def update_1site_projectors_(proj, site, dirn, env, opts_svd):
         r_tr, r_br = regularize_1site_corners(cor_tr, cor_br)
 
     if 't' in dirn:
-        proj[tl].vtr, proj[tr].vtl = proj_corners(r_tl, r_tr, opts_svd=opts_svd)
+        proj[tl].vtr, proj[tr].vtl = proj_corners(r_tl, r_tr, opts_svd, subspaces, (tl, 'vtr'))
 
     if 'b' in dirn:
-        proj[bl].vbr, proj[br].vbl = proj_corners(r_bl, r_br, opts_svd=opts_svd)
+        proj[bl].vbr, proj[br].vbl = proj_corners(r_bl, r_br, opts_svd, subspaces, (bl, 'vbr'))
 
 
 def regularize_1site_corners(cor_0, cor_1):
@@ -799,13 +803,21 @@ def regularize_1site_corners(cor_0, cor_1):
     r_1 = tensordot((S @ U_1), Q_1, axes=(1, 1))
     return r_0, r_1
 
-def proj_corners(r0, r1, opts_svd):
-    r""" Projectors in between r0 @ r1.T corners. """
+def proj_corners(r0, r1, opts_svd, subspaces=None, key=None):
+    r"""
+    Projectors in between r0 @ r1.T corners.
+    If subspaces is provided, svd is warm-started from subspaces[key], which is updated.
+    """
     rr = tensordot(r0, r1, axes=(1, 1))
-    u, s, v = rr.svd(axes=(0, 1), sU=r0.s[1], fix_signs=True)
-
-    Smask = truncation_mask(s, **opts_svd)
-    u, s, v = Smask.apply_mask(u, s, v, axes=(-1, 0, 0))
+    if subspaces is None:
+        u, s, v = rr.svd(axes=(0, 1), sU=r0.s[1], fix_signs=True)
+        Smask = truncation_mask(s, **opts_svd)
+        u, s, v = Smask.apply_mask(u, s, v, axes=(-1, 0, 0))
+    else:
+        mask_f = lambda x: truncation_mask(x, **opts_svd)
+        u, s, v = svd_with_truncation(rr, axes=(0, 1), sU=r0.s[1], fix_signs=True, mask_f=mask_f,
+                                      U0=subspaces.get(key, None), **opts_svd)
+        subspaces[key] = u.detach()  # do not keep autograd graphs of previous sweeps
 
     rs = s.rsqrt()
     p0 = tensordot(r1, (rs @ v).conj(), axes=(0, 1)).unfuse_legs(axes=0)
@@ -441,13 +441,14 @@ class Env_mps_mpo_mps(EnvParent_3_obc):
 
     def update_env_(self, n, to='last'):
         if to == 'last':
-            tmp = ncon([self.bra[n].conj(), self.F[(n - 1, n)]], ((1, -1, -0), (1, -2, -3)))
+            # conjugation of bra[n] is fused with merging its blocks in tensordot
+            tmp = ncon([self.bra[n], self.F[(n - 1, n)]], ((1, -1, -0), (1, -2, -3)), conjs=(1, 0))
             tmp = self.op[n]._attach_01(tmp)
             self.F[(n, n + 1)] = ncon([tmp, self.ket[n]], ((-0, -1, 1, 2), (1, 2, -2)))
         elif to == 'first':
             tmp = self.ket[n] @ self.F[(n + 1, n)]
             tmp = self.op[n]._attach_23(tmp)
-            self.F[(n, n - 1)] = ncon([tmp, self.bra[n].conj()], ((-0, -1, 1, 2), (-2, 2, 1)))
+            self.F[(n, n - 1)] = ncon([tmp, self.bra[n]], ((-0, -1, 1, 2), (-2, 2, 1)), conjs=(0, 1))
 
     def Heff1(self, A, n):
         nl, nr = n - 1, n + 1
@@ -474,7 +475,7 @@ class Env_mps_mpo_mps(EnvParent_3_obc):
         nl, nr = n - 1, n + 1
         tmp = self.F[(nl, n)].tensordot(self.ket[n], axes=(2, 0))
         tmp = tmp.tensordot(self.F[(nr, n)], axes=(3, 0))
-        tmp = tmp.tensordot(self.bra[n].conj(), axes=((0, 4), (0, 2)))
+        tmp = tmp.tensordot(self.bra[n], axes=((0, 4), (0, 2)), conj=(0, 1))
         return tmp.transpose(axes=(0, 3, 2, 1)).fuse_legs(axes=((0, 1), (2, 3)))
 
 
@@ -202,8 +202,8 @@ def generate_mpo_fast(template, amplitudes, opts_svd=None) -> yastn.tn.mps.MpsMp
     if len(amplitudes) == 0:
         return template.trans.copy()
 
-    if opts_svd is None:
-        opts_svd = {'tol': 1e-13}
+    if opts_svd is None:  # tolerance above numerical noise of tensors in single precision
+        opts_svd = {'tol': 1e-6 if template.config.default_dtype in ('float32', 'complex64') else 1e-13}
 
     Js = {}
     for a, t in zip(amplitudes, template.tleft):
@@ -212,7 +212,9 @@ def generate_mpo_fast(template, amplitudes, opts_svd=None) -> yastn.tn.mps.MpsMp
         else:
             Js[t] = [a]
 
-    dtype = 'complex128' if any(isinstance(a, complex) for a in amplitudes) else template.config.default_dtype
+    dtype = template.config.default_dtype
+    if any(isinstance(a, complex) for a in amplitudes):
+        dtype = 'complex64' if dtype in ('float32', 'complex64') else 'complex128'
     J = Tensor(config=template.config, s=(-1, 1), dtype=dtype)
     for t, val in Js.items():
         J.set_block(ts=(t, t), Ds=(1, len(val)), val=val)